@@ -0,0 +1,125 @@
+"""JWT validation for tokens issued to the frontend by Azure AD.
+
+Signing keys are fetched from the JWKS endpoint ahead of time and refreshed by a
+background task, so validation never makes a blocking HTTP call in the request
+path. Successfully verified tokens are kept in a bounded LRU cache keyed by a
+hash of the token until they expire, so a burst of requests carrying the same
+token costs one RS256 signature verification.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import httpx
+import jwt
+
+logger = logging.getLogger("aiflix.auth")
+
+
+class VerifiedTokenCache:
+    """LRU of token hash -> claims for tokens whose signature was already verified."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[bytes, dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self.key(token)
+        claims = self.entries.get(key)
+        if claims is None:
+            self.misses += 1
+            return None
+        if claims.get("exp", 0) <= time.time():
+            # Expired since it was cached — let a full validation produce the error
+            del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: dict):
+        if "exp" not in claims:
+            return
+        key = self.key(token)
+        self.entries[key] = claims
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class TokenValidator:
+    """Validates RS256 bearer tokens against a JWKS endpoint, audience and issuer."""
+
+    def __init__(self, jwks_url: str, audience: str, issuer: str,
+                 cache_size: int = 1024, min_refresh_interval: float = 60.0):
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.issuer = issuer
+        self.cache = VerifiedTokenCache(cache_size)
+        self.min_refresh_interval = min_refresh_interval
+        self.signing_keys: Dict[str, jwt.PyJWK] = {}
+        self.last_refresh = 0.0
+        self.verifications = 0
+        self._refresh_lock = asyncio.Lock()
+
+    async def refresh_keys(self):
+        """Fetch the current signing keys from the JWKS endpoint."""
+        async with self._refresh_lock:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(self.jwks_url)
+                response.raise_for_status()
+            jwk_set = jwt.PyJWKSet.from_dict(response.json())
+            self.signing_keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+            self.last_refresh = time.monotonic()
+            logger.info("Loaded %s JWKS signing keys", len(self.signing_keys))
+
+    async def run_key_refresh(self, interval: float):
+        """Background task: keep the signing keys fresh (Azure AD rotates them)."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_keys()
+            except Exception as e:
+                logger.warning("JWKS refresh failed, keeping %s cached keys: %s", len(self.signing_keys), e)
+
+    async def _signing_key(self, token: str) -> jwt.PyJWK:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.signing_keys.get(kid)
+        if key is None and time.monotonic() - self.last_refresh >= self.min_refresh_interval:
+            # Unknown key id: keys may have rotated since the last refresh
+            try:
+                await self.refresh_keys()
+            except Exception as e:
+                logger.warning("JWKS refresh failed: %s", e)
+            key = self.signing_keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unable to find a signing key that matches: {kid}")
+        return key
+
+    async def validate(self, token: str) -> dict:
+        """Return the token's claims, or raise jwt.InvalidTokenError (incl. ExpiredSignatureError)."""
+        claims = self.cache.get(token)
+        if claims is not None:
+            return claims
+
+        signing_key = await self._signing_key(token)
+        self.verifications += 1
+        claims = jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=["RS256"],
+            audience=self.audience,
+            issuer=self.issuer
+        )
+        self.cache.put(token, claims)
+        return claims
@@ -0,0 +1,110 @@
+"""Throughput of GET /api/assets/{id} under concurrent load, blocking vs async Cosmos DB calls.
+
+Every container call is simulated with a fixed network round trip. In "blocking"
+mode the round trip is a time.sleep() inside the event loop (what the synchronous
+CosmosClient did); in "async" mode it is awaited (what the async client does).
+
+Usage:
+    python benchmarks/bench_cosmos_concurrency.py [--requests 200] [--concurrency 50] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+os.environ["AUTH_ENABLED"] = "false"
+os.environ.pop("COSMOS_ENDPOINT", None)
+os.environ.pop("BLOB_ACCOUNT_URL", None)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx  # noqa: E402
+import main  # noqa: E402
+from storage import CosmosRepository  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+ASSET = {
+    "id": "bench-asset",
+    "assetName": "Benchmark asset",
+    "assetDescription": "Used by the concurrency benchmark",
+    "createdBy": "bench",
+    "createdAt": "2024-01-01T00:00:00",
+}
+
+
+class SimulatedQuery:
+    """Async iterator over query results that pays one round trip before the first item."""
+
+    def __init__(self, items, latency, blocking):
+        self.items = list(items)
+        self.latency = latency
+        self.blocking = blocking
+        self.started = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.started:
+            self.started = True
+            if self.blocking:
+                time.sleep(self.latency)
+            else:
+                await asyncio.sleep(self.latency)
+        if not self.items:
+            raise StopAsyncIteration
+        return self.items.pop(0)
+
+
+class SimulatedContainer:
+    def __init__(self, items, latency, blocking):
+        self.items = items
+        self.latency = latency
+        self.blocking = blocking
+
+    def query_items(self, query, parameters=None, **kwargs):
+        return SimulatedQuery(self.items, self.latency, self.blocking)
+
+    async def read_item(self, item, partition_key, **kwargs):
+        return [i async for i in SimulatedQuery(self.items, self.latency, self.blocking)][0]
+
+
+async def run(mode, total, concurrency, latency):
+    blocking = mode == "blocking"
+    repo = CosmosRepository("https://bench.documents.azure.com", "aiflix", "assets", credential=None)
+    repo.container = SimulatedContainer([ASSET], latency, blocking)
+    repo.ratings_container = SimulatedContainer([4.0], latency, blocking)
+    main.repo = repo
+    semaphore = asyncio.Semaphore(concurrency)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(f"/api/assets/{ASSET['id']}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    print(f"{mode:>8}: {total} requests, concurrency {concurrency}, "
+          f"{elapsed:.2f}s, {total / elapsed:.1f} req/s")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    for mode in ("blocking", "async"):
+        asyncio.run(run(mode, args.requests, args.concurrency, latency))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,211 @@
+"""Latency and throughput of every /api route, run offline against the local storage backend.
+
+Seeds an in-memory catalog, then drives each route through the ASGI app with a
+fixed concurrency and reports p50/p99 latency and requests per second.
+/api/generate-image is skipped because it always calls Azure OpenAI.
+
+Usage:
+    python benchmarks/bench_endpoints.py [--assets 200] [--requests 300] [--concurrency 20]
+                                         [--json results.json] [--baseline results.json --tolerance 1.5]
+
+With --baseline, exits non-zero if any route's p50 is more than `tolerance` times
+slower than in the baseline file, so it can gate CI.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["AUTH_ENABLED"] = "false"
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["EMAIL_NOTIFICATIONS_ENABLED"] = "false"
+os.environ.setdefault("LOCAL_BLOB_DIR", tempfile.mkdtemp(prefix="aiflix-bench-"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx  # noqa: E402
+from PIL import Image  # noqa: E402
+
+import main  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("aiflix").setLevel(logging.WARNING)
+
+
+def png_data_url(size=(64, 64)) -> str:
+    """A real PNG, encoded by Pillow so the upload path can decode it."""
+    out = io.BytesIO()
+    Image.new("RGB", size, (200, 40, 40)).save(out, "PNG")
+    return "data:image/png;base64," + base64.b64encode(out.getvalue()).decode()
+
+
+PIXEL = png_data_url()
+
+
+def asset_body(i):
+    return {
+        "assetName": f"Benchmark asset {i}",
+        "assetDescription": f"Synthetic asset number {i} for the endpoint benchmark",
+        "primaryCustomerScenario": "Benchmarking",
+        "createdBy": f"creator-{i % 25}",
+        "tags": ["bench", f"group-{i % 10}"],
+        "assetPicture": PIXEL,
+        "screenshots": [PIXEL, PIXEL],
+    }
+
+
+async def seed(client, count):
+    ids = []
+    for i in range(count):
+        response = await client.post("/api/assets", json=asset_body(i))
+        response.raise_for_status()
+        if not ids:
+            check_created(response.json())
+        asset_id = response.json()["id"]
+        ids.append(asset_id)
+        for u in range(3):
+            await client.post(f"/api/assets/{asset_id}/ratings", json={"rating": 1 + (i + u) % 5, "userId": f"user-{u}", "userName": f"User {u}"})
+            await client.post(f"/api/assets/{asset_id}/comments", json={"text": f"Comment {u}", "userId": f"user-{u}", "userName": f"User {u}"})
+        await client.post(f"/api/assets/{asset_id}/improvements", json={"type": "slides", "contributorId": "user-0", "contributorName": "User 0", "data": {"url": "https://example.com"}})
+    return ids
+
+
+def check_created(asset):
+    """Fail fast if the fixture images didn't make it through the upload path."""
+    assert asset["assetPicture"].startswith("/blobs/"), f"assetPicture was not uploaded: {asset['assetPicture'][:80]}"
+    assert all(url.startswith("/blobs/") for url in asset["screenshots"]), "screenshots were not uploaded"
+    if main.rendition_pipeline:
+        assert asset.get("assetPictureRenditions"), "no renditions were generated for assetPicture"
+        renditions = asset.get("screenshotRenditions") or []
+        assert len(renditions) == len(asset["screenshots"]) and all(renditions), "no renditions were generated for screenshots"
+
+
+def scenarios(ids):
+    """(name, method, build) where build(n) returns (path, json body) for the nth request."""
+    pick = lambda n: ids[n % len(ids)]  # noqa: E731
+    return [
+        ("GET /api/assets", "GET", lambda n: ("/api/assets", None)),
+        ("GET /api/assets/page", "GET", lambda n: ("/api/assets/page?limit=20", None)),
+        ("GET /api/assets/{id}", "GET", lambda n: (f"/api/assets/{pick(n)}", None)),
+        ("GET /api/assets/{id}/full", "GET", lambda n: (f"/api/assets/{pick(n)}/full?userId=user-1", None)),
+        ("GET /api/search", "GET", lambda n: (f"/api/search?q=synthetic+asset+{n % 10}", None)),
+        ("GET /api/tags", "GET", lambda n: ("/api/tags", None)),
+        ("GET /api/assets?tag=", "GET", lambda n: (f"/api/assets?tag=bench&tag=group-{n % 10}", None)),
+        ("POST /api/assets", "POST", lambda n: ("/api/assets", asset_body(n))),
+        ("PUT /api/assets/{id}", "PUT", lambda n: (f"/api/assets/{pick(n)}", {"assetDescription": f"Updated {n}"})),
+        ("PATCH /api/assets/{id}/picture", "PATCH", lambda n: (f"/api/assets/{pick(n)}/picture", {"assetPicture": PIXEL})),
+        ("POST /api/assets/{id}/ratings", "POST", lambda n: (f"/api/assets/{pick(n)}/ratings", {"rating": 1 + n % 5, "userId": f"user-{n % 7}", "userName": "Bench"})),
+        ("GET /api/assets/{id}/ratings", "GET", lambda n: (f"/api/assets/{pick(n)}/ratings", None)),
+        ("GET /api/assets/{id}/ratings/user/{uid}", "GET", lambda n: (f"/api/assets/{pick(n)}/ratings/user/user-1", None)),
+        ("POST /api/ratings/summary", "POST", lambda n: ("/api/ratings/summary", {"assetIds": ids[:40], "userId": "user-1"})),
+        ("POST /api/assets/{id}/comments", "POST", lambda n: (f"/api/assets/{pick(n)}/comments", {"text": f"Bench {n}", "userId": "bench", "userName": "Bench"})),
+        ("GET /api/assets/{id}/comments", "GET", lambda n: (f"/api/assets/{pick(n)}/comments", None)),
+        ("POST /api/assets/{id}/improvements", "POST", lambda n: (f"/api/assets/{pick(n)}/improvements", {"type": "setup", "contributorId": "bench", "contributorName": "Bench", "data": {}})),
+        ("GET /api/assets/{id}/improvements", "GET", lambda n: (f"/api/assets/{pick(n)}/improvements", None)),
+    ]
+
+
+async def measure(client, method, build, total, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(n):
+        path, body = build(n)
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path} -> {response.status_code}: {response.text}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": total,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "rps": total / elapsed,
+    }
+
+
+async def delete_scenarios(client, total, concurrency):
+    """Routes that destroy their target need fresh targets per request."""
+    results = {}
+    victims = await seed(client, total)
+    results["DELETE /api/assets/{id}"] = await measure(
+        client, "DELETE", lambda n: (f"/api/assets/{victims[n]}", None), total, concurrency)
+
+    target = (await seed(client, 1))[0]
+    comment_ids = []
+    for n in range(total):
+        response = await client.post(f"/api/assets/{target}/comments", json={"text": f"Doomed {n}", "userId": "bench", "userName": "Bench"})
+        comment_ids.append(response.json()["id"])
+    results["DELETE /api/assets/{id}/comments/{cid}"] = await measure(
+        client, "DELETE", lambda n: (f"/api/assets/{target}/comments/{comment_ids[n]}?user_id=bench", None), total, concurrency)
+    return results
+
+
+async def run(args):
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            ids = await seed(client, args.assets)
+            results = {}
+            for name, method, build in scenarios(ids):
+                results[name] = await measure(client, method, build, args.requests, args.concurrency)
+            results.update(await delete_scenarios(client, args.requests, args.concurrency))
+    return results
+
+
+def report(results):
+    print(f"{'route':<45} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for name, r in results.items():
+        print(f"{name:<45} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['rps']:>9.1f}")
+
+
+def check_regressions(results, baseline, tolerance):
+    failures = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and r["p50_ms"] > base["p50_ms"] * tolerance:
+            failures.append(f"{name}: p50 {r['p50_ms']:.2f}ms vs baseline {base['p50_ms']:.2f}ms")
+    return failures
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", type=int, default=200, help="catalog size to seed")
+    parser.add_argument("--requests", type=int, default=300, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed p50 slowdown factor vs baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = check_regressions(results, json.load(f), args.tolerance)
+        if failures:
+            print("\nRegressions:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,102 @@
+"""Query latency of the in-process search index at large catalog sizes.
+
+Builds a SearchIndex over synthetic assets whose words follow a Zipf-like
+distribution (a few very common words, a long tail of rare ones), then times
+typical queries: a common word, a rare word, multi-word queries and typeahead
+prefixes. Also reports build time and the cost of re-indexing one asset.
+
+Usage:
+    python benchmarks/bench_search.py [--sizes 10000 100000] [--queries 200]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from search import SearchIndex  # noqa: E402
+
+SYLLABLES = ["ka", "ro", "mi", "te", "su", "lo", "na", "vi", "de", "zu", "pa", "shi", "gen", "tor", "lex", "ai"]
+
+
+def vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def synthetic_asset(rng, i, words, cum_weights):
+    pick = lambda k: rng.choices(words, cum_weights=cum_weights, k=k)  # noqa: E731
+    return {
+        "id": f"asset-{i}",
+        "assetName": " ".join(pick(rng.randint(2, 5))).title(),
+        "assetDescription": " ".join(pick(rng.randint(20, 80))),
+        "primaryCustomerScenario": rng.choice(["Copilot", "RAG", "Agents", "Vision", "Speech", "Analytics"]),
+        "tags": pick(rng.randint(1, 4)),
+    }
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def time_queries(index, queries):
+    latencies, matches = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, total = index.search(query, limit=20)
+        latencies.append((time.perf_counter() - start) * 1000)
+        matches.append(total)
+    return statistics.median(latencies), percentile(latencies, 0.99), statistics.median(matches)
+
+
+def run(size, query_count, seed=42):
+    rng = random.Random(seed)
+    words = vocabulary(rng, 20000)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    rng.shuffle(words)
+    common, rare = words[:50], words[5000:]
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    for i in range(size):
+        asset = synthetic_asset(rng, i, words, cum_weights)
+        index.add(asset, {"id": asset["id"]})
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(query_count):
+        index.add(synthetic_asset(rng, rng.randrange(size), words, cum_weights))
+    reindex_ms = (time.perf_counter() - start) * 1000 / query_count
+
+    kinds = {
+        "common word": [rng.choice(common) for _ in range(query_count)],
+        "rare word": [rng.choice(rare) for _ in range(query_count)],
+        "two words": [f"{rng.choice(common)} {rng.choice(words[:2000])} " for _ in range(query_count)],
+        "prefix (3 chars)": [rng.choice(common)[:3] for _ in range(query_count)],
+        "word + prefix": [f"{rng.choice(common)} {rng.choice(words[:2000])[:4]}" for _ in range(query_count)],
+    }
+    print(f"\n{size} assets: built in {build_s:.1f}s ({len(index.terms)} terms), re-index one asset {reindex_ms:.3f} ms")
+    print(f"{'query':<20} {'p50 ms':>9} {'p99 ms':>9} {'matches':>9}")
+    for kind, queries in kinds.items():
+        p50, p99, matches = time_queries(index, queries)
+        print(f"{kind:<20} {p50:>9.3f} {p99:>9.3f} {matches:>9.0f}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="catalog sizes to index")
+    parser.add_argument("--queries", type=int, default=200, help="queries per query kind")
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,79 @@
+"""Tag facets over the asset catalog.
+
+Tags are normalized once when an asset is written (trimmed, inner whitespace
+collapsed, lowercased, duplicates dropped), so "RAG", " rag " and "Rag" are
+one facet. The index maps each tag to the ids of the assets carrying it; tag
+counts and AND/OR tag filters are answered from those sets without touching
+storage.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+MAX_TAG_CHARS = 50
+
+
+def normalize_tag(tag: str) -> str:
+    return " ".join(tag.split()).lower()[:MAX_TAG_CHARS]
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    """Normalized tags without empties or duplicates, in their original order."""
+    return list(dict.fromkeys(t for t in (normalize_tag(tag) for tag in tags or []) if t))
+
+
+class TagIndex:
+    def __init__(self):
+        # tag -> ids of the assets carrying it
+        self.postings: Dict[str, Set[str]] = {}
+        # asset id -> its tags, to diff against on re-index
+        self.asset_tags: Dict[str, Tuple[str, ...]] = {}
+
+    def add(self, asset: dict):
+        """Index or re-index an asset's tags.
+
+        Tags are normalized again here so documents written before tags were
+        normalized on write land in the right facet.
+        """
+        asset_id = asset["id"]
+        tags = tuple(normalize_tags(asset.get("tags")))
+        previous = self.asset_tags.get(asset_id, ())
+        if tags == previous:
+            return
+        self._unlink(asset_id, set(previous) - set(tags))
+        for tag in tags:
+            self.postings.setdefault(tag, set()).add(asset_id)
+        self.asset_tags[asset_id] = tags
+
+    def remove(self, asset_id: str):
+        self._unlink(asset_id, self.asset_tags.pop(asset_id, ()))
+
+    def _unlink(self, asset_id: str, tags: Iterable[str]):
+        for tag in tags:
+            ids = self.postings.get(tag)
+            if ids is None:
+                continue
+            ids.discard(asset_id)
+            if not ids:
+                del self.postings[tag]
+
+    def counts(self, prefix: str = "", limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """(tag, asset count) pairs, most used first, then alphabetically."""
+        prefix = normalize_tag(prefix)
+        counts = [(tag, len(ids)) for tag, ids in self.postings.items() if tag.startswith(prefix)]
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts[:limit] if limit else counts
+
+    def match(self, tags: Iterable[str], match_all: bool = True) -> Set[str]:
+        """Ids of assets carrying every tag (match_all) or any of them."""
+        sets = [self.postings.get(tag, set()) for tag in normalize_tags(tags)]
+        if not sets:
+            return set()
+        if not match_all:
+            return set().union(*sets)
+        # Intersect from the smallest set so each step only shrinks it
+        sets.sort(key=len)
+        result = set(sets[0])
+        for ids in sets[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
@@ -0,0 +1,178 @@
+"""Poster image generation through Azure OpenAI.
+
+Upstream calls are expensive (tens of seconds and real money), so results are
+content-addressed: the blob `generated/{sha256 of model + options + prompt}.png`
+holds the image for a prompt, which survives restarts and is shared by every
+instance. Identical requests that arrive while a generation is in flight wait
+on that call instead of starting their own (single-flight). HTTP connections
+and the Cognitive Services access token are shared across requests.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from metrics import IMAGEGEN_UPSTREAM_DURATION
+from storage import BlobStore
+
+logger = logging.getLogger("aiflix.imagegen")
+
+
+class ImageGenerationError(Exception):
+    """Upstream rejected or failed a generation; carries the HTTP status to return."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AccessTokenCache:
+    """Caches an Azure AD access token and refreshes it ahead of expiry.
+
+    Within `refresh_margin` seconds of expiry the cached token is still returned
+    while a replacement is fetched in the background, so requests only wait on
+    the credential when there is no usable token at all.
+    """
+
+    def __init__(self, credential, scope: str, refresh_margin: float = 300.0):
+        self.credential = credential  # async credential
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.token = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get(self) -> str:
+        now = time.time()
+        if self.token is None or self.token.expires_on <= now + 30:
+            await self._refresh()
+        elif self.token.expires_on <= now + self.refresh_margin and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+        return self.token.token
+
+    async def _refresh(self):
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self.token is None or self.token.expires_on <= time.time() + self.refresh_margin:
+                self.token = await self.credential.get_token(self.scope)
+
+    async def _refresh_in_background(self):
+        try:
+            await self._refresh()
+        except Exception as e:
+            logger.warning("Background access token refresh failed: %s", e)
+        finally:
+            self._refresh_task = None
+
+
+class ImageGenerator:
+    """Generates images for prompts, backed by a blob cache and single-flight coalescing."""
+
+    CACHE_PREFIX = "generated/"
+
+    def __init__(self, endpoint: str, deployment: str, http_client: httpx.AsyncClient,
+                 token_cache: AccessTokenCache, blobs: Optional[BlobStore] = None,
+                 size: str = "1024x1024", quality: str = "high"):
+        self.endpoint = endpoint
+        self.deployment = deployment
+        self.http_client = http_client
+        self.token_cache = token_cache
+        self.blobs = blobs
+        self.options = {"n": 1, "size": size, "quality": quality, "output_format": "png"}
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+
+    def cache_key(self, prompt: str) -> str:
+        material = json.dumps({"model": self.deployment, "options": self.options, "prompt": prompt}, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def stats(self) -> dict:
+        return {
+            "cacheHits": self.cache_hits,
+            "cacheMisses": self.cache_misses,
+            "coalesced": self.coalesced,
+            "upstreamCalls": self.upstream_calls,
+            "inFlight": len(self.in_flight),
+        }
+
+    async def generate(self, prompt: str) -> bytes:
+        """PNG bytes for a prompt: from the blob cache, a generation already in flight, or upstream."""
+        key = self.cache_key(prompt)
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # Run as its own task so a caller disconnecting doesn't cancel the shared generation
+            task = asyncio.create_task(self._cached_or_generate(key, prompt))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task):
+        self.in_flight.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter has gone away
+            task.exception()
+
+    async def _cached_or_generate(self, key: str, prompt: str) -> bytes:
+        blob_name = f"{self.CACHE_PREFIX}{key}.png"
+        if self.blobs:
+            try:
+                cached = await self.blobs.download(blob_name)
+            except Exception as e:
+                logger.warning("Image cache read failed for %s: %s", blob_name, e)
+                cached = None
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+        self.cache_misses += 1
+
+        image = await self._call_upstream(prompt)
+        if self.blobs:
+            try:
+                await self.blobs.upload(blob_name, image, content_type="image/png")
+            except Exception as e:
+                # The caller still gets the image; the next identical prompt just regenerates
+                logger.warning("Image cache write failed for %s: %s", blob_name, e)
+        return image
+
+    async def _call_upstream(self, prompt: str) -> bytes:
+        self.upstream_calls += 1
+        token = await self.token_cache.get()
+        # Azure AI Foundry OpenAI-compatible endpoint format
+        url = f"{self.endpoint}/images/generations"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}"
+        }
+        payload = {"model": self.deployment, "prompt": prompt, **self.options}
+
+        start = time.perf_counter()
+        try:
+            response = await self.http_client.post(url, json=payload, headers=headers)
+        except httpx.HTTPError:
+            IMAGEGEN_UPSTREAM_DURATION.observe(time.perf_counter() - start, ("error",))
+            raise
+        IMAGEGEN_UPSTREAM_DURATION.observe(time.perf_counter() - start, (str(response.status_code),))
+        if response.status_code != 200:
+            raise ImageGenerationError(response.status_code, f"Azure OpenAI error: {response.text}")
+        logger.info("Generated image with %s in %.1fs", self.deployment, (time.perf_counter() - start))
+
+        # Handle both URL and base64 response formats
+        image_result = response.json()["data"][0]
+        if "b64_json" in image_result:
+            return base64.b64decode(image_result["b64_json"])
+        if "url" in image_result:
+            img_response = await self.http_client.get(image_result["url"])
+            img_response.raise_for_status()
+            return img_response.content
+        raise ImageGenerationError(500, "Unexpected response format")
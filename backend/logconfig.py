@@ -0,0 +1,253 @@
+"""Logging setup: JSON records, written off the event loop.
+
+Handlers on the request path only put records on a bounded queue; a
+QueueListener thread formats and writes them. A slow or blocked stdout
+(container log pipe under load) therefore never stalls the event loop. When
+the queue is full, records are dropped and counted rather than waited on.
+
+Each record carries the id of the request it was logged from (X-Request-ID,
+taken from the client or generated by RequestIdMiddleware and echoed in the
+response). Call sites that log on every request are rate limited per call
+site, and may ask to be sampled with `extra={"sample_rate": 0.01}`. Warnings
+and errors are never rate limited or sampled out.
+
+Environment:
+  LOG_LEVEL            root level (default INFO)
+  LOG_LEVELS           per-logger levels, e.g. "aiflix.auth=DEBUG,azure=WARNING"
+  LOG_FORMAT           "json" (default) or "text" for local development
+  LOG_QUEUE_SIZE       records buffered before dropping (default 10000)
+  LOG_RATE_PER_SECOND  records per second allowed from one call site (default 20)
+  LOG_RATE_BURST       records one call site may log at once (default 100)
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Library loggers that log every HTTP call at INFO
+DEFAULT_LOG_LEVELS = "azure=WARNING"
+
+# Request id of the request being served
+current_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+REQUEST_ID_HEADER = b"x-request-id"
+MAX_REQUEST_ID_CHARS = 64
+
+# LogRecord attributes that are not `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "requestId", "suppressed"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, requestId, any `extra` fields, exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "requestId", None):
+            entry["requestId"] = record.requestId
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "sample_rate":
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        if getattr(record, "requestId", None):
+            line = f"{line} [{record.requestId}]"
+        return line
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site, plus opt-in sampling via extra={"sample_rate": ...}.
+
+    Only applies below WARNING: warnings and errors always get through. The
+    first record let through after some were dropped carries how many were
+    suppressed. Runs in the thread that logs, before anything is queued;
+    threads racing on a bucket can only miscount a little.
+    """
+
+    def __init__(self, per_second: float, burst: float):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst
+        # (path, line) -> [tokens, last refill, suppressed since last emitted]
+        self.buckets: Dict[Tuple[str, int], list] = {}
+        self.suppressed = 0
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None and random.random() >= sample_rate:
+            self.sampled_out += 1
+            return False
+        if self.per_second <= 0:
+            return True
+        now = time.monotonic()
+        key = (record.pathname, record.lineno)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [self.burst, now, 0]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            self.suppressed += 1
+            return False
+        bucket[0] -= 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queues records for the writer thread, dropping them when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that can't cross threads (args, traceback objects, the
+        # request id contextvar) here; leave formatting to the writer thread
+        record = copy.copy(record)
+        record.requestId = current_request_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    SHUTDOWN_TIMEOUT_SECONDS = 5
+
+    def stop(self):
+        """Write out what is queued and stop; gives up (never hangs the exit) if stdout stays blocked."""
+        if self._thread is None:
+            return
+        try:
+            # The queue may be full at shutdown; wait for the writer to make room for the sentinel
+            self.queue.put(self._sentinel, timeout=self.SHUTDOWN_TIMEOUT_SECONDS)
+        except queue.Full:
+            return
+        self._thread.join(self.SHUTDOWN_TIMEOUT_SECONDS)
+        self._thread = None
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """'aiflix.auth=DEBUG, azure=WARNING' -> {'aiflix.auth': 'DEBUG', 'azure': 'WARNING'}."""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+# Set by configure_logging()
+queue_handler: Optional[NonBlockingQueueHandler] = None
+rate_limiter: Optional[RateLimitFilter] = None
+_listener: Optional[DrainingQueueListener] = None
+
+
+def configure_logging():
+    """Route all logging through the queue and the writer thread. Safe to call more than once."""
+    global queue_handler, rate_limiter, _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(TextFormatter() if os.getenv("LOG_FORMAT", "json").lower() == "text" else JsonFormatter())
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    rate_limiter = RateLimitFilter(float(os.getenv("LOG_RATE_PER_SECOND", "20")), float(os.getenv("LOG_RATE_BURST", "100")))
+    queue_handler.addFilter(rate_limiter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    for name, level in parse_levels(os.getenv("LOG_LEVELS", DEFAULT_LOG_LEVELS)).items():
+        logging.getLogger(name).setLevel(level)
+    # uvicorn may have given its loggers their own (synchronous) handlers before importing the app
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = DrainingQueueListener(queue_handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(_listener.stop)
+
+
+def stats() -> dict:
+    return {
+        "queued": queue_handler.queue.qsize() if queue_handler else 0,
+        "dropped": queue_handler.dropped if queue_handler else 0,
+        "rateLimited": rate_limiter.suppressed if rate_limiter else 0,
+        "sampledOut": rate_limiter.sampled_out if rate_limiter else 0,
+    }
+
+
+class RequestIdMiddleware:
+    """Tags every request with an id: the client's X-Request-ID if it sent one, else a new one; echoed in the response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:MAX_REQUEST_ID_CHARS]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+        header = (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [header]
+            await send(message)
+
+        token = current_request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            current_request_id.reset(token)
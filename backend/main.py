@@ -1,33 +1,65 @@
-from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request, Response, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
 import base64
+import hashlib
+import json
 import os
+import re
 import httpx
 import uuid
 import jwt
 import logging
-import sys
-from jwt import PyJWKClient
-from datetime import datetime, timedelta
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
-from azure.cosmos import CosmosClient, PartitionKey, exceptions
-from azure.storage.blob import BlobServiceClient, ContentSettings, generate_blob_sas, BlobSasPermissions, UserDelegationKey
-
-# Configure logging to stdout for Azure App Service
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
-logger = logging.getLogger("aiflix")
-logger.setLevel(logging.DEBUG)
+from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
+from auth import TokenValidator
+from facets import TagIndex, normalize_tags
+from imagegen import AccessTokenCache, ImageGenerationError, ImageGenerator
+import logconfig
+import metrics
+from notifications import NotificationDispatcher
+from profiler import SamplingProfiler
+from renditions import RenditionPipeline
+from search import SearchIndex
+import timing
+from storage import AssetCatalogReplica, AssetRepository, BlobStore, StorageError, PreconditionFailedError, CosmosRepository, AzureBlobStore, InMemoryRepository, LocalBlobStore, rating_id
 
 load_dotenv()
 
-app = FastAPI(title="AiFlix API")
+# JSON logs to stdout for Azure App Service, written by a background thread (see logconfig.py)
+logconfig.configure_logging()
+logger = logging.getLogger("aiflix")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the storage backends and the background services built on them on startup; release them on shutdown."""
+    await init_storage()
+    await start_replica()
+    await start_indexes()
+    start_renditions()
+    key_refresh_task = await start_auth()
+    await start_notifications()
+    await start_imagegen()
+    yield
+    if key_refresh_task:
+        key_refresh_task.cancel()
+    profiler.disable()
+    await stop_imagegen()
+    await stop_notifications()
+    stop_renditions()
+    await stop_indexes()
+    await stop_replica()
+    await close_storage()
+
+app = FastAPI(title="AiFlix API", lifespan=lifespan)
+# Every route reports its handler time (incl. response serialization) in Server-Timing
+app.router.route_class = timing.TimedRoute
 
 # === JWT Token Validation ===
 FRONTEND_TENANT_ID = os.getenv("FRONTEND_TENANT_ID", "72f988bf-86f1-41af-91ab-2d7cd011db47")
@@ -36,31 +68,40 @@ JWKS_URL = f"https://login.microsoftonline.com/{FRONTEND_TENANT_ID}/discovery/v2
 AUTH_ENABLED = os.getenv("AUTH_ENABLED", "true").lower() == "true"
 
 logger.info("=== JWT Auth Configuration ===")
-logger.info(f"AUTH_ENABLED: {AUTH_ENABLED}")
-logger.info(f"FRONTEND_TENANT_ID: {FRONTEND_TENANT_ID}")
-logger.info(f"FRONTEND_CLIENT_ID: {FRONTEND_CLIENT_ID}")
-logger.info(f"JWKS_URL: {JWKS_URL}")
+logger.info("AUTH_ENABLED: %s", AUTH_ENABLED)
+logger.info("FRONTEND_TENANT_ID: %s", FRONTEND_TENANT_ID)
+logger.info("FRONTEND_CLIENT_ID: %s", FRONTEND_CLIENT_ID)
+logger.info("JWKS_URL: %s", JWKS_URL)
 logger.info("==============================")
 
-# Cache the JWK client
-jwks_client = None
+ISSUER = f"https://login.microsoftonline.com/{FRONTEND_TENANT_ID}/v2.0"
+# Verified tokens are cached (by hash, until exp) so repeat requests skip RS256 verification
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+# How often the background task re-fetches the JWKS signing keys
+JWKS_REFRESH_SECONDS = float(os.getenv("JWKS_REFRESH_SECONDS", "3600"))
 
-def get_jwks_client():
-    global jwks_client
-    if jwks_client is None:
-        jwks_client = PyJWKClient(JWKS_URL)
-    return jwks_client
+token_validator = TokenValidator(JWKS_URL, audience=FRONTEND_CLIENT_ID, issuer=ISSUER, cache_size=AUTH_TOKEN_CACHE_SIZE)
 
-async def validate_token(request: Request):
-    """Validate JWT token from frontend's Azure AD."""
-    # Skip auth for health check and local development
-    if request.url.path == "/health":
+async def start_auth():
+    """Prefetch the JWKS signing keys and start the background refresh task."""
+    if not AUTH_ENABLED:
         return None
+    try:
+        await token_validator.refresh_keys()
+    except Exception as e:
+        # Validation will retry the fetch on first use
+        logger.warning("Failed to prefetch JWKS signing keys: %s", e)
+    return asyncio.create_task(token_validator.run_key_refresh(JWKS_REFRESH_SECONDS))
+
+async def authenticate_request(request: Request) -> Optional[dict]:
+    """Validate the request's bearer token and store its claims on request.state.user_claims.
     
-    # Allow unauthenticated in development
-    auth_enabled = os.getenv("AUTH_ENABLED", "true").lower() == "true"
-    if not auth_enabled:
-        return None
+    Shared by AuthMiddleware and the validate_token dependency so a request is
+    only ever validated once. Raises HTTPException(401) on failure.
+    """
+    claims = getattr(request.state, "user_claims", None)
+    if claims is not None:
+        return claims
     
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -69,86 +110,61 @@ async def validate_token(request: Request):
     token = auth_header.split(" ")[1]
     
     try:
-        # Get the signing key from Azure AD
-        signing_key = get_jwks_client().get_signing_key_from_jwt(token)
-        
-        # Decode and validate the token
-        payload = jwt.decode(
-            token,
-            signing_key.key,
-            algorithms=["RS256"],
-            audience=FRONTEND_CLIENT_ID,
-            issuer=f"https://login.microsoftonline.com/{FRONTEND_TENANT_ID}/v2.0"
-        )
-        return payload
+        claims = await token_validator.validate(token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError as e:
         raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+    
+    request.state.user_claims = claims
+    return claims
+
+async def validate_token(request: Request):
+    """Validate JWT token from frontend's Azure AD."""
+    # Skip auth for health check and local development
+    if request.url.path == "/health":
+        return None
+    
+    # Allow unauthenticated in development
+    if not AUTH_ENABLED:
+        return None
+    
+    return await authenticate_request(request)
 
 # Auth middleware for API routes
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, FileResponse, StreamingResponse
 
 class AuthMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        logger.debug(f"AUTH - Request: {request.method} {request.url.path}")
+        # Runs on every request: log with lazy %-style arguments so nothing is
+        # formatted unless DEBUG is enabled for this logger
+        path = request.url.path
         
         # Skip auth for non-API routes and health check
-        if not request.url.path.startswith("/api") or request.url.path == "/health":
-            logger.debug("AUTH - Skipping auth (non-API or health)")
+        if not path.startswith("/api") or path == "/health":
+            logger.debug("AUTH - Skipping auth (non-API or health): %s %s", request.method, path)
             return await call_next(request)
         
         # Skip auth in development
-        auth_enabled = os.getenv("AUTH_ENABLED", "true").lower() == "true"
-        if not auth_enabled:
-            logger.debug("AUTH - Skipping auth (AUTH_ENABLED=false)")
+        if not AUTH_ENABLED:
+            logger.debug("AUTH - Skipping auth (AUTH_ENABLED=false): %s %s", request.method, path)
             return await call_next(request)
         
         # Handle CORS preflight
         if request.method == "OPTIONS":
-            logger.debug("AUTH - Skipping auth (OPTIONS preflight)")
+            logger.debug("AUTH - Skipping auth (OPTIONS preflight): %s", path)
             return await call_next(request)
         
-        auth_header = request.headers.get("Authorization")
-        logger.info(f"AUTH - Authorization header present: {bool(auth_header)}")
-        if auth_header:
-            logger.debug(f"AUTH - Authorization header prefix: {auth_header[:50]}...")
-        
-        if not auth_header or not auth_header.startswith("Bearer "):
-            logger.warning("AUTH - REJECTED: Missing or invalid Authorization header")
-            return JSONResponse(status_code=401, content={"detail": "Missing or invalid Authorization header"})
-        
-        token = auth_header.split(" ")[1]
-        logger.debug(f"AUTH - Token length: {len(token)}")
-        logger.debug(f"AUTH - Token prefix: {token[:50]}...")
-        
         try:
-            logger.debug(f"AUTH - Fetching signing key from JWKS: {JWKS_URL}")
-            signing_key = get_jwks_client().get_signing_key_from_jwt(token)
-            logger.debug("AUTH - Got signing key, validating token...")
-            logger.debug(f"AUTH - Expected audience: {FRONTEND_CLIENT_ID}")
-            logger.debug(f"AUTH - Expected issuer: https://login.microsoftonline.com/{FRONTEND_TENANT_ID}/v2.0")
-            
-            decoded = jwt.decode(
-                token,
-                signing_key.key,
-                algorithms=["RS256"],
-                audience=FRONTEND_CLIENT_ID,
-                issuer=f"https://login.microsoftonline.com/{FRONTEND_TENANT_ID}/v2.0"
-            )
-            logger.info("AUTH - Token validated successfully!")
-            logger.debug(f"AUTH - Token sub: {decoded.get('sub')}")
-            logger.debug(f"AUTH - Token aud: {decoded.get('aud')}")
-            logger.debug(f"AUTH - Token iss: {decoded.get('iss')}")
-        except jwt.ExpiredSignatureError:
-            logger.warning("AUTH - REJECTED: Token expired")
-            return JSONResponse(status_code=401, content={"detail": "Token has expired"})
-        except jwt.InvalidTokenError as e:
-            logger.warning(f"AUTH - REJECTED: Invalid token - {str(e)}")
-            return JSONResponse(status_code=401, content={"detail": f"Invalid token: {str(e)}"})
+            with timing.span("auth"):
+                claims = await authenticate_request(request)
+            logger.debug("AUTH - Token validated for %s %s, sub: %s", request.method, path, claims.get("sub"))
+        except HTTPException as e:
+            logger.warning("AUTH - REJECTED: %s", e.detail)
+            return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
         except Exception as e:
-            logger.error(f"AUTH - REJECTED: Exception - {str(e)}", exc_info=True)
+            logger.error("AUTH - REJECTED: Exception - %s", e, exc_info=True)
             return JSONResponse(status_code=401, content={"detail": f"Authentication failed: {str(e)}"})
         
         return await call_next(request)
@@ -165,6 +181,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Sampling profiler, switched on and off at runtime through /api/admin/profiler
+PROFILER_DIR = os.getenv("PROFILER_DIR", os.path.join(tempfile.gettempdir(), "aiflix-profiles"))
+profiler = SamplingProfiler(PROFILER_DIR)
+
+# Outermost, so request latency includes auth and CORS handling, and every log line has a request id
+app.add_middleware(timing.TimingMiddleware, profiler=profiler)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(logconfig.RequestIdMiddleware)
+
 # === Models ===
 
 class ImageGenerationRequest(BaseModel):
@@ -205,10 +230,47 @@ class Asset(BaseModel):
     recordingUrl: Optional[str] = None
     assetPicture: Optional[str] = None
     screenshots: List[str] = []
+    # WebP renditions (card / hero / full) of assetPicture and of each screenshot; see renditions.py
+    assetPictureRenditions: Optional[Dict[str, str]] = None
+    screenshotRenditions: List[Dict[str, str]] = []
     createdAt: str
     lastMaintainedAt: Optional[str] = None
     averageRating: Optional[float] = None
     ratingCount: Optional[int] = 0
+    ratingHistogram: Optional[Dict[str, int]] = None
+
+# In-memory replica of the assets container fed by the change feed (see storage/replica.py). It is not
+# optional: the search and tag indexes follow other instances' writes through it, and asset reads are
+# served from it while it is fresh
+ASSET_REPLICA_POLL_SECONDS = float(os.getenv("ASSET_REPLICA_POLL_SECONDS", "1"))
+# Reads fall back to Cosmos DB when the replica hasn't caught up with the feed for this long
+ASSET_REPLICA_MAX_STALENESS_SECONDS = float(os.getenv("ASSET_REPLICA_MAX_STALENESS_SECONDS", "30"))
+ASSET_REPLICA_RECONCILE_SECONDS = float(os.getenv("ASSET_REPLICA_RECONCILE_SECONDS", "300"))
+
+# Collection ETags are built from (max _ts, count), which only has one-second
+# resolution, so none is handed out while a collection changed this recently
+ETAG_SETTLE_SECONDS = 2
+# Let browsers keep ETag'd responses but revalidate them on every use
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+# Fields the home page rows need for a card; the default projection for GET /api/assets/page
+ASSET_CARD_FIELDS = ["id", "assetName", "tags", "assetPicture", "assetPictureRenditions", "averageRating", "ratingCount"]
+ASSET_PAGE_MAX_LIMIT = 100
+
+# Asset fields returned with each search hit: enough to render and group the result cards
+SEARCH_RESULT_FIELDS = ASSET_CARD_FIELDS + ["primaryCustomerScenario", "createdBy"]
+SEARCH_MAX_LIMIT = 50
+# Backoff between attempts to load the search and tag indexes when the first one fails
+INDEX_LOAD_RETRY_SECONDS = 1
+INDEX_LOAD_RETRY_MAX_SECONDS = 60
+# Point reads in flight at once when fetching the assets matched by a tag filter
+ASSET_READ_CONCURRENCY = int(os.getenv("ASSET_READ_CONCURRENCY", "16"))
+RATING_SUMMARY_MAX_ASSETS = 100
+# Comments included with GET /api/assets/{id}/full
+ASSET_DETAIL_COMMENTS = 20
+CHILD_PAGE_MAX_LIMIT = 100
+# Child documents counted on the asset document (kind -> counter field), kept current by the write paths
+CHILD_COUNT_FIELDS = {"comments": "commentCount", "improvements": "improvementCount"}
 
 class RatingCreate(BaseModel):
     rating: int  # 1-5 stars
@@ -223,6 +285,10 @@ class Rating(BaseModel):
     userName: str
     createdAt: str
 
+class RatingSummaryRequest(BaseModel):
+    assetIds: List[str]
+    userId: Optional[str] = None  # also return this user's own rating of each asset
+
 class CommentCreate(BaseModel):
     text: str
     userId: str
@@ -236,6 +302,11 @@ class Comment(BaseModel):
     userName: str
     createdAt: str
 
+class CommentPage(BaseModel):
+    items: List[Comment]
+    continuationToken: Optional[str] = None
+    totalCount: int
+
 class AssetPictureUpdate(BaseModel):
     assetPicture: str
 
@@ -267,6 +338,22 @@ class Improvement(BaseModel):
     data: dict
     createdAt: str
 
+class ImprovementPage(BaseModel):
+    items: List[Improvement]
+    continuationToken: Optional[str] = None
+    totalCount: int
+
+class ProfilerSettings(BaseModel):
+    enabled: bool
+    samplePercent: float = 1.0  # of requests, while enabled
+    intervalMs: Optional[float] = None  # between stack samples
+
+# === Storage Configuration ===
+
+# "azure" (Cosmos DB + Blob Storage) or "local" (in-memory documents + local blob directory)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "azure").lower()
+LOCAL_BLOB_DIR = os.getenv("LOCAL_BLOB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".local_blobs"))
+
 # === Azure Configuration ===
 
 # Azure AI Foundry configuration (uses managed identity)
@@ -275,15 +362,33 @@ AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-image-1")
 
 # Cognitive Services scope for Azure OpenAI token
 COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+# Max pooled connections to Azure OpenAI, and the per-request timeout for image generation
+AZURE_OPENAI_MAX_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "10"))
+AZURE_OPENAI_TIMEOUT_SECONDS = float(os.getenv("AZURE_OPENAI_TIMEOUT_SECONDS", "60"))
 
 # Cosmos DB configuration (uses managed identity)
 COSMOS_ENDPOINT = os.getenv("COSMOS_ENDPOINT")
 COSMOS_DATABASE = os.getenv("COSMOS_DATABASE", "aiflix")
 COSMOS_CONTAINER = os.getenv("COSMOS_CONTAINER", "assets")
+# Max concurrent connections in the shared Cosmos DB connection pool
+COSMOS_CONNECTION_LIMIT = int(os.getenv("COSMOS_CONNECTION_LIMIT", "100"))
+# Look up ratings stored under pre-deterministic random ids; turn off once
+# `python manage.py compact-ratings` has run so a missing rating costs one point read
+RATING_LEGACY_LOOKUP = os.getenv("RATING_LEGACY_LOOKUP", "true").lower() == "true"
 
 # Azure Blob Storage configuration (uses managed identity)
 BLOB_ACCOUNT_URL = os.getenv("BLOB_ACCOUNT_URL")  # e.g., https://<account>.blob.core.windows.net
 BLOB_CONTAINER_NAME = os.getenv("BLOB_CONTAINER_NAME", "asset-images")
+# SAS URLs are signed once per time bucket and cached, so repeated reads return identical URLs
+SAS_BUCKET_SECONDS = int(os.getenv("SAS_BUCKET_SECONDS", "1800"))
+SAS_CACHE_SIZE = int(os.getenv("SAS_CACHE_SIZE", "10000"))
+# Max concurrent blob uploads per request (e.g. cover + screenshots in create_asset)
+BLOB_UPLOAD_CONCURRENCY = int(os.getenv("BLOB_UPLOAD_CONCURRENCY", "4"))
+# Streaming image uploads (PUT /api/assets/{id}/images/{slot}) are written in blocks of this size
+IMAGE_UPLOAD_CHUNK_BYTES = int(os.getenv("IMAGE_UPLOAD_CHUNK_BYTES", str(4 * 1024 * 1024)))
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+# Worker processes that encode image renditions (default: one per CPU)
+IMAGE_RENDITION_WORKERS = int(os.getenv("IMAGE_RENDITION_WORKERS", "0")) or None
 
 # Azure Communication Services Email configuration (optional)
 # Set EMAIL_NOTIFICATIONS_ENABLED=true and provide the ACS env vars to enable
@@ -292,149 +397,288 @@ ACS_ENDPOINT = os.getenv("ACS_ENDPOINT")  # e.g., https://<resource>.communicati
 ACS_SENDER_EMAIL = os.getenv("ACS_SENDER_EMAIL")  # e.g., DoNotReply@<domain>.azurecomm.net
 ACS_NOTIFY_RECIPIENTS = os.getenv("ACS_NOTIFY_RECIPIENTS", "")  # Comma-separated email addresses
 ACS_APP_URL = os.getenv("ACS_APP_URL", "https://aiflix-frontend-dev.azurewebsites.net")  # Frontend URL for email links
+# Notifications are sent by a background dispatcher; assets published within this window share one digest email
+NOTIFICATION_BATCH_SECONDS = float(os.getenv("NOTIFICATION_BATCH_SECONDS", "30"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+NOTIFICATION_DEAD_LETTER_PATH = os.getenv("NOTIFICATION_DEAD_LETTER_PATH")  # JSON lines of undeliverable notifications
 
-logger.info(f"=== Email Notification Config ===")
-logger.info(f"EMAIL_NOTIFICATIONS_ENABLED: {EMAIL_NOTIFICATIONS_ENABLED}")
+logger.info("=== Email Notification Config ===")
+logger.info("EMAIL_NOTIFICATIONS_ENABLED: %s", EMAIL_NOTIFICATIONS_ENABLED)
 if EMAIL_NOTIFICATIONS_ENABLED:
-    logger.info(f"ACS_ENDPOINT: {'set' if ACS_ENDPOINT else 'MISSING'}")
-    logger.info(f"ACS_SENDER_EMAIL: {'set' if ACS_SENDER_EMAIL else 'MISSING'}")
-    logger.info(f"ACS_NOTIFY_RECIPIENTS: {'set' if ACS_NOTIFY_RECIPIENTS else 'MISSING'}")
-logger.info(f"=================================")
-
-# Shared credential for all Azure services
-azure_credential = None
-
-def get_azure_credential():
-    """Get or create the DefaultAzureCredential for managed identity."""
-    global azure_credential
-    if azure_credential is None:
-        azure_credential = DefaultAzureCredential()
-    return azure_credential
-
-
-def send_new_asset_notification(asset_name: str, asset_id: str, created_by: str, description: str = ""):
-    """Send email notification when a new asset is published. Silently skips if not configured."""
-    if not EMAIL_NOTIFICATIONS_ENABLED:
-        logger.debug("Email notifications disabled, skipping")
-        return
-
-    if not ACS_ENDPOINT or not ACS_SENDER_EMAIL or not ACS_NOTIFY_RECIPIENTS:
-        logger.info("Email notifications not configured, skipping")
-        return
-
-    try:
-        from azure.communication.email import EmailClient
-
-        recipients = [addr.strip() for addr in ACS_NOTIFY_RECIPIENTS.split(",") if addr.strip()]
-        if not recipients:
-            return
-
-        credential = get_azure_credential()
-        email_client = EmailClient(ACS_ENDPOINT, credential)
-
-        asset_url = f"{ACS_APP_URL}/asset/{asset_id}"
-        truncated_desc = (description[:200] + "...") if len(description) > 200 else description
-
-        html_body = f"""
+    logger.info("ACS_ENDPOINT: %s", 'set' if ACS_ENDPOINT else 'MISSING')
+    logger.info("ACS_SENDER_EMAIL: %s", 'set' if ACS_SENDER_EMAIL else 'MISSING')
+    logger.info("ACS_NOTIFY_RECIPIENTS: %s", 'set' if ACS_NOTIFY_RECIPIENTS else 'MISSING')
+logger.info("=================================")
+
+# Shared credential for all Azure services (all clients use the async SDKs)
+async_azure_credential = None
+
+def get_async_azure_credential():
+    """Get or create the async DefaultAzureCredential used by async Azure SDK clients."""
+    global async_azure_credential
+    if async_azure_credential is None:
+        async_azure_credential = AsyncDefaultAzureCredential()
+    return async_azure_credential
+
+
+def notifications_configured() -> bool:
+    return bool(EMAIL_NOTIFICATIONS_ENABLED and ACS_ENDPOINT and ACS_SENDER_EMAIL and notification_recipients())
+
+def notification_recipients() -> List[str]:
+    return [addr.strip() for addr in ACS_NOTIFY_RECIPIENTS.split(",") if addr.strip()]
+
+def truncate_description(description: str) -> str:
+    return (description[:200] + "...") if len(description) > 200 else description
+
+def build_new_asset_email(assets: List[dict]) -> dict:
+    """ACS email message for one new asset, or a digest when several were published together."""
+    if len(assets) == 1:
+        asset = assets[0]
+        subject = f"New on AIFLIX: {asset['assetName']}"
+        heading = "New Asset Published! 🚀"
+        intro = f"""<p style="color: #cccccc;"><strong style="color: #ffffff;">{asset['createdBy']}</strong> just published a new demo asset:</p>"""
+    else:
+        subject = f"New on AIFLIX: {len(assets)} new assets"
+        heading = f"{len(assets)} New Assets Published! 🚀"
+        intro = """<p style="color: #cccccc;">These demo assets were just published:</p>"""
+    
+    cards = "".join(f"""
+                <div style="background: #2a2a2a; border-left: 4px solid #e50914; padding: 15px; margin: 20px 0; border-radius: 4px;">
+                    <h3 style="color: #ffffff; margin: 0 0 8px 0;">{asset['assetName']}</h3>
+                    {'' if len(assets) == 1 else f'<p style="color: #888888; margin: 0 0 8px 0; font-size: 12px;">by {asset["createdBy"]}</p>'}
+                    <p style="color: #aaaaaa; margin: 0; font-size: 14px;">{truncate_description(asset['description'])}</p>
+                    {'' if len(assets) == 1 else f'<a href="{ACS_APP_URL}/asset/{asset["assetId"]}" style="color: #e50914; font-size: 14px;">View Asset →</a>'}
+                </div>""" for asset in assets)
+    button_url = f"{ACS_APP_URL}/asset/{assets[0]['assetId']}" if len(assets) == 1 else ACS_APP_URL
+    button_label = "View Asset →" if len(assets) == 1 else "Browse AIFLIX →"
+    
+    html_body = f"""
         <div style="font-family: 'Segoe UI', Arial, sans-serif; max-width: 600px; margin: 0 auto;">
             <div style="background: #e50914; padding: 20px; text-align: center;">
                 <h1 style="color: white; margin: 0; font-size: 24px;">AIFLIX</h1>
             </div>
             <div style="background: #1a1a1a; padding: 30px; color: #ffffff;">
-                <h2 style="color: #ffffff; margin-top: 0;">New Asset Published! 🚀</h2>
-                <p style="color: #cccccc;"><strong style="color: #ffffff;">{created_by}</strong> just published a new demo asset:</p>
-                <div style="background: #2a2a2a; border-left: 4px solid #e50914; padding: 15px; margin: 20px 0; border-radius: 4px;">
-                    <h3 style="color: #ffffff; margin: 0 0 8px 0;">{asset_name}</h3>
-                    <p style="color: #aaaaaa; margin: 0; font-size: 14px;">{truncated_desc}</p>
-                </div>
-                <a href="{asset_url}" style="display: inline-block; background: #e50914; color: white; padding: 12px 24px; text-decoration: none; border-radius: 4px; font-weight: bold;">View Asset →</a>
+                <h2 style="color: #ffffff; margin-top: 0;">{heading}</h2>
+                {intro}{cards}
+                <a href="{button_url}" style="display: inline-block; background: #e50914; color: white; padding: 12px 24px; text-decoration: none; border-radius: 4px; font-weight: bold;">{button_label}</a>
             </div>
             <div style="background: #111111; padding: 15px; text-align: center;">
                 <p style="color: #666666; font-size: 12px; margin: 0;">You received this because you're subscribed to AIFLIX notifications.</p>
             </div>
         </div>
         """
-
-        message = {
-            "senderAddress": ACS_SENDER_EMAIL,
-            "recipients": {
-                "to": [{"address": addr} for addr in recipients]
-            },
-            "content": {
-                "subject": f"New on AIFLIX: {asset_name}",
-                "html": html_body
-            }
+    
+    return {
+        "senderAddress": ACS_SENDER_EMAIL,
+        "recipients": {
+            "to": [{"address": addr} for addr in notification_recipients()]
+        },
+        "content": {
+            "subject": subject,
+            "html": html_body
         }
+    }
 
-        poller = email_client.begin_send(message)
-        result = poller.result()
-        logger.info(f"Email notification sent successfully, message id: {result.get('id', 'N/A')}")
+# Email client and dispatcher, created by start_notifications() when notifications are configured
+email_client = None
+notification_dispatcher: Optional[NotificationDispatcher] = None
+
+async def send_asset_notifications(assets: List[dict]):
+    """Send one email for a batch of new assets. Raises on failure so the dispatcher retries."""
+    poller = await email_client.begin_send(build_new_asset_email(assets))
+    result = await poller.result()
+    logger.info("Email notification for %s asset(s) sent, message id: %s", len(assets), result.get('id', 'N/A'))
+
+async def start_notifications():
+    """Create the shared async EmailClient and start the background dispatcher."""
+    global email_client, notification_dispatcher
+    if not EMAIL_NOTIFICATIONS_ENABLED:
+        logger.debug("Email notifications disabled")
+        return
+    if not notifications_configured():
+        logger.info("Email notifications not configured, skipping")
+        return
+    from azure.communication.email.aio import EmailClient
+    
+    email_client = EmailClient(ACS_ENDPOINT, get_async_azure_credential())
+    notification_dispatcher = NotificationDispatcher(
+        send_asset_notifications,
+        batch_window=NOTIFICATION_BATCH_SECONDS,
+        max_attempts=NOTIFICATION_MAX_ATTEMPTS,
+        dead_letter_path=NOTIFICATION_DEAD_LETTER_PATH
+    )
+    notification_dispatcher.start()
+
+async def stop_notifications():
+    """Flush queued notifications and close the email client."""
+    global email_client, notification_dispatcher
+    if notification_dispatcher is not None:
+        await notification_dispatcher.stop()
+        notification_dispatcher = None
+    if email_client is not None:
+        await email_client.close()
+        email_client = None
+
+def send_new_asset_notification(asset_name: str, asset_id: str, created_by: str, description: str = ""):
+    """Queue an email notification for a newly published asset. Never blocks; skips if not configured."""
+    if notification_dispatcher is None:
+        return
+    notification_dispatcher.enqueue({
+        "assetName": asset_name,
+        "assetId": asset_id,
+        "createdBy": created_by,
+        "description": description
+    })
+
+# Storage backends (see storage/). Set by init_storage() on startup.
+repo: Optional[AssetRepository] = None
+blobs: Optional[BlobStore] = None
+
+async def init_storage():
+    """Create and connect the configured storage backends."""
+    global repo, blobs
+    logger.info("STORAGE_BACKEND: %s", STORAGE_BACKEND)
+    if STORAGE_BACKEND == "local":
+        repo = InMemoryRepository()
+        blobs = LocalBlobStore(LOCAL_BLOB_DIR, base_url="/blobs")
+        await repo.open()
+        await blobs.open()
+        logger.info("Using local storage (in-memory documents, blobs in %s)", LOCAL_BLOB_DIR)
+        return
+
+    logger.info("DEBUG - COSMOS_ENDPOINT: %s", COSMOS_ENDPOINT)
+    logger.info("DEBUG - COSMOS_DATABASE: %s", COSMOS_DATABASE)
+    logger.info("DEBUG - COSMOS_CONTAINER: %s", COSMOS_CONTAINER)
+    if COSMOS_ENDPOINT:
+        try:
+            cosmos_repo = CosmosRepository(
+                COSMOS_ENDPOINT, COSMOS_DATABASE, COSMOS_CONTAINER,
+                credential=get_async_azure_credential(),
+                connection_limit=COSMOS_CONNECTION_LIMIT,
+                legacy_rating_lookup=RATING_LEGACY_LOOKUP,
+                on_request_charge=metrics.record_cosmos_charge
+            )
+            await cosmos_repo.open()
+            repo = cosmos_repo
+        except Exception as e:
+            logger.info("Failed to connect to Cosmos DB: %s", e)
+            import traceback
+            traceback.print_exc()
+    else:
+        logger.info("Cosmos DB endpoint not configured")
 
-    except Exception as e:
-        # Never let email failure block asset creation
-        logger.error(f"Failed to send email notification: {e}")
-
-# Initialize Cosmos DB client
-cosmos_client = None
-database = None
-container = None
-ratings_container = None
-comments_container = None
-improvements_container = None
-
-# Initialize Blob Storage client
-blob_service_client = None
-blob_container_client = None
-blob_account_name = None
-user_delegation_key = None
-user_delegation_key_expiry = None
-
-def init_blob_storage():
-    global blob_service_client, blob_container_client, blob_account_name
     if BLOB_ACCOUNT_URL:
         try:
-            credential = get_azure_credential()
-            blob_service_client = BlobServiceClient(BLOB_ACCOUNT_URL, credential=credential)
-            blob_container_client = blob_service_client.get_container_client(BLOB_CONTAINER_NAME)
-            
-            # Extract account name from URL
-            # URL format: https://<account>.blob.core.windows.net
-            blob_account_name = BLOB_ACCOUNT_URL.replace("https://", "").split(".")[0]
-            
-            # Create container if it doesn't exist (without public access)
-            if not blob_container_client.exists():
-                blob_container_client.create_container()
-            logger.info(f"Connected to Blob Storage (managed identity): {BLOB_CONTAINER_NAME}")
+            blob_store = AzureBlobStore(
+                BLOB_ACCOUNT_URL, BLOB_CONTAINER_NAME,
+                credential=get_async_azure_credential(),
+                sas_bucket_seconds=SAS_BUCKET_SECONDS,
+                sas_cache_size=SAS_CACHE_SIZE
+            )
+            await blob_store.open()
+            blobs = blob_store
         except Exception as e:
-            logger.info(f"Failed to connect to Blob Storage: {e}")
+            logger.info("Failed to connect to Blob Storage: %s", e)
     else:
         logger.info("Blob Storage account URL not configured")
 
-def get_user_delegation_key():
-    """Get or refresh user delegation key for SAS token generation."""
-    global user_delegation_key, user_delegation_key_expiry
-    
-    now = datetime.utcnow()
-    # Refresh key if it doesn't exist or will expire in less than 1 hour
-    if user_delegation_key is None or user_delegation_key_expiry is None or user_delegation_key_expiry < now + timedelta(hours=1):
-        # Key valid for 7 days
-        key_start = now - timedelta(minutes=5)  # Account for clock skew
-        key_expiry = now + timedelta(days=7)
-        user_delegation_key = blob_service_client.get_user_delegation_key(
-            key_start_time=key_start,
-            key_expiry_time=key_expiry
-        )
-        user_delegation_key_expiry = key_expiry
-        logger.info(f"Refreshed user delegation key, expires: {key_expiry}")
+async def close_storage():
+    """Close the storage backends and their connection pools."""
+    global repo, blobs
+    if repo is not None:
+        await repo.close()
+        repo = None
+    if blobs is not None:
+        await blobs.close()
+        blobs = None
+    if async_azure_credential is not None:
+        await async_azure_credential.close()
+
+# Image generation (see imagegen.py). Set by start_imagegen() on startup when Azure OpenAI is configured.
+openai_http_client: Optional[httpx.AsyncClient] = None
+image_generator: Optional[ImageGenerator] = None
+
+async def start_imagegen():
+    """Create the pooled Azure OpenAI HTTP client and the caching image generator."""
+    global openai_http_client, image_generator
+    if not AZURE_OPENAI_ENDPOINT:
+        return
+    openai_http_client = httpx.AsyncClient(
+        timeout=AZURE_OPENAI_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=AZURE_OPENAI_MAX_CONNECTIONS, max_keepalive_connections=AZURE_OPENAI_MAX_CONNECTIONS)
+    )
+    image_generator = ImageGenerator(
+        AZURE_OPENAI_ENDPOINT,
+        AZURE_OPENAI_DEPLOYMENT,
+        http_client=openai_http_client,
+        token_cache=AccessTokenCache(get_async_azure_credential(), COGNITIVE_SERVICES_SCOPE),
+        blobs=blobs
+    )
+
+async def stop_imagegen():
+    global openai_http_client, image_generator
+    image_generator = None
+    if openai_http_client is not None:
+        await openai_http_client.aclose()
+        openai_http_client = None
+
+# Image rendition pipeline (see renditions.py). Set by start_renditions() on startup when blob storage is configured.
+rendition_pipeline: Optional[RenditionPipeline] = None
+
+def start_renditions():
+    global rendition_pipeline
+    if blobs:
+        rendition_pipeline = RenditionPipeline(blobs, workers=IMAGE_RENDITION_WORKERS)
+
+def stop_renditions():
+    global rendition_pipeline
+    if rendition_pipeline is not None:
+        rendition_pipeline.close()
+        rendition_pipeline = None
+
+def versioned_blob_name(asset_id: str, name: str, extension: str) -> str:
+    """'{asset_id}/{name}.{version}.{extension}' for an image that replaces another.
+    
+    Blob URLs are cached by browsers and CDNs, so a replaced image gets a new
+    name (and with it a new URL) instead of overwriting the old blob.
+    """
+    return f"{asset_id}/{name}.{uuid.uuid4().hex[:12]}.{extension}"
+
+
+def image_blob_names(asset: dict) -> set:
+    """Names of the blobs an asset document refers to: images and their renditions."""
+    values = [asset.get("assetPicture")] + list(asset.get("screenshots") or [])
+    values += list((asset.get("assetPictureRenditions") or {}).values())
+    for renditions in asset.get("screenshotRenditions") or []:
+        values += list((renditions or {}).values())
+    return {value for value in values if value and not value.startswith(("data:", "https://"))}
+
+
+def picture_blob_names(asset: dict) -> set:
+    return image_blob_names({"assetPicture": asset.get("assetPicture"), "assetPictureRenditions": asset.get("assetPictureRenditions")})
+
+
+async def delete_replaced_images(previous: set, asset: dict):
+    """Delete the blobs among `previous` that an update that uploaded a replacement stopped referencing.
     
-    return user_delegation_key
+    Best effort: they are unreachable either way.
+    """
+    if not blobs:
+        return
+    names = list(previous - image_blob_names(asset))
+    results = await asyncio.gather(*(blobs.delete(name) for name in names), return_exceptions=True)
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            logger.warning("Failed to delete replaced image %s: %s", name, result)
+
 
-def upload_image_to_blob(image_base64: str, filename: str) -> str:
-    """Upload base64 image to Blob Storage and return the blob name (path).
+async def upload_image_to_blob(image_base64: str, filename: str) -> Tuple[str, Dict[str, str]]:
+    """Upload base64 image to Blob Storage with its WebP renditions.
     
-    SAS tokens are generated on-read, not on-upload, so they never expire prematurely.
+    Returns (blob name of the original, rendition name -> blob name). SAS tokens
+    are generated on-read, not on-upload, so they never expire prematurely.
     """
-    if not blob_container_client:
+    if not blobs:
         raise Exception("Blob Storage not configured")
     
     # Decode base64 image
@@ -444,44 +688,126 @@ def upload_image_to_blob(image_base64: str, filename: str) -> str:
     
     image_data = base64.b64decode(image_base64)
     
-    # Upload to blob
-    blob_client = blob_container_client.get_blob_client(filename)
-    blob_client.upload_blob(
-        image_data, 
-        overwrite=True,
-        content_settings=ContentSettings(content_type="image/png")
-    )
+    # Return only blob names — SAS is generated at read time
+    upload = blobs.upload(filename, image_data, content_type="image/png")
+    if not rendition_pipeline:
+        return await upload, {}
+    blob_name, renditions = await asyncio.gather(upload, rendition_pipeline.create(filename, image_data))
+    return blob_name, renditions
+
+
+async def upload_images(images: List[tuple]) -> List[Optional[Tuple[str, Dict[str, str]]]]:
+    """Upload (image_base64, filename) pairs concurrently, at most BLOB_UPLOAD_CONCURRENCY at a time.
+    
+    Returns (blob name, renditions) for each image in input order, or None where
+    that upload failed; one failure never holds up or cancels the others.
+    """
+    semaphore = asyncio.Semaphore(BLOB_UPLOAD_CONCURRENCY)
     
-    # Return only the blob name — SAS is generated at read time
-    return filename
+    async def upload_one(image_base64: str, filename: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                uploaded = await upload_image_to_blob(image_base64, filename)
+            except Exception as e:
+                logger.info("Failed to upload %s: %s", filename, e)
+                return None
+            logger.debug("Uploaded %s in %.0f ms", filename, (time.perf_counter() - start) * 1000)
+            return uploaded
+    
+    return await asyncio.gather(*(upload_one(image, filename) for image, filename in images))
+
+
+# Leading bytes identifying each accepted upload format -> (content type, file extension)
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+]
+IMAGE_SLOT_PATTERN = re.compile(r"^(cover|screenshot-(\d+))$")
+
+def sniff_image_type(head: bytes) -> Optional[Tuple[str, str]]:
+    """(content type, extension) from an image's first bytes, or None if it isn't a supported image."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    for signature, content_type, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    return None
 
+async def read_head(body: AsyncIterator[bytes], size: int) -> bytes:
+    """Read at least `size` bytes from the start of a body stream (fewer if it ends first)."""
+    head = b""
+    while len(head) < size:
+        try:
+            head += await body.__anext__()
+        except StopAsyncIteration:
+            break
+    return head
 
-def generate_blob_sas_url(blob_name: str) -> str:
-    """Generate a short-lived SAS URL for a blob. Called on every read."""
-    delegation_key = get_user_delegation_key()
-    sas_token = generate_blob_sas(
-        account_name=blob_account_name,
-        container_name=BLOB_CONTAINER_NAME,
-        blob_name=blob_name,
-        user_delegation_key=delegation_key,
-        permission=BlobSasPermissions(read=True),
-        expiry=datetime.utcnow() + timedelta(hours=1)
-    )
-    return f"{BLOB_ACCOUNT_URL}/{BLOB_CONTAINER_NAME}/{blob_name}?{sas_token}"
+async def rechunk(head: bytes, body: AsyncIterator[bytes], chunk_size: int, max_bytes: int, spool=None) -> AsyncIterator[bytes]:
+    """Yield `head` + `body` as fixed-size chunks, raising 413 past max_bytes.
+    
+    Every byte counts toward the limit, including the head already read for
+    sniffing, and is counted before it can be staged. Each chunk is also written to `spool` (a file) when given, for rendering.
+    """
+    buffer = bytearray()
+    total = 0
+    
+    async def emit(chunk: bytes) -> bytes:
+        if spool:
+            await asyncio.to_thread(spool.write, chunk)
+        return chunk
+    
+    async def received() -> AsyncIterator[bytes]:
+        yield head
+        async for data in body:
+            yield data
+    
+    async for data in received():
+        total += len(data)
+        if total > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Image exceeds {max_bytes} bytes")
+        buffer += data
+        while len(buffer) >= chunk_size:
+            yield await emit(bytes(buffer[:chunk_size]))
+            del buffer[:chunk_size]
+    if buffer:
+        yield await emit(bytes(buffer))
+
+def make_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+def document_etag(doc: dict, *parts) -> str:
+    """Weak ETag for a response derived from one document (plus anything else it depends on)."""
+    return make_etag(doc["_etag"].strip('"'), *parts)
+
+def collection_etag(name: str, version: Tuple[Optional[int], int], *parts) -> Optional[str]:
+    """Weak ETag from a collection's (max _ts, count), or None if it may still be changing."""
+    max_ts, count = version
+    if max_ts is not None and time.time() - max_ts < ETAG_SETTLE_SECONDS:
+        return None
+    return make_etag(name, max_ts or 0, count, *parts)
 
+def url_epoch() -> int:
+    """Part of the ETag of any response containing image URLs, so clients refetch before SAS URLs expire."""
+    return blobs.url_epoch() if blobs else 0
 
-def _extract_blob_name_from_url(url: str) -> Optional[str]:
-    """Extract blob name from a full Azure Blob Storage URL (with or without SAS)."""
-    if not blob_account_name:
+def check_not_modified(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """A 304 if the client's If-None-Match has `etag`; otherwise tag `response` and return None."""
+    if etag is None:
         return None
-    prefix = f"https://{blob_account_name}.blob.core.windows.net/{BLOB_CONTAINER_NAME}/"
-    if url.startswith(prefix):
-        # Strip the container prefix and any query params (old SAS token)
-        path = url[len(prefix):]
-        return path.split("?")[0]
+    headers = {"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison (RFC 9110 13.1.2): the W/ prefix is ignored
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in candidates or etag.removeprefix("W/") in candidates:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return None
 
-
 def resign_image_url(value: Optional[str]) -> Optional[str]:
     """Re-sign a single image value with a fresh SAS token.
     
@@ -490,7 +816,7 @@ def resign_image_url(value: Optional[str]) -> Optional[str]:
       2. Full blob URL with old/expired SAS (legacy)
       3. Base64 data URI or external URL — returned as-is
     """
-    if not value or not blob_container_client:
+    if not value or not blobs:
         return value
     
     # External URL or base64 data URI — leave untouched
@@ -499,14 +825,291 @@ def resign_image_url(value: Optional[str]) -> Optional[str]:
     
     # Legacy full blob URL — extract the blob name first
     if value.startswith("https://"):
-        blob_name = _extract_blob_name_from_url(value)
+        blob_name = blobs.extract_blob_name(value)
         if blob_name:
-            return generate_blob_sas_url(blob_name)
+            return blobs.url_for(blob_name)
         # Unknown external URL — leave as-is
         return value
     
     # New format: bare blob name
-    return generate_blob_sas_url(value)
+    return blobs.url_for(value)
+
+
+# === Asset Document Helpers ===
+
+# Optimistic-concurrency retries for read-modify-write updates of an asset document
+ASSET_UPDATE_MAX_ATTEMPTS = 5
+RATING_VALUES = ["1", "2", "3", "4", "5"]
+
+# Set by start_replica() on startup
+asset_replica: Optional[AssetCatalogReplica] = None
+
+async def start_replica():
+    global asset_replica
+    if not repo:
+        return
+    if os.getenv("ASSET_REPLICA_ENABLED", "").lower() == "false":
+        logger.warning("ASSET_REPLICA_ENABLED=false is no longer supported; the asset replica always runs")
+    replica = AssetCatalogReplica(
+        repo,
+        poll_interval=ASSET_REPLICA_POLL_SECONDS,
+        max_staleness=ASSET_REPLICA_MAX_STALENESS_SECONDS,
+        reconcile_interval=ASSET_REPLICA_RECONCILE_SECONDS
+    )
+    try:
+        await replica.start()
+        asset_replica = replica
+    except Exception as e:
+        logger.warning("Asset replica failed to load, reading from storage directly until it does: %s", e)
+
+async def stop_replica():
+    global asset_replica
+    if asset_replica is not None:
+        await asset_replica.stop()
+        asset_replica = None
+
+def replica_is_fresh() -> bool:
+    """The replica, and with it the indexes it feeds, is running and caught up with the change feed."""
+    return asset_replica is not None and asset_replica.is_fresh()
+
+async def read_asset(asset_id: str) -> Optional[dict]:
+    """An asset from the replica when it is fresh, else from storage.
+    
+    A replica miss also goes to storage: the asset may have been created on
+    another instance moments ago.
+    """
+    if replica_is_fresh():
+        asset = asset_replica.get_asset(asset_id)
+        if asset:
+            return asset
+    return await repo.get_asset(asset_id)
+
+async def read_assets() -> List[dict]:
+    if replica_is_fresh():
+        return asset_replica.list_assets()
+    return await repo.list_assets()
+
+async def read_assets_version() -> Tuple[Optional[int], int]:
+    if replica_is_fresh():
+        return asset_replica.assets_version()
+    return await repo.assets_version()
+
+async def read_assets_by_id(asset_ids) -> List[dict]:
+    """The given assets (those that still exist), newest first."""
+    semaphore = asyncio.Semaphore(ASSET_READ_CONCURRENCY)
+    async def read(asset_id: str) -> Optional[dict]:
+        async with semaphore:
+            return await read_asset(asset_id)
+    assets = [asset for asset in await asyncio.gather(*(read(i) for i in asset_ids)) if asset]
+    return sorted(assets, key=lambda d: d.get("createdAt") or "", reverse=True)
+
+# Full-text and tag indexes over the catalog, loaded on startup and kept current from the replica's change feed
+search_index = SearchIndex()
+tag_index = TagIndex()
+
+def index_asset(asset_id: str, asset: Optional[dict]):
+    if asset is None:
+        search_index.remove(asset_id)
+        tag_index.remove(asset_id)
+    else:
+        summary = with_rating_summary(dict(asset))
+        search_index.add(asset, {field: summary.get(field) for field in SEARCH_RESULT_FIELDS})
+        tag_index.add(asset)
+
+# Set once the indexes hold the whole catalog and follow the change feed
+indexes_loaded = False
+_index_load_task: Optional[asyncio.Task] = None
+
+async def load_indexes():
+    """Index the replica's catalog and follow its change feed; raises if the replica can't be started."""
+    global indexes_loaded
+    if asset_replica is None:
+        await start_replica()
+        if asset_replica is None:
+            raise StorageError("asset replica is not running")
+    # No await between listing and subscribing, so no change falls in between
+    for asset in asset_replica.list_assets():
+        index_asset(asset["id"], asset)
+    # Picks up assets written and deleted by other instances as well
+    asset_replica.subscribe(index_asset)
+    indexes_loaded = True
+    logger.info("Search index loaded %s assets, %s tags", len(search_index), len(tag_index.postings))
+
+async def retry_load_indexes():
+    delay = INDEX_LOAD_RETRY_SECONDS
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            await load_indexes()
+            return
+        except Exception as e:
+            delay = min(delay * 2, INDEX_LOAD_RETRY_MAX_SECONDS)
+            logger.warning("Failed to load the search and tag indexes, retrying in %ss: %s", delay, e)
+
+async def start_indexes():
+    """Load the indexes, or keep retrying in the background with backoff; search answers 503 until then."""
+    global _index_load_task
+    if not repo:
+        return
+    try:
+        await load_indexes()
+    except Exception as e:
+        logger.warning("Failed to load the search and tag indexes, retrying in %ss: %s", INDEX_LOAD_RETRY_SECONDS, e)
+        _index_load_task = asyncio.create_task(retry_load_indexes())
+
+async def stop_indexes():
+    global _index_load_task, indexes_loaded, search_index, tag_index
+    if _index_load_task is not None:
+        _index_load_task.cancel()
+        await asyncio.gather(_index_load_task, return_exceptions=True)
+        _index_load_task = None
+    indexes_loaded = False
+    search_index, tag_index = SearchIndex(), TagIndex()
+
+def require_indexes():
+    """503 until the indexes have loaded, and while the change feed keeping them current is behind.
+    
+    Tag and search requests are never answered by scanning storage instead.
+    """
+    if not indexes_loaded or not replica_is_fresh():
+        raise HTTPException(status_code=503, detail="Search and tag indexes are not ready",
+                            headers={"Retry-After": str(INDEX_LOAD_RETRY_SECONDS)})
+
+def asset_written(asset: dict) -> dict:
+    """Apply an asset this instance just wrote to the replica and indexes, so its own reads see it at once."""
+    if asset_replica:
+        asset_replica.apply(asset)
+    index_asset(asset["id"], asset)
+    return asset
+
+def asset_removed(asset_id: str):
+    if asset_replica:
+        asset_replica.remove(asset_id)
+    index_asset(asset_id, None)
+
+async def modify_asset(asset_id: str, mutate: Callable[[dict], Awaitable[None]]) -> dict:
+    """Read an asset, apply `mutate` to it and write it back guarded by its _etag.
+    
+    Retries from a fresh read when a concurrent writer (e.g. a rating aggregate
+    update) changed the document in between. Raises HTTPException(404) if the
+    asset does not exist.
+    """
+    for attempt in range(ASSET_UPDATE_MAX_ATTEMPTS):
+        asset = await repo.get_asset(asset_id)
+        if not asset:
+            raise HTTPException(status_code=404, detail="Asset not found")
+        await mutate(asset)
+        try:
+            return asset_written(await repo.replace_asset(asset, if_match=asset.get("_etag")))
+        except PreconditionFailedError:
+            logger.info("Concurrent update on asset %s, retrying (attempt %s)", asset_id, attempt + 1)
+    raise StorageError(f"Asset {asset_id} kept changing; gave up after {ASSET_UPDATE_MAX_ATTEMPTS} attempts")
+
+
+def set_rating_aggregates(asset: dict, ratings: List[int]):
+    """Overwrite the materialized rating aggregates on an asset document."""
+    asset["ratingSum"] = sum(ratings)
+    asset["ratingCount"] = len(ratings)
+    asset["ratingHistogram"] = {value: 0 for value in RATING_VALUES}
+    for rating in ratings:
+        asset["ratingHistogram"][str(rating)] += 1
+
+
+def apply_rating_delta(asset: dict, old_rating: Optional[int], new_rating: Optional[int]):
+    """Adjust the materialized rating aggregates for one rating being added, changed or removed."""
+    histogram = asset.get("ratingHistogram") or {value: 0 for value in RATING_VALUES}
+    if old_rating:
+        asset["ratingSum"] -= old_rating
+        asset["ratingCount"] -= 1
+        histogram[str(old_rating)] -= 1
+    if new_rating:
+        asset["ratingSum"] += new_rating
+        asset["ratingCount"] += 1
+        histogram[str(new_rating)] += 1
+    asset["ratingHistogram"] = histogram
+
+
+def has_rating_aggregates(asset: dict) -> bool:
+    return "ratingSum" in asset and "ratingCount" in asset
+
+
+def with_rating_summary(asset: dict) -> dict:
+    """Fill averageRating/ratingCount from the materialized aggregates (no ratings query)."""
+    count = asset.get("ratingCount") or 0
+    asset["averageRating"] = asset["ratingSum"] / count if count and asset.get("ratingSum") is not None else None
+    asset["ratingCount"] = count
+    return asset
+
+
+async def recompute_rating_aggregates(asset_id: str) -> dict:
+    """Rebuild an asset's rating aggregates from the ratings container (repair path)."""
+    async def mutate(asset: dict):
+        ratings = await repo.list_ratings(asset_id)
+        set_rating_aggregates(asset, [r["rating"] for r in ratings])
+    return await modify_asset(asset_id, mutate)
+
+
+async def count_children(kind: str, asset_id: str) -> int:
+    """Count an asset's comments or improvements in storage (aggregate query, no documents read)."""
+    _, count = await getattr(repo, f"{kind}_version")(asset_id)
+    return count
+
+
+async def update_child_count(asset_id: str, kind: str, delta: int):
+    """Apply a comment/improvement create (+1) or delete (-1) to the asset's counter.
+    
+    Never fails the write itself: on error the counter is left for
+    `python manage.py repair-counts` to recompute.
+    """
+    field = CHILD_COUNT_FIELDS[kind]
+    
+    async def mutate(asset: dict):
+        if field in asset:
+            asset[field] = max(0, asset[field] + delta)
+        else:
+            # First change since counters were introduced — count what is stored (including this change)
+            asset[field] = await count_children(kind, asset_id)
+    
+    try:
+        await modify_asset(asset_id, mutate)
+    except HTTPException:
+        logger.info("%s change for unknown asset %s; no counter to update", kind.capitalize(), asset_id)
+    except StorageError as e:
+        logger.error("Failed to update %s for asset %s: %s", field, asset_id, e)
+
+
+async def recompute_child_counts(asset_id: str) -> dict:
+    """Rebuild an asset's comment and improvement counters from storage (repair path)."""
+    async def mutate(asset: dict):
+        for kind, field in CHILD_COUNT_FIELDS.items():
+            asset[field] = await count_children(kind, asset_id)
+    return await modify_asset(asset_id, mutate)
+
+
+async def read_child_page(kind: str, asset_id: str, request: Request, response: Response,
+                          limit: int, continuation: Optional[str]):
+    """(items, next continuation, total count) for a page of comments or improvements, or a 304 Response.
+    
+    When the asset carries the counter its _etag doubles as the feed's ETag,
+    since every create and delete updates the counter on the asset document.
+    """
+    field = CHILD_COUNT_FIELDS[kind]
+    asset = await read_asset(asset_id)
+    if asset and field in asset:
+        total = asset[field]
+        etag = document_etag(asset, kind)
+    else:
+        version = await getattr(repo, f"{kind}_version")(asset_id)
+        total = version[1]
+        etag = collection_etag(kind, version)
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    try:
+        items, next_token = await getattr(repo, f"list_{kind}_page")(asset_id, limit, continuation)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid continuation token")
+    return items, next_token, total
 
 
 def resign_asset_images(asset: dict) -> dict:
@@ -515,55 +1118,21 @@ def resign_asset_images(asset: dict) -> dict:
         asset["assetPicture"] = resign_image_url(asset["assetPicture"])
     if asset.get("screenshots"):
         asset["screenshots"] = [resign_image_url(s) for s in asset["screenshots"]]
+    if asset.get("assetPictureRenditions"):
+        asset["assetPictureRenditions"] = resign_renditions(asset["assetPictureRenditions"])
+    if asset.get("screenshotRenditions"):
+        asset["screenshotRenditions"] = [resign_renditions(r) for r in asset["screenshotRenditions"]]
     return asset
 
-def init_cosmos():
-    global cosmos_client, database, container, ratings_container, comments_container, improvements_container
-    logger.info(f"DEBUG - COSMOS_ENDPOINT: {COSMOS_ENDPOINT}")
-    logger.info(f"DEBUG - COSMOS_DATABASE: {COSMOS_DATABASE}")
-    logger.info(f"DEBUG - COSMOS_CONTAINER: {COSMOS_CONTAINER}")
-    if COSMOS_ENDPOINT:
-        try:
-            credential = get_azure_credential()
-            cosmos_client = CosmosClient(COSMOS_ENDPOINT, credential=credential)
-            database = cosmos_client.create_database_if_not_exists(id=COSMOS_DATABASE)
-            # Note: No offer_throughput for serverless Cosmos DB accounts
-            container = database.create_container_if_not_exists(
-                id=COSMOS_CONTAINER,
-                partition_key=PartitionKey(path="/createdBy")
-            )
-            # Ratings container - partitioned by assetId
-            ratings_container = database.create_container_if_not_exists(
-                id="ratings",
-                partition_key=PartitionKey(path="/assetId")
-            )
-            # Comments container - partitioned by assetId
-            comments_container = database.create_container_if_not_exists(
-                id="comments",
-                partition_key=PartitionKey(path="/assetId")
-            )
-            # Improvements container - partitioned by assetId
-            improvements_container = database.create_container_if_not_exists(
-                id="improvements",
-                partition_key=PartitionKey(path="/assetId")
-            )
-            logger.info(f"Connected to Cosmos DB (managed identity): {COSMOS_DATABASE}/{COSMOS_CONTAINER}")
-        except Exception as e:
-            logger.info(f"Failed to connect to Cosmos DB: {e}")
-            import traceback
-            traceback.print_exc()
-    else:
-        logger.info("Cosmos DB endpoint not configured")
-
-# Initialize on startup
-init_cosmos()
-init_blob_storage()
+def resign_renditions(renditions: Optional[Dict[str, str]]) -> Dict[str, str]:
+    return {name: resign_image_url(blob_name) for name, blob_name in (renditions or {}).items()}
 
 @app.get("/health")
 async def health_check():
     """Health check that verifies managed identity access to all services."""
     health_status = {
         "status": "healthy",
+        "storageBackend": STORAGE_BACKEND,
         "services": {
             "cosmos_db": {"configured": False, "connected": False, "error": None},
             "blob_storage": {"configured": False, "connected": False, "error": None},
@@ -571,39 +1140,46 @@ async def health_check():
         }
     }
     
-    # Check Cosmos DB - verify we can read from the database
-    if COSMOS_ENDPOINT:
+    # Check document storage - verify we can read from the database
+    if COSMOS_ENDPOINT or STORAGE_BACKEND == "local":
         health_status["services"]["cosmos_db"]["configured"] = True
-        if container:
+        if repo:
             try:
-                # Try to read database properties to verify managed identity access
-                list(container.query_items(query="SELECT VALUE COUNT(1) FROM c", enable_cross_partition_query=True, max_item_count=1))
+                await repo.ping()
                 health_status["services"]["cosmos_db"]["connected"] = True
+                if asset_replica:
+                    health_status["services"]["cosmos_db"]["replica"] = asset_replica.stats()
             except Exception as e:
                 health_status["services"]["cosmos_db"]["error"] = str(e)
                 health_status["status"] = "degraded"
     
     # Check Blob Storage - verify we can access the container
-    if BLOB_ACCOUNT_URL:
+    if BLOB_ACCOUNT_URL or STORAGE_BACKEND == "local":
         health_status["services"]["blob_storage"]["configured"] = True
-        if blob_container_client:
+        if blobs:
             try:
-                # Try to check container properties to verify managed identity access
-                blob_container_client.get_container_properties()
+                await blobs.ping()
                 health_status["services"]["blob_storage"]["connected"] = True
+                if isinstance(blobs, AzureBlobStore):
+                    health_status["services"]["blob_storage"]["sasCache"] = blobs.sas_cache.stats()
+                if rendition_pipeline:
+                    health_status["services"]["blob_storage"]["renditions"] = rendition_pipeline.stats()
             except Exception as e:
                 health_status["services"]["blob_storage"]["error"] = str(e)
                 health_status["status"] = "degraded"
     
+    if notification_dispatcher is not None:
+        health_status["notifications"] = notification_dispatcher.stats()
+    
     # Check Azure OpenAI - verify we can get a token
     if AZURE_OPENAI_ENDPOINT:
         health_status["services"]["azure_openai"]["configured"] = True
         try:
             # Try to get a token to verify managed identity has Cognitive Services access
-            credential = get_azure_credential()
-            token = credential.get_token(COGNITIVE_SERVICES_SCOPE)
+            token = await image_generator.token_cache.get()
             if token:
                 health_status["services"]["azure_openai"]["connected"] = True
+                health_status["services"]["azure_openai"]["imageCache"] = image_generator.stats()
         except Exception as e:
             health_status["services"]["azure_openai"]["error"] = str(e)
             health_status["status"] = "degraded"
@@ -615,43 +1191,71 @@ async def health_check():
     
     return health_status
 
+# Counted by the components themselves; read when /metrics is scraped
+metrics.REGISTRY.callback(
+    "aiflix_blob_uploaded_bytes_total", "Bytes uploaded to blob storage.", "counter",
+    lambda: blobs.bytes_uploaded if blobs else None)
+metrics.REGISTRY.callback(
+    "aiflix_sas_signings_total", "SAS URLs signed (signing cache misses).", "counter",
+    lambda: blobs.sas_cache.misses if isinstance(blobs, AzureBlobStore) else None)
+metrics.REGISTRY.callback(
+    "aiflix_jwt_validations_total", "Bearer tokens validated, by whether the signature was verified or the verified-token cache hit.",
+    "counter", lambda: {("verified",): token_validator.verifications, ("cache_hit",): token_validator.cache.hits},
+    ["result"])
+metrics.REGISTRY.callback(
+    "aiflix_log_records_discarded_total", "Log records not written: queue full, rate limited or sampled out.", "counter",
+    lambda: {("queue_full",): logconfig.stats()["dropped"], ("rate_limited",): logconfig.stats()["rateLimited"],
+             ("sampled_out",): logconfig.stats()["sampledOut"]},
+    ["reason"])
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics in text exposition format (outside /api, so scrapers need no Azure AD token)."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/blobs/{blob_name:path}")
+async def get_local_blob(blob_name: str):
+    """Serve blobs from the local blob store (STORAGE_BACKEND=local only)."""
+    if not isinstance(blobs, LocalBlobStore):
+        raise HTTPException(status_code=404, detail="Not found")
+    try:
+        path = blobs.path_for(blob_name)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path)
+
 # === Asset CRUD Endpoints ===
 
 @app.post("/api/assets", response_model=Asset)
 async def create_asset(asset: AssetCreate):
     """Create a new asset in Cosmos DB with images stored in Blob Storage."""
-    if not container:
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     asset_id = str(uuid.uuid4())
-    asset_picture_url = None
-    screenshot_urls = []
+    asset_picture_url = asset.assetPicture
+    asset_picture_renditions = None
+    screenshot_urls = list(asset.screenshots)
+    screenshot_renditions = [{} for _ in asset.screenshots]
     
-    # Upload main asset picture to Blob Storage
-    if asset.assetPicture and blob_container_client:
-        try:
-            filename = f"{asset_id}/main.png"
-            asset_picture_url = upload_image_to_blob(asset.assetPicture, filename)
-        except Exception as e:
-            logger.info(f"Failed to upload asset picture: {e}")
-            # Fall back to storing base64 if blob upload fails
-            asset_picture_url = asset.assetPicture
-    elif asset.assetPicture:
-        # No blob storage configured, store base64
-        asset_picture_url = asset.assetPicture
-    
-    # Upload screenshots to Blob Storage
-    if asset.screenshots and blob_container_client:
-        for i, screenshot in enumerate(asset.screenshots):
-            try:
-                filename = f"{asset_id}/screenshot_{i}.png"
-                url = upload_image_to_blob(screenshot, filename)
-                screenshot_urls.append(url)
-            except Exception as e:
-                logger.info(f"Failed to upload screenshot {i}: {e}")
-                screenshot_urls.append(screenshot)  # Fall back to base64
-    else:
-        screenshot_urls = asset.screenshots
+    # Upload the main picture and all screenshots to Blob Storage concurrently.
+    # Without blob storage (or if an upload fails) the base64 data is stored instead.
+    if blobs:
+        images = [(s, f"{asset_id}/screenshot_{i}.png") for i, s in enumerate(asset.screenshots)]
+        if asset.assetPicture:
+            images.append((asset.assetPicture, f"{asset_id}/main.png"))
+        start = time.perf_counter()
+        uploaded = await upload_images(images)
+        if images:
+            logger.info("Uploaded %s images for asset %s in %.0f ms", len(images), asset_id, (time.perf_counter() - start) * 1000)
+        if asset.assetPicture:
+            cover = uploaded.pop()
+            if cover:
+                asset_picture_url, asset_picture_renditions = cover
+        screenshot_urls = [result[0] if result else original for result, original in zip(uploaded, asset.screenshots)]
+        screenshot_renditions = [result[1] if result else {} for result in uploaded]
     
     asset_doc = {
         "id": asset_id,
@@ -660,7 +1264,7 @@ async def create_asset(asset: AssetCreate):
         "primaryCustomerScenario": asset.primaryCustomerScenario,
         "createdBy": asset.createdBy,
         "createdByEmail": asset.createdByEmail,
-        "tags": asset.tags,
+        "tags": normalize_tags(asset.tags),
         "architectureUrl": asset.architectureUrl,
         "presentationUrl": asset.presentationUrl,
         "githubUrl": asset.githubUrl,
@@ -668,14 +1272,19 @@ async def create_asset(asset: AssetCreate):
         "recordingUrl": asset.recordingUrl,
         "assetPicture": asset_picture_url,
         "screenshots": screenshot_urls,
+        "assetPictureRenditions": asset_picture_renditions,
+        "screenshotRenditions": screenshot_renditions,
+        "ratingSum": 0,
+        "ratingCount": 0,
+        "ratingHistogram": {value: 0 for value in RATING_VALUES},
         "createdAt": datetime.utcnow().isoformat(),
         "lastMaintainedAt": datetime.utcnow().isoformat()
     }
     
     try:
-        result = container.create_item(body=asset_doc)
+        result = asset_written(await repo.create_asset(asset_doc))
         
-        # Send email notification (async-safe, never blocks or fails the request)
+        # Queue the email notification; it is sent in the background and never fails the request
         send_new_asset_notification(
             asset_name=asset.assetName,
             asset_id=asset_id,
@@ -683,181 +1292,415 @@ async def create_asset(asset: AssetCreate):
             description=asset.assetDescription or ""
         )
         
-        return Asset(**resign_asset_images(result))
-    except exceptions.CosmosHttpResponseError as e:
+        return Asset(**resign_asset_images(with_rating_summary(result)))
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to create asset: {str(e)}")
 
 @app.get("/api/assets", response_model=List[Asset])
-async def get_assets():
-    """Get all assets from Cosmos DB (images re-signed with fresh SAS tokens)."""
-    if not container:
+async def get_assets(
+    request: Request,
+    response: Response,
+    tag: List[str] = Query([], description="Only assets with these tags; repeat for several"),
+    match: str = Query("all", pattern="^(all|any)$", description="Whether assets need all of the tags or any of them")
+):
+    """Get all assets from Cosmos DB (images re-signed with fresh SAS tokens).
+    
+    With `tag`, only the matching assets are returned; they are looked up in
+    the tag index and point-read, not found by scanning the container.
+    
+    Honors If-None-Match with a 304 based on the container's (max _ts, count),
+    without reading any asset documents.
+    """
+    if not repo:
+        raise HTTPException(status_code=500, detail="Cosmos DB not configured")
+    
+    tags = normalize_tags(tag)
+    try:
+        tag_filter = hashlib.sha1(json.dumps([sorted(tags), match]).encode()).hexdigest()[:12] if tags else "all"
+        etag = collection_etag("assets", await read_assets_version(), url_epoch(), tag_filter)
+        not_modified = check_not_modified(request, response, etag)
+        if not_modified:
+            return not_modified
+        if tags:
+            require_indexes()
+            items = await read_assets_by_id(tag_index.match(tags, match_all=match == "all"))
+        else:
+            items = await read_assets()
+        return [Asset(**resign_asset_images(with_rating_summary(item))) for item in items]
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch assets: {str(e)}")
+
+@app.get("/api/tags")
+async def get_tags(
+    prefix: str = Query("", max_length=50, description="Only tags starting with this"),
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """Tags in use with the number of assets carrying each, most used first; 503 until the index is ready."""
+    require_indexes()
+    return {"tags": [{"tag": tag, "count": count} for tag, count in tag_index.counts(prefix, limit)]}
+
+@app.get("/api/search")
+async def search_assets(
+    q: str = Query(..., max_length=200, description="Search text; the last word also matches as a prefix"),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT)
+):
+    """Full-text search over asset names, tags, scenarios and descriptions, best match first.
+    
+    503 until the index is ready (see require_indexes).
+    """
+    require_indexes()
+    start = time.perf_counter()
+    hits, total = search_index.search(q, limit=limit)
+    for hit in hits:
+        hit["asset"] = resign_asset_images(dict(hit["asset"]))
+    return {
+        "query": q,
+        "total": total,
+        "results": hits,
+        "tookMs": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+@app.get("/api/assets/page")
+async def get_assets_page(
+    request: Request,
+    limit: int = Query(20, ge=1, le=ASSET_PAGE_MAX_LIMIT),
+    continuation: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get one page of assets projected to card-level fields.
+    
+    `fields` is a comma-separated list of Asset fields (default: ASSET_CARD_FIELDS).
+    Pass the returned `continuationToken` back as `continuation` for the next page.
+    The JSON body is streamed item by item instead of being built as one large list.
+    """
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in Asset.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # id is always returned so cards can link to the detail page
+        selected = ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+    else:
+        selected = ASSET_CARD_FIELDS
+    
+    # The rating summary is derived from the materialized aggregates
+    projected = [f for f in selected if f not in ("averageRating", "ratingCount")]
+    wants_rating = len(projected) < len(selected)
+    if wants_rating:
+        projected += ["ratingSum", "ratingCount"]
+    
+    # The ETag covers the whole collection; the URL (limit, continuation, fields) tells pages apart
+    headers = {}
     try:
-        query = "SELECT * FROM c ORDER BY c.createdAt DESC"
-        items = list(container.query_items(query=query, enable_cross_partition_query=True))
-        return [Asset(**resign_asset_images(item)) for item in items]
-    except exceptions.CosmosHttpResponseError as e:
+        etag = collection_etag("assets", await repo.assets_version(), url_epoch())
+        not_modified = check_not_modified(request, Response(), etag)
+        if not_modified:
+            return not_modified
+        if etag:
+            headers = {"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
+        items, next_token = await repo.list_assets_page(projected, limit, continuation)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid continuation token")
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch assets: {str(e)}")
+    
+    async def stream():
+        yield '{"items":['
+        for i, item in enumerate(items):
+            if wants_rating:
+                with_rating_summary(item)
+                item.pop("ratingSum", None)
+            yield ("," if i else "") + json.dumps(resign_asset_images(item))
+        yield '],"continuationToken":' + json.dumps(next_token) + '}'
+    
+    return StreamingResponse(stream(), media_type="application/json", headers=headers)
 
 @app.get("/api/assets/{asset_id}", response_model=Asset)
-async def get_asset(asset_id: str):
-    """Get a single asset by ID."""
-    if not container:
+async def get_asset(asset_id: str, request: Request, response: Response):
+    """Get a single asset by ID (304 if the client's If-None-Match is still current)."""
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     try:
-        query = f"SELECT * FROM c WHERE c.id = @id"
-        params = [{"name": "@id", "value": asset_id}]
-        items = list(container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        if not items:
+        asset = await timing.timed("asset", read_asset(asset_id))
+        if not asset:
             raise HTTPException(status_code=404, detail="Asset not found")
         
-        asset = items[0]
-        
-        # Get average rating for this asset
-        if ratings_container:
-            rating_query = "SELECT VALUE AVG(c.rating) FROM c WHERE c.assetId = @assetId"
-            rating_params = [{"name": "@assetId", "value": asset_id}]
-            avg_ratings = list(ratings_container.query_items(query=rating_query, parameters=rating_params, enable_cross_partition_query=True))
-            
-            count_query = "SELECT VALUE COUNT(1) FROM c WHERE c.assetId = @assetId"
-            count_result = list(ratings_container.query_items(query=count_query, parameters=rating_params, enable_cross_partition_query=True))
-            
-            asset["averageRating"] = avg_ratings[0] if avg_ratings and avg_ratings[0] else None
-            asset["ratingCount"] = count_result[0] if count_result else 0
+        if has_rating_aggregates(asset):
+            not_modified = check_not_modified(request, response, document_etag(asset, url_epoch()))
+            if not_modified:
+                return not_modified
+            with_rating_summary(asset)
+        else:
+            # Not yet backfilled by the repair job — aggregate from the ratings container
+            asset["averageRating"], asset["ratingCount"] = await timing.timed("ratingStats", repo.get_rating_stats(asset_id))
         
-        return Asset(**resign_asset_images(asset))
-    except exceptions.CosmosHttpResponseError as e:
+        with timing.span("resign"):
+            asset = resign_asset_images(asset)
+        with timing.span("model"):
+            return Asset(**asset)
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch asset: {str(e)}")
 
+@app.get("/api/assets/{asset_id}/full")
+async def get_asset_detail(asset_id: str, userId: Optional[str] = None):
+    """Everything the asset detail page shows, in one response.
+    
+    The asset, its rating summary (plus userId's own rating), the first page
+    of comments and all improvements are read concurrently, so the response
+    takes as long as the slowest read rather than their sum. Per-section
+    durations are reported in the Server-Timing header.
+    """
+    if not repo:
+        raise HTTPException(status_code=500, detail="Cosmos DB not configured")
+    
+    try:
+        asset, user_rating, (comments, comments_token), improvements = await asyncio.gather(
+            timing.timed("asset", read_asset(asset_id)),
+            timing.timed("userRating", repo.get_user_rating(asset_id, userId)) if userId else asyncio.sleep(0),
+            timing.timed("comments", repo.list_comments_page(asset_id, ASSET_DETAIL_COMMENTS)),
+            timing.timed("improvements", repo.list_improvements(asset_id)),
+        )
+        if not asset:
+            raise HTTPException(status_code=404, detail="Asset not found")
+        if has_rating_aggregates(asset):
+            with_rating_summary(asset)
+        else:
+            # Not yet backfilled by the repair job — aggregate from the ratings container
+            asset["averageRating"], asset["ratingCount"] = await timing.timed("ratingStats", repo.get_rating_stats(asset_id))
+        comment_count = asset.get("commentCount")
+        if comment_count is None:
+            comment_count = await timing.timed("commentCount", count_children("comments", asset_id))
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch asset: {str(e)}")
+    
+    return {
+        "asset": Asset(**resign_asset_images(asset)),
+        "ratings": {
+            "averageRating": round(asset["averageRating"] or 0, 1),
+            "totalCount": asset["ratingCount"],
+            "userRating": user_rating["rating"] if user_rating else None,
+        },
+        "comments": CommentPage(items=[Comment(**item) for item in comments], continuationToken=comments_token, totalCount=comment_count),
+        "improvements": [Improvement(**item) for item in improvements],
+    }
+
 @app.patch("/api/assets/{asset_id}/picture", response_model=Asset)
 async def update_asset_picture(asset_id: str, picture_update: AssetPictureUpdate):
     """Update an asset's picture."""
-    if not container:
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     try:
-        # Get the existing asset
-        query = f"SELECT * FROM c WHERE c.id = @id"
-        params = [{"name": "@id", "value": asset_id}]
-        items = list(container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        if not items:
+        # Make sure the asset exists before uploading anything
+        if not await read_asset(asset_id):
             raise HTTPException(status_code=404, detail="Asset not found")
         
-        asset = items[0]
-        
         # Upload the image to blob storage if configured
         asset_picture_url = picture_update.assetPicture
-        if blob_service_client and picture_update.assetPicture and picture_update.assetPicture.startswith('data:'):
+        asset_picture_renditions = None
+        if blobs and picture_update.assetPicture and picture_update.assetPicture.startswith('data:'):
             try:
-                filename = f"{asset_id}_cover.png"
-                asset_picture_url = upload_image_to_blob(picture_update.assetPicture, filename)
+                filename = versioned_blob_name(asset_id, "cover", "png")
+                asset_picture_url, asset_picture_renditions = await upload_image_to_blob(picture_update.assetPicture, filename)
             except Exception as e:
-                logger.info(f"Failed to upload image to blob: {e}")
+                logger.info("Failed to upload image to blob: %s", e)
                 # Fall back to base64
         
-        # Update the asset
-        asset["assetPicture"] = asset_picture_url
+        previous = set()
+        async def mutate(asset: dict):
+            nonlocal previous
+            previous = picture_blob_names(asset)
+            asset["assetPicture"] = asset_picture_url
+            asset["assetPictureRenditions"] = asset_picture_renditions
         
-        # Replace the item in Cosmos DB
-        result = container.replace_item(item=asset_id, body=asset)
-        return Asset(**resign_asset_images(result))
-    except exceptions.CosmosHttpResponseError as e:
+        result = await modify_asset(asset_id, mutate)
+        if asset_picture_renditions is not None:
+            await delete_replaced_images(previous, result)
+        return Asset(**resign_asset_images(with_rating_summary(result)))
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to update asset picture: {str(e)}")
 
+@app.put("/api/assets/{asset_id}/images/{slot}", response_model=Asset)
+async def upload_asset_image(asset_id: str, slot: str, request: Request):
+    """Upload an image as the raw request body, streamed into Blob Storage.
+    
+    `slot` is 'cover' or 'screenshot-{index}' (index may equal the current
+    screenshot count to append). The format is detected from the image bytes;
+    the body is never held in memory as a whole.
+    """
+    if not repo:
+        raise HTTPException(status_code=500, detail="Cosmos DB not configured")
+    if not blobs:
+        raise HTTPException(status_code=500, detail="Blob Storage not configured")
+    
+    match = IMAGE_SLOT_PATTERN.match(slot)
+    if not match:
+        raise HTTPException(status_code=400, detail="slot must be 'cover' or 'screenshot-{index}'")
+    screenshot_index = int(match.group(2)) if match.group(2) is not None else None
+    
+    try:
+        asset = await read_asset(asset_id)
+        if not asset:
+            raise HTTPException(status_code=404, detail="Asset not found")
+        if screenshot_index is not None and screenshot_index > len(asset.get("screenshots") or []):
+            raise HTTPException(status_code=400, detail="Screenshot index out of range")
+        
+        body = request.stream()
+        head = await read_head(body, 12)
+        if not head:
+            raise HTTPException(status_code=400, detail="Empty request body")
+        detected = sniff_image_type(head)
+        if not detected:
+            raise HTTPException(status_code=415, detail="Unsupported image format; expected PNG, JPEG, GIF or WebP")
+        content_type, extension = detected
+        name = "cover" if screenshot_index is None else f"screenshot_{screenshot_index}"
+        blob_name = versioned_blob_name(asset_id, name, extension)
+        
+        # Renditions are rendered from a temporary copy so the image never has to fit in memory here
+        spool = tempfile.NamedTemporaryFile(suffix=f".{extension}", delete=False) if rendition_pipeline else None
+        try:
+            start = time.perf_counter()
+            await blobs.upload_stream(blob_name, rechunk(head, body, IMAGE_UPLOAD_CHUNK_BYTES, IMAGE_UPLOAD_MAX_BYTES, spool), content_type)
+            logger.debug("Streamed %s (%s) in %.0f ms", blob_name, content_type, (time.perf_counter() - start) * 1000)
+            renditions = {}
+            if spool:
+                spool.close()
+                renditions = await rendition_pipeline.create(blob_name, spool.name)
+        finally:
+            if spool:
+                spool.close()
+                os.remove(spool.name)
+        
+        previous = set()
+        async def mutate(asset: dict):
+            nonlocal previous
+            previous = image_blob_names(asset)
+            if screenshot_index is None:
+                asset["assetPicture"] = blob_name
+                asset["assetPictureRenditions"] = renditions
+                return
+            screenshots = asset.setdefault("screenshots", [])
+            screenshot_renditions = asset.get("screenshotRenditions") or []
+            screenshot_renditions += [{}] * (len(screenshots) - len(screenshot_renditions))
+            if screenshot_index < len(screenshots):
+                screenshots[screenshot_index] = blob_name
+                screenshot_renditions[screenshot_index] = renditions
+            else:
+                screenshots.append(blob_name)
+                screenshot_renditions.append(renditions)
+            asset["screenshotRenditions"] = screenshot_renditions
+        
+        result = await modify_asset(asset_id, mutate)
+        await delete_replaced_images(previous, result)
+        return Asset(**resign_asset_images(with_rating_summary(result)))
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
+
 @app.put("/api/assets/{asset_id}", response_model=Asset)
 async def update_asset(asset_id: str, asset_update: AssetUpdate):
     """Update an asset's details."""
-    if not container:
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     try:
-        # Get the existing asset
-        query = f"SELECT * FROM c WHERE c.id = @id"
-        params = [{"name": "@id", "value": asset_id}]
-        items = list(container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        if not items:
+        # Make sure the asset exists before uploading anything
+        if not await read_asset(asset_id):
             raise HTTPException(status_code=404, detail="Asset not found")
         
-        asset = items[0]
-        
         # Update only provided fields
         update_data = asset_update.model_dump(exclude_unset=True)
+        if 'tags' in update_data:
+            update_data['tags'] = normalize_tags(update_data['tags'])
+        
+        # Renditions of a replaced picture or screenshot list no longer apply
+        if 'assetPicture' in update_data:
+            update_data['assetPictureRenditions'] = None
+        if 'screenshots' in update_data:
+            update_data['screenshotRenditions'] = [{} for _ in update_data['screenshots'] or []]
         
         # Handle image upload if provided as base64
         if 'assetPicture' in update_data and update_data['assetPicture']:
-            if blob_service_client and update_data['assetPicture'].startswith('data:'):
+            if blobs and update_data['assetPicture'].startswith('data:'):
                 try:
-                    filename = f"{asset_id}_cover.png"
-                    update_data['assetPicture'] = upload_image_to_blob(update_data['assetPicture'], filename)
+                    filename = versioned_blob_name(asset_id, "cover", "png")
+                    update_data['assetPicture'], update_data['assetPictureRenditions'] = await upload_image_to_blob(update_data['assetPicture'], filename)
                 except Exception as e:
-                    logger.info(f"Failed to upload image to blob: {e}")
-        
-        for key, value in update_data.items():
-            asset[key] = value
+                    logger.info("Failed to upload image to blob: %s", e)
         
-        # Update lastMaintainedAt when owner edits the asset
-        asset["lastMaintainedAt"] = datetime.utcnow().isoformat()
+        previous = set()
+        async def mutate(asset: dict):
+            nonlocal previous
+            previous = picture_blob_names(asset)
+            for key, value in update_data.items():
+                asset[key] = value
+            # Update lastMaintainedAt when owner edits the asset
+            asset["lastMaintainedAt"] = datetime.utcnow().isoformat()
         
-        # Replace the item in Cosmos DB
-        result = container.replace_item(item=asset_id, body=asset)
-        return Asset(**resign_asset_images(result))
-    except exceptions.CosmosHttpResponseError as e:
+        result = await modify_asset(asset_id, mutate)
+        if update_data.get('assetPictureRenditions') is not None:
+            await delete_replaced_images(previous, result)
+        return Asset(**resign_asset_images(with_rating_summary(result)))
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to update asset: {str(e)}")
 
+async def delete_asset_children(asset_id: str):
+    """Cascade an asset delete: ratings, comments, improvements and blobs, all concurrently.
+    
+    Failures are logged rather than raised; leftovers are unreachable once the
+    asset document is gone.
+    """
+    start = time.perf_counter()
+    steps = {
+        "ratings": repo.delete_ratings(asset_id),
+        "comments": repo.delete_comments(asset_id),
+        "improvements": repo.delete_improvements(asset_id),
+    }
+    if blobs:
+        # '{asset_id}/...' for every image, '{asset_id}_cover.*' for picture updates made before images were versioned
+        steps["blobs"] = blobs.delete_prefix(f"{asset_id}/")
+        steps["cover blobs"] = blobs.delete_prefix(f"{asset_id}_cover")
+    results = await asyncio.gather(*steps.values(), return_exceptions=True)
+    for step, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.info("Failed to delete %s of asset %s: %s", step, asset_id, result)
+    counts = ", ".join(f"{result} {step}" for step, result in zip(steps, results) if not isinstance(result, Exception))
+    logger.info("Deleted asset %s children (%s) in %.0f ms", asset_id, counts, (time.perf_counter() - start) * 1000)
+
 @app.delete("/api/assets/{asset_id}")
-async def delete_asset(asset_id: str):
+async def delete_asset(
+    asset_id: str,
+    background_tasks: BackgroundTasks,
+    background: bool = Query(False, description="Delete the asset now and its ratings, comments, improvements and images after responding (202)")
+):
     """Delete an asset and its associated data."""
-    if not container:
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     try:
         # Get the existing asset
-        query = f"SELECT * FROM c WHERE c.id = @id"
-        params = [{"name": "@id", "value": asset_id}]
-        items = list(container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        if not items:
+        asset = await repo.get_asset(asset_id)
+        if not asset:
             raise HTTPException(status_code=404, detail="Asset not found")
         
-        asset = items[0]
-        
-        # Delete associated ratings
-        if ratings_container:
-            try:
-                rating_query = "SELECT * FROM c WHERE c.assetId = @assetId"
-                rating_params = [{"name": "@assetId", "value": asset_id}]
-                ratings = list(ratings_container.query_items(query=rating_query, parameters=rating_params, enable_cross_partition_query=True))
-                for rating in ratings:
-                    ratings_container.delete_item(item=rating['id'], partition_key=rating['assetId'])
-            except Exception as e:
-                logger.info(f"Failed to delete ratings: {e}")
-        
-        # Delete associated comments
-        if comments_container:
-            try:
-                comment_query = "SELECT * FROM c WHERE c.assetId = @assetId"
-                comment_params = [{"name": "@assetId", "value": asset_id}]
-                comments = list(comments_container.query_items(query=comment_query, parameters=comment_params, enable_cross_partition_query=True))
-                for comment in comments:
-                    comments_container.delete_item(item=comment['id'], partition_key=comment['assetId'])
-            except Exception as e:
-                logger.info(f"Failed to delete comments: {e}")
+        if background:
+            # The asset disappears immediately; the cascade runs after the response is sent
+            await repo.delete_asset(asset)
+            asset_removed(asset_id)
+            background_tasks.add_task(delete_asset_children, asset_id)
+            return JSONResponse(status_code=202, content={"message": "Asset deleted; associated data is being removed"})
         
-        # Delete asset image from blob storage if exists
-        if blob_service_client and asset.get('assetPicture') and 'blob.core.windows.net' in asset.get('assetPicture', ''):
-            try:
-                blob_container_client = blob_service_client.get_container_client(os.getenv('BLOB_CONTAINER_NAME', 'assets'))
-                blob_name = f"{asset_id}_cover.png"
-                blob_container_client.delete_blob(blob_name)
-            except Exception as e:
-                logger.info(f"Failed to delete blob: {e}")
+        await delete_asset_children(asset_id)
         
         # Delete the asset
-        container.delete_item(item=asset_id, partition_key=asset['createdBy'])
+        await repo.delete_asset(asset)
+        asset_removed(asset_id)
         
         return {"message": "Asset deleted successfully"}
-    except exceptions.CosmosHttpResponseError as e:
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete asset: {str(e)}")
 
 # === Rating Endpoints ===
@@ -865,84 +1708,161 @@ async def delete_asset(asset_id: str):
 @app.post("/api/assets/{asset_id}/ratings", response_model=Rating)
 async def add_rating(asset_id: str, rating: RatingCreate):
     """Add or update a rating for an asset."""
-    if not ratings_container:
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     if rating.rating < 1 or rating.rating > 5:
         raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
     
+    # One document per (asset, user), so concurrent submissions can't create duplicates.
+    # The write is conditional on the version we read, so the previous value fed to the
+    # aggregates is the one actually overwritten; a lost race just re-reads and retries.
+    rating_doc = {
+        "id": rating_id(asset_id, rating.userId),
+        "assetId": asset_id,
+        "rating": rating.rating,
+        "userId": rating.userId,
+        "userName": rating.userName,
+    }
     try:
-        # Check if user already rated this asset
-        query = "SELECT * FROM c WHERE c.assetId = @assetId AND c.userId = @userId"
-        params = [
-            {"name": "@assetId", "value": asset_id},
-            {"name": "@userId", "value": rating.userId}
-        ]
-        existing = list(ratings_container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        
-        if existing:
-            # Update existing rating
-            rating_doc = existing[0]
-            rating_doc["rating"] = rating.rating
+        for _ in range(ASSET_UPDATE_MAX_ATTEMPTS):
+            existing = await repo.get_user_rating(asset_id, rating.userId)
             rating_doc["createdAt"] = datetime.utcnow().isoformat()
-            result = ratings_container.replace_item(item=rating_doc["id"], body=rating_doc)
-        else:
-            # Create new rating
-            rating_doc = {
-                "id": str(uuid.uuid4()),
-                "assetId": asset_id,
-                "rating": rating.rating,
-                "userId": rating.userId,
-                "userName": rating.userName,
-                "createdAt": datetime.utcnow().isoformat()
-            }
-            result = ratings_container.create_item(body=rating_doc)
-        
-        return Rating(**result)
-    except exceptions.CosmosHttpResponseError as e:
+            # A rating under an older random id is rewritten under the derived id
+            current = existing if existing and existing["id"] == rating_doc["id"] else None
+            try:
+                result = await repo.save_rating(rating_doc, if_match=current["_etag"] if current else None)
+            except PreconditionFailedError:
+                continue
+            if existing and not current:
+                await repo.delete_rating(asset_id, existing["id"])
+            await update_rating_aggregates(asset_id, existing["rating"] if existing else None, rating.rating)
+            return Rating(**result)
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to add rating: {str(e)}")
+    raise HTTPException(status_code=409, detail="Rating was changed concurrently, please retry")
+
+async def update_rating_aggregates(asset_id: str, old_rating: Optional[int], new_rating: Optional[int]):
+    """Apply a rating change to the asset's materialized aggregates.
+    
+    Never fails the rating write: on error the aggregates are left for
+    `python manage.py repair-ratings` to recompute.
+    """
+    if old_rating == new_rating:
+        return
+    
+    async def mutate(asset: dict):
+        if has_rating_aggregates(asset):
+            apply_rating_delta(asset, old_rating, new_rating)
+        else:
+            # First rating change since aggregates were introduced — build them from scratch
+            ratings = await repo.list_ratings(asset_id)
+            set_rating_aggregates(asset, [r["rating"] for r in ratings])
+    
+    try:
+        await modify_asset(asset_id, mutate)
+    except HTTPException:
+        logger.info("Rating for unknown asset %s; no aggregates to update", asset_id)
+    except StorageError as e:
+        logger.error("Failed to update rating aggregates for asset %s: %s", asset_id, e)
 
 @app.get("/api/assets/{asset_id}/ratings")
-async def get_ratings(asset_id: str):
-    """Get all ratings for an asset."""
-    if not ratings_container:
+async def get_ratings(asset_id: str, request: Request, response: Response, includeRatings: bool = True):
+    """Get ratings for an asset with their average and count.
+    
+    Pass includeRatings=false to get only the summary, served from the asset's
+    materialized aggregates without loading any rating documents.
+    """
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     try:
-        query = "SELECT * FROM c WHERE c.assetId = @assetId ORDER BY c.createdAt DESC"
-        params = [{"name": "@assetId", "value": asset_id}]
-        items = list(ratings_container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
+        asset = await read_asset(asset_id)
+        if asset and has_rating_aggregates(asset):
+            # Every rating write updates the asset's aggregates, so its _etag covers the ratings too
+            not_modified = check_not_modified(request, response, document_etag(asset, "ratings" if includeRatings else "summary"))
+            if not_modified:
+                return not_modified
+        items = await repo.list_ratings(asset_id) if includeRatings or not asset or not has_rating_aggregates(asset) else []
         
-        # Calculate average
-        avg = sum(item["rating"] for item in items) / len(items) if items else 0
+        if asset and has_rating_aggregates(asset):
+            with_rating_summary(asset)
+            avg, count = asset["averageRating"] or 0, asset["ratingCount"]
+        else:
+            # Calculate average
+            avg = sum(item["rating"] for item in items) / len(items) if items else 0
+            count = len(items)
         
         return {
-            "ratings": [Rating(**item) for item in items],
+            "ratings": [Rating(**item) for item in items] if includeRatings else [],
             "averageRating": round(avg, 1),
-            "totalCount": len(items)
+            "totalCount": count
         }
-    except exceptions.CosmosHttpResponseError as e:
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch ratings: {str(e)}")
 
+@app.post("/api/ratings/summary")
+async def get_rating_summaries(summary_request: RatingSummaryRequest):
+    """Average, count and (with userId) the user's own rating for many assets in one call.
+    
+    Averages and counts come from the aggregates materialized on each asset
+    (or the ratings container for assets without them), rounded like
+    /api/assets/{id}/ratings; the user's ratings are one query per asset
+    partition, a few at a time. Unknown asset ids are left out of the result.
+    """
+    if not repo:
+        raise HTTPException(status_code=500, detail="Cosmos DB not configured")
+    
+    asset_ids = list(dict.fromkeys(summary_request.assetIds))
+    if len(asset_ids) > RATING_SUMMARY_MAX_ASSETS:
+        raise HTTPException(status_code=400, detail=f"At most {RATING_SUMMARY_MAX_ASSETS} assets per request")
+    
+    try:
+        assets, user_ratings = await asyncio.gather(
+            read_assets_by_id(asset_ids),
+            repo.get_user_ratings(asset_ids, summary_request.userId, concurrency=ASSET_READ_CONCURRENCY)
+            if summary_request.userId else asyncio.sleep(0, result={})
+        )
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch rating summaries: {str(e)}")
+    
+    # Assets not yet backfilled by the repair job are aggregated from the ratings container, like get_asset
+    semaphore = asyncio.Semaphore(ASSET_READ_CONCURRENCY)
+    async def summarize(asset: dict):
+        if has_rating_aggregates(asset):
+            with_rating_summary(asset)
+            return
+        async with semaphore:
+            asset["averageRating"], asset["ratingCount"] = await repo.get_rating_stats(asset["id"])
+    try:
+        await asyncio.gather(*(summarize(asset) for asset in assets))
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch rating summaries: {str(e)}")
+    
+    summaries = {}
+    for asset in assets:
+        user_rating = user_ratings.get(asset["id"])
+        summaries[asset["id"]] = {
+            "averageRating": round(asset["averageRating"] or 0, 1),
+            "totalCount": asset["ratingCount"],
+            "userRating": user_rating["rating"] if user_rating else None,
+        }
+    return {"summaries": summaries}
+
 @app.get("/api/assets/{asset_id}/ratings/user/{user_id}")
 async def get_user_rating(asset_id: str, user_id: str):
     """Get a specific user's rating for an asset."""
-    if not ratings_container:
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     try:
-        query = "SELECT * FROM c WHERE c.assetId = @assetId AND c.userId = @userId"
-        params = [
-            {"name": "@assetId", "value": asset_id},
-            {"name": "@userId", "value": user_id}
-        ]
-        items = list(ratings_container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
+        existing = await repo.get_user_rating(asset_id, user_id)
         
-        if not items:
+        if not existing:
             return {"rating": None}
         
-        return {"rating": items[0]["rating"]}
-    except exceptions.CosmosHttpResponseError as e:
+        return {"rating": existing["rating"]}
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch user rating: {str(e)}")
 
 # === Comment Endpoints ===
@@ -950,7 +1870,7 @@ async def get_user_rating(asset_id: str, user_id: str):
 @app.post("/api/assets/{asset_id}/comments", response_model=Comment)
 async def add_comment(asset_id: str, comment: CommentCreate):
     """Add a comment to an asset."""
-    if not comments_container:
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     if not comment.text.strip():
@@ -965,50 +1885,57 @@ async def add_comment(asset_id: str, comment: CommentCreate):
             "userName": comment.userName,
             "createdAt": datetime.utcnow().isoformat()
         }
-        result = comments_container.create_item(body=comment_doc)
+        result = await repo.create_comment(comment_doc)
+        await update_child_count(asset_id, "comments", +1)
         return Comment(**result)
-    except exceptions.CosmosHttpResponseError as e:
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to add comment: {str(e)}")
 
-@app.get("/api/assets/{asset_id}/comments", response_model=List[Comment])
-async def get_comments(asset_id: str):
-    """Get all comments for an asset."""
-    if not comments_container:
+@app.get("/api/assets/{asset_id}/comments", response_model=CommentPage)
+async def get_comments(
+    asset_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=CHILD_PAGE_MAX_LIMIT),
+    continuation: Optional[str] = None
+):
+    """Get one page of an asset's comments, newest first, with the total count.
+    
+    Pass the returned `continuationToken` back as `continuation` for the next
+    page (304 if unchanged since the client's If-None-Match).
+    """
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     try:
-        query = "SELECT * FROM c WHERE c.assetId = @assetId ORDER BY c.createdAt DESC"
-        params = [{"name": "@assetId", "value": asset_id}]
-        items = list(comments_container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        return [Comment(**item) for item in items]
-    except exceptions.CosmosHttpResponseError as e:
+        page = await read_child_page("comments", asset_id, request, response, limit, continuation)
+        if isinstance(page, Response):
+            return page
+        items, next_token, total = page
+        return CommentPage(items=[Comment(**item) for item in items], continuationToken=next_token, totalCount=total)
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch comments: {str(e)}")
 
 @app.delete("/api/assets/{asset_id}/comments/{comment_id}")
 async def delete_comment(asset_id: str, comment_id: str, user_id: str):
     """Delete a comment (only by the comment author)."""
-    if not comments_container:
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     try:
         # Get the comment first to verify ownership
-        query = "SELECT * FROM c WHERE c.id = @id AND c.assetId = @assetId"
-        params = [
-            {"name": "@id", "value": comment_id},
-            {"name": "@assetId", "value": asset_id}
-        ]
-        items = list(comments_container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
+        comment = await repo.get_comment(asset_id, comment_id)
         
-        if not items:
+        if not comment:
             raise HTTPException(status_code=404, detail="Comment not found")
         
-        comment = items[0]
         if comment["userId"] != user_id:
             raise HTTPException(status_code=403, detail="You can only delete your own comments")
         
-        comments_container.delete_item(item=comment_id, partition_key=asset_id)
+        await repo.delete_comment(asset_id, comment_id)
+        await update_child_count(asset_id, "comments", -1)
         return {"message": "Comment deleted"}
-    except exceptions.CosmosHttpResponseError as e:
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete comment: {str(e)}")
 
 # === Improvements Endpoints ===
@@ -1016,19 +1943,15 @@ async def delete_comment(asset_id: str, comment_id: str, user_id: str):
 @app.post("/api/assets/{asset_id}/improvements", response_model=Improvement)
 async def create_improvement(asset_id: str, improvement: ImprovementCreate):
     """Add an improvement to an asset."""
-    if not improvements_container:
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     # Verify asset exists
-    if container:
-        try:
-            query = "SELECT * FROM c WHERE c.id = @id"
-            params = [{"name": "@id", "value": asset_id}]
-            items = list(container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-            if not items:
-                raise HTTPException(status_code=404, detail="Asset not found")
-        except exceptions.CosmosHttpResponseError:
-            pass  # Allow improvement even if asset check fails
+    try:
+        if not await read_asset(asset_id):
+            raise HTTPException(status_code=404, detail="Asset not found")
+    except StorageError:
+        pass  # Allow improvement even if asset check fails
     
     try:
         improvement_doc = {
@@ -1040,25 +1963,72 @@ async def create_improvement(asset_id: str, improvement: ImprovementCreate):
             "data": improvement.data,
             "createdAt": datetime.utcnow().isoformat()
         }
-        result = improvements_container.create_item(body=improvement_doc)
+        result = await repo.create_improvement(improvement_doc)
+        await update_child_count(asset_id, "improvements", +1)
         return Improvement(**result)
-    except exceptions.CosmosHttpResponseError as e:
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to create improvement: {str(e)}")
 
-@app.get("/api/assets/{asset_id}/improvements", response_model=List[Improvement])
-async def get_improvements(asset_id: str):
-    """Get all improvements for an asset."""
-    if not improvements_container:
+@app.get("/api/assets/{asset_id}/improvements", response_model=ImprovementPage)
+async def get_improvements(
+    asset_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=CHILD_PAGE_MAX_LIMIT),
+    continuation: Optional[str] = None
+):
+    """Get one page of an asset's improvements, newest first, with the total count.
+    
+    Paginated like GET /api/assets/{id}/comments.
+    """
+    if not repo:
         raise HTTPException(status_code=500, detail="Cosmos DB not configured")
     
     try:
-        query = "SELECT * FROM c WHERE c.assetId = @assetId ORDER BY c.createdAt DESC"
-        params = [{"name": "@assetId", "value": asset_id}]
-        items = list(improvements_container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        return [Improvement(**item) for item in items]
-    except exceptions.CosmosHttpResponseError as e:
+        page = await read_child_page("improvements", asset_id, request, response, limit, continuation)
+        if isinstance(page, Response):
+            return page
+        items, next_token, total = page
+        return ImprovementPage(items=[Improvement(**item) for item in items], continuationToken=next_token, totalCount=total)
+    except StorageError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch improvements: {str(e)}")
 
+# === Admin Endpoints ===
+
+# Azure AD app role allowed to use the admin endpoints
+ADMIN_ROLE = os.getenv("ADMIN_ROLE", "AiFlix.Admin")
+
+async def require_admin(request: Request):
+    """Allow only callers whose token carries ADMIN_ROLE (anyone when auth is disabled for development)."""
+    if not AUTH_ENABLED:
+        return
+    claims = await authenticate_request(request)
+    if ADMIN_ROLE not in (claims.get("roles") or []):
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+@app.get("/api/admin/profiler", dependencies=[Depends(require_admin)])
+async def get_profiler():
+    """Sampling profiler state for this instance."""
+    return profiler.stats()
+
+@app.put("/api/admin/profiler", dependencies=[Depends(require_admin)])
+async def set_profiler(settings: ProfilerSettings):
+    """Turn this instance's sampling profiler on or off.
+    
+    While on, samplePercent of requests are profiled. Turning it off writes the
+    aggregated stacks to PROFILER_DIR in folded format (flamegraph.pl / speedscope)
+    and returns the file name. Each instance and worker profiles separately.
+    """
+    if not 0 < settings.samplePercent <= 100:
+        raise HTTPException(status_code=400, detail="samplePercent must be in (0, 100]")
+    if settings.intervalMs is not None and not 1 <= settings.intervalMs <= 1000:
+        raise HTTPException(status_code=400, detail="intervalMs must be between 1 and 1000")
+    if settings.enabled:
+        profiler.enable(settings.samplePercent, settings.intervalMs / 1000 if settings.intervalMs else None)
+        return profiler.stats()
+    dump = profiler.disable()
+    return {**profiler.stats(), "dump": dump}
+
 # === Image Generation Endpoint ===
 
 @app.post("/api/generate-image", response_model=ImageGenerationResponse)
@@ -1079,65 +2049,20 @@ Asset Title: {request.asset_name}
 Asset Description: {request.asset_description if request.asset_description else 'N/A'}
 Visual Metaphors: Create visual metaphors based on the description - such as documents, checklists, magnifying glass, AI neural nodes, dashboards, shields, gavels, or other relevant imagery."""
 
-    if not AZURE_OPENAI_ENDPOINT:
+    if not image_generator:
         raise HTTPException(
             status_code=500, 
             detail="Azure OpenAI endpoint not configured. Set AZURE_OPENAI_ENDPOINT environment variable."
         )
     
     try:
-        # Get access token using managed identity
-        credential = get_azure_credential()
-        token = credential.get_token(COGNITIVE_SERVICES_SCOPE)
-        
-        # Azure AI Foundry OpenAI-compatible endpoint format
-        url = f"{AZURE_OPENAI_ENDPOINT}/images/generations"
-        
-        logger.info(f"DEBUG - Calling URL: {url}")
-        logger.info(f"DEBUG - Model: {AZURE_OPENAI_DEPLOYMENT}")
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {token.token}"
-        }
-        
-        payload = {
-            "model": AZURE_OPENAI_DEPLOYMENT,
-            "prompt": prompt,
-            "n": 1,
-            "size": "1024x1024",
-            "quality": "high",        # Poster art polish - cleaner details
-            "output_format": "png"    # Crisp UI assets
-        }
-        
-        logger.info(f"DEBUG - Payload: {payload}")
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
-            
-            if response.status_code != 200:
-                error_detail = response.text
-                raise HTTPException(status_code=response.status_code, detail=f"Azure OpenAI error: {error_detail}")
-            
-            result = response.json()
-            
-            # Handle both URL and base64 response formats
-            image_result = result["data"][0]
-            if "b64_json" in image_result:
-                image_data = image_result["b64_json"]
-            elif "url" in image_result:
-                # Fetch image from URL and convert to base64
-                img_response = await client.get(image_result["url"])
-                import base64
-                image_data = base64.b64encode(img_response.content).decode('utf-8')
-            else:
-                raise HTTPException(status_code=500, detail="Unexpected response format")
-            
-            return ImageGenerationResponse(
-                image_data=image_data,
-                content_type="image/png"
-            )
-            
+        image = await image_generator.generate(prompt)
+        return ImageGenerationResponse(
+            image_data=base64.b64encode(image).decode('utf-8'),
+            content_type="image/png"
+        )
+    except ImageGenerationError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Image generation timed out")
     except Exception as e:
@@ -1145,4 +2070,5 @@ Visual Metaphors: Create visual metaphors based on the description - such as doc
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Leave logging to logconfig (uvicorn's default config writes to stdout synchronously)
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
@@ -0,0 +1,345 @@
+"""Maintenance commands for the AiFlix backend.
+
+Uses the same storage configuration (env / .env) as the API.
+
+Usage:
+    python manage.py repair-ratings [--asset-id ID] [--concurrency 8]
+    python manage.py repair-counts [--asset-id ID] [--concurrency 8]
+    python manage.py compact-ratings [--asset-id ID] [--concurrency 8] [--dry-run]
+    python manage.py migrate-images [--concurrency 8] [--state-file PATH] [--restart] [--dry-run]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+
+import main
+from storage import decode_asset_page_token
+
+logger = logging.getLogger("aiflix.manage")
+
+
+async def repair_ratings(args):
+    """Recompute every asset's materialized rating aggregates from the ratings container."""
+    asset_ids = [args.asset_id] if args.asset_id else [a["id"] for a in await main.repo.list_assets()]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    repaired = 0
+    failed = 0
+
+    async def repair(asset_id):
+        nonlocal repaired, failed
+        async with semaphore:
+            try:
+                before = await main.repo.get_asset(asset_id)
+                after = await main.recompute_rating_aggregates(asset_id)
+            except Exception as e:
+                failed += 1
+                logger.error("Failed to repair ratings for asset %s: %s", asset_id, e)
+                return
+            if (before.get("ratingSum"), before.get("ratingCount")) != (after["ratingSum"], after["ratingCount"]):
+                repaired += 1
+                logger.info("Asset %s: sum/count %s/%s -> %s/%s", asset_id, before.get("ratingSum"), before.get("ratingCount"),
+                            after["ratingSum"], after["ratingCount"])
+
+    await asyncio.gather(*(repair(asset_id) for asset_id in asset_ids))
+    logger.info("Checked %s assets: %s repaired, %s failed", len(asset_ids), repaired, failed)
+    return 1 if failed else 0
+
+
+async def repair_counts(args):
+    """Recompute every asset's comment and improvement counters from their containers."""
+    asset_ids = [args.asset_id] if args.asset_id else [a["id"] for a in await main.repo.list_assets()]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    repaired = 0
+    failed = 0
+
+    async def repair(asset_id):
+        nonlocal repaired, failed
+        async with semaphore:
+            try:
+                before = await main.repo.get_asset(asset_id)
+                after = await main.recompute_child_counts(asset_id)
+            except Exception as e:
+                failed += 1
+                logger.error("Failed to repair counters for asset %s: %s", asset_id, e)
+                return
+            fields = list(main.CHILD_COUNT_FIELDS.values())
+            if [before.get(f) for f in fields] != [after[f] for f in fields]:
+                repaired += 1
+                logger.info("Asset %s: %s", asset_id, ", ".join(f"{f} {before.get(f)} -> {after[f]}" for f in fields))
+
+    await asyncio.gather(*(repair(asset_id) for asset_id in asset_ids))
+    logger.info("Checked %s assets: %s repaired, %s failed", len(asset_ids), repaired, failed)
+    return 1 if failed else 0
+
+
+async def compact_ratings(args):
+    """Rewrite ratings under their (asset, user) derived ids, keeping each user's newest and deleting duplicates."""
+    asset_ids = [args.asset_id] if args.asset_id else [a["id"] for a in await main.repo.list_assets()]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rewritten = 0
+    deleted = 0
+    failed = 0
+
+    async def compact(asset_id):
+        nonlocal rewritten, deleted, failed
+        async with semaphore:
+            try:
+                by_user = {}
+                for r in await main.repo.list_ratings(asset_id):
+                    by_user.setdefault(r["userId"], []).append(r)
+                changed = False
+                for user_id, ratings in by_user.items():
+                    target_id = main.rating_id(asset_id, user_id)
+                    # list_ratings is newest first
+                    keep = ratings[0]
+                    stale = [r for r in ratings if r["id"] != target_id]
+                    if keep["id"] == target_id and not stale:
+                        continue
+                    changed = True
+                    logger.info("Asset %s, user %s: keeping rating %s from %s, removing %s old document(s)",
+                                asset_id, user_id, keep["rating"], keep.get("createdAt"), len(stale))
+                    if args.dry_run:
+                        continue
+                    current = next((r for r in ratings if r["id"] == target_id), None)
+                    if keep["id"] != target_id:
+                        doc = {k: v for k, v in keep.items() if not k.startswith("_")}
+                        doc["id"] = target_id
+                        await main.repo.save_rating(doc, if_match=current["_etag"] if current else None)
+                        rewritten += 1
+                    for r in stale:
+                        await main.repo.delete_rating(asset_id, r["id"])
+                        deleted += 1
+                if changed and not args.dry_run:
+                    await main.recompute_rating_aggregates(asset_id)
+            except Exception as e:
+                failed += 1
+                logger.error("Failed to compact ratings for asset %s: %s", asset_id, e)
+
+    await asyncio.gather(*(compact(asset_id) for asset_id in asset_ids))
+    logger.info("Checked %s assets: %s ratings rewritten, %s documents deleted, %s failed", len(asset_ids), rewritten, deleted, failed)
+    return 1 if failed else 0
+
+
+MIGRATION_PAGE_SIZE = 100
+
+
+def load_migration_state(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return new_migration_state()
+
+
+def new_migration_state() -> dict:
+    return {"continuation": None, "done": False, "failed": [],
+            "stats": {"scanned": 0, "migrated": 0, "imagesUploaded": 0, "urlsConverted": 0, "bytesReclaimed": 0}}
+
+
+def save_migration_state(path: str, state: dict):
+    # Write then rename so an interrupted run never leaves a truncated checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+async def migrate_image_value(asset_id: str, value: str, name: str, dry_run: bool):
+    """(new value, renditions or None, whether a blob was uploaded) for one image field value.
+
+    None if the value is already a bare blob name.
+    """
+    if value.startswith("data:"):
+        image_data = base64.b64decode(value.split(",", 1)[1])
+        content_type, extension = main.sniff_image_type(image_data[:12]) or ("image/png", "png")
+        # A fresh versioned name, like every API write, so a later replace gets a new URL
+        blob_name = main.versioned_blob_name(asset_id, name, extension)
+        renditions = {}
+        if not dry_run:
+            await main.blobs.upload(blob_name, image_data, content_type=content_type)
+            if main.rendition_pipeline:
+                renditions = await main.rendition_pipeline.create(blob_name, image_data)
+        return blob_name, renditions, True
+    if value.startswith("https://"):
+        blob_name = main.blobs.extract_blob_name(value)
+        if blob_name:
+            return blob_name, None, False
+    return None
+
+
+def count_migrated_value(stats: dict, old_value: str, migrated: tuple):
+    blob_name, _, uploaded = migrated
+    stats["imagesUploaded" if uploaded else "urlsConverted"] += 1
+    stats["bytesReclaimed"] += len(old_value) - len(blob_name)
+
+
+async def discard_migrated_value(migrated: tuple):
+    """Delete what was uploaded for a value a concurrent edit replaced; nothing else refers to its versioned name."""
+    blob_name, renditions, uploaded = migrated
+    if not uploaded:
+        return
+    for name in [blob_name] + list((renditions or {}).values()):
+        try:
+            await main.blobs.delete(name)
+        except Exception as e:
+            logger.warning("Failed to delete unused blob %s: %s", name, e)
+
+
+async def migrate_asset_images(asset: dict, stats: dict, dry_run: bool) -> bool:
+    """Move one asset's inline/legacy images to bare blob names. Returns True if it changed."""
+    asset_id = asset["id"]
+    picture = None
+    if asset.get("assetPicture"):
+        picture = await migrate_image_value(asset_id, asset["assetPicture"], "main", dry_run)
+    screenshots = {}
+    for i, value in enumerate(asset.get("screenshots") or []):
+        if value:
+            migrated = await migrate_image_value(asset_id, value, f"screenshot_{i}", dry_run)
+            if migrated:
+                screenshots[i] = migrated
+    if picture is None and not screenshots:
+        return False
+    if dry_run:
+        if picture:
+            count_migrated_value(stats, asset["assetPicture"], picture)
+        for i, migrated in screenshots.items():
+            count_migrated_value(stats, asset["screenshots"][i], migrated)
+        return True
+
+    # Which values the write that finally succeeded replaced; mutate runs again on every retry
+    applied = {}
+
+    async def mutate(doc: dict):
+        applied.clear()
+        # Only replace values that are still what we migrated; a concurrent edit wins
+        if picture and doc.get("assetPicture") == asset["assetPicture"]:
+            doc["assetPicture"] = picture[0]
+            if picture[1] is not None:
+                doc["assetPictureRenditions"] = picture[1]
+            applied["main"] = True
+        current = doc.get("screenshots") or []
+        renditions = doc.get("screenshotRenditions") or []
+        renditions += [{}] * (len(current) - len(renditions))
+        for i, (blob_name, screenshot_renditions, _) in screenshots.items():
+            if i < len(current) and current[i] == asset["screenshots"][i]:
+                current[i] = blob_name
+                if screenshot_renditions is not None:
+                    renditions[i] = screenshot_renditions
+                applied[i] = True
+        if screenshots:
+            doc["screenshotRenditions"] = renditions
+
+    written = await main.modify_asset(asset_id, mutate)
+    if picture:
+        if "main" in applied:
+            count_migrated_value(stats, asset["assetPicture"], picture)
+        else:
+            await discard_migrated_value(picture)
+    for i, migrated in screenshots.items():
+        if i in applied:
+            count_migrated_value(stats, asset["screenshots"][i], migrated)
+        else:
+            await discard_migrated_value(migrated)
+    return bool(applied)
+
+
+async def migrate_images(args):
+    """Move inline base64 images and legacy full blob URLs out of asset documents into bare blob names."""
+    if not main.blobs:
+        logger.error("Blob Storage not configured")
+        return 1
+    state = new_migration_state() if args.restart else load_migration_state(args.state_file)
+    stats = state["stats"]
+    if state["done"] and not state["failed"]:
+        logger.info("Migration already complete (%s); use --restart to scan again", args.state_file)
+        return 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failed = []
+
+    async def migrate(asset: dict):
+        async with semaphore:
+            try:
+                if await migrate_asset_images(asset, stats, args.dry_run):
+                    stats["migrated"] += 1
+            except Exception as e:
+                failed.append(asset["id"])
+                logger.error("Failed to migrate images for asset %s: %s", asset['id'], e)
+
+    # Assets that failed on a previous run go first
+    retry = [await main.repo.get_asset(asset_id) for asset_id in state["failed"]]
+    await asyncio.gather(*(migrate(asset) for asset in retry if asset))
+    state["failed"] = failed
+
+    # The scan resumes from a (createdAt, id) keyset, which rewriting an asset's images doesn't move
+    fields = ["id", "assetPicture", "screenshots"]
+    if state["continuation"]:
+        try:
+            decode_asset_page_token(state["continuation"])
+        except ValueError:
+            logger.warning("Checkpoint %s predates keyset pagination; scanning from the beginning", args.state_file)
+            state["continuation"] = None
+    while not state["done"]:
+        items, continuation = await main.repo.list_assets_page(fields, MIGRATION_PAGE_SIZE, state["continuation"])
+        await asyncio.gather(*(migrate(asset) for asset in items))
+        stats["scanned"] += len(items)
+        state["continuation"] = continuation
+        state["done"] = continuation is None
+        if not args.dry_run:
+            save_migration_state(args.state_file, state)
+        logger.info("Scanned %s assets: %s migrated, %.1f MiB reclaimed",
+                    stats["scanned"], stats["migrated"], stats["bytesReclaimed"] / 1024 / 1024)
+
+    logger.info("%s %s assets: %s inline images uploaded, %s legacy URLs converted, "
+                "%s bytes reclaimed from documents, %s failed",
+                "Would migrate" if args.dry_run else "Migrated", stats["migrated"], stats["imagesUploaded"],
+                stats["urlsConverted"], stats["bytesReclaimed"], len(failed))
+    return 1 if failed else 0
+
+
+async def run(args):
+    await main.init_storage()
+    main.start_renditions()
+    try:
+        if not main.repo:
+            logger.error("Storage not configured")
+            return 1
+        return await args.command(args)
+    finally:
+        main.stop_renditions()
+        await main.close_storage()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="AiFlix maintenance commands")
+    subcommands = parser.add_subparsers(required=True)
+
+    repair = subcommands.add_parser("repair-ratings", help=repair_ratings.__doc__)
+    repair.add_argument("--asset-id", help="only repair this asset")
+    repair.add_argument("--concurrency", type=int, default=8)
+    repair.set_defaults(command=repair_ratings)
+
+    counts = subcommands.add_parser("repair-counts", help=repair_counts.__doc__)
+    counts.add_argument("--asset-id", help="only repair this asset")
+    counts.add_argument("--concurrency", type=int, default=8)
+    counts.set_defaults(command=repair_counts)
+
+    compact = subcommands.add_parser("compact-ratings", help=compact_ratings.__doc__)
+    compact.add_argument("--asset-id", help="only compact this asset")
+    compact.add_argument("--concurrency", type=int, default=8)
+    compact.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    compact.set_defaults(command=compact_ratings)
+
+    migrate = subcommands.add_parser("migrate-images", help=migrate_images.__doc__)
+    migrate.add_argument("--concurrency", type=int, default=8)
+    migrate.add_argument("--state-file", default=".migrate-images.json", help="checkpoint used to resume an interrupted run")
+    migrate.add_argument("--restart", action="store_true", help="ignore the checkpoint and scan from the beginning")
+    migrate.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    migrate.set_defaults(command=migrate_images)
+
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,227 @@
+"""Prometheus metrics, served as text from /metrics.
+
+Counters and histograms are plain dicts keyed by label values. Every update
+happens on the event loop thread, so they need no locks; recording a sample
+is a dict lookup and an add. Values that other components already count
+(token cache hits, SAS signings, ...) are read from them at scrape time
+instead of being counted twice.
+
+Requests are labelled by route template ("/api/assets/{asset_id}"), never the
+raw path, so the number of series stays bounded.
+"""
+import bisect
+import contextvars
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Prometheus client defaults; request latencies are well inside this range
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Sample lines for this metric; header() is rendered separately."""
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(self.values.items())]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]; made cumulative on render
+        self.values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """A counter or gauge whose value is read from elsewhere at scrape time.
+
+    The callback returns a number, a {label values: number} dict, or None
+    when the source isn't configured (the metric is then left out).
+    """
+
+    def __init__(self, name: str, documentation: str, type: str,
+                 callback: Callable[[], Union[None, float, Dict[Labels, float]]], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        values = self.callback()
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(values.items())]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, type: str, callback, labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, type, callback, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            samples = metric.render()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "aiflix_http_requests_total", "HTTP requests served.", ["method", "route", "status"])
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "aiflix_http_request_duration_seconds", "Time to serve an HTTP request, including the response body.",
+    ["method", "route"])
+COSMOS_REQUESTS = REGISTRY.counter(
+    "aiflix_cosmos_requests_total", "Cosmos DB requests made (every page of a query and every retry counts).",
+    ["container", "operation", "handler"])
+COSMOS_REQUEST_CHARGE = REGISTRY.counter(
+    "aiflix_cosmos_request_charge_total", "Cosmos DB request units consumed (x-ms-request-charge).",
+    ["container", "operation", "handler"])
+IMAGEGEN_UPSTREAM_DURATION = REGISTRY.histogram(
+    "aiflix_imagegen_upstream_duration_seconds", "Time taken by image generation calls to Azure OpenAI.",
+    ["status"], buckets=(1, 2.5, 5, 10, 15, 20, 30, 45, 60, 90, 120))
+
+# The ASGI scope of the request being served, for labelling work it causes (e.g. Cosmos requests)
+current_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("current_scope", default=None)
+
+
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def current_handler() -> str:
+    """Name of the endpoint serving the current request, or "background" outside one."""
+    scope = current_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "name", None) or "unmatched"
+
+
+def record_cosmos_charge(container: str, operation: str, charge: float):
+    labels = (container, operation, current_handler())
+    COSMOS_REQUESTS.inc(labels)
+    COSMOS_REQUEST_CHARGE.inc(labels, charge)
+
+
+class MetricsMiddleware:
+    """Counts and times every HTTP request. Plain ASGI, so it adds no per-request task or buffering."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_scope.reset(token)
+            # The router records the matched route on the scope
+            route = route_label(scope)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, (scope["method"], route))
+            HTTP_REQUESTS.inc((scope["method"], route, str(status)))
@@ -0,0 +1,163 @@
+"""In-process background dispatcher for outgoing notifications.
+
+Handlers enqueue a notification and return immediately. A collector task
+groups items that arrive within a short window into one batch (so a burst of
+new assets becomes a single digest), and worker tasks hand each batch to the
+send callable, retrying with exponential backoff. Batches that still fail are
+written to a dead-letter log instead of being silently dropped.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger("aiflix.notifications")
+
+
+class NotificationDispatcher:
+    """Queue + workers that deliver batches of notifications through `send`."""
+
+    def __init__(self, send: Callable[[List[dict]], Awaitable[None]], batch_window: float = 30.0,
+                 max_batch: int = 50, workers: int = 2, max_attempts: int = 5,
+                 backoff_seconds: float = 2.0, max_queue: int = 1000,
+                 dead_letter_path: Optional[str] = None):
+        self.send = send
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.dead_letter_path = dead_letter_path
+        # Workers append whole batches one at a time so lines never interleave
+        self.dead_letter_lock = asyncio.Lock()
+        self.pending: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=max_queue)
+        self.batches: "asyncio.Queue[List[dict]]" = asyncio.Queue()
+        self.tasks: List[asyncio.Task] = []
+        self.flushing = False
+        self.undelivered = 0
+        self.sent = 0
+        self.retries = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.send_latencies_ms = deque(maxlen=100)
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self._collect())]
+        self.tasks += [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush what is already queued (bounded by timeout), then stop the tasks."""
+        if not self.tasks:
+            return
+        # Close the current batching window early rather than waiting it out
+        self.flushing = True
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stopping with %s notifications undelivered", self.queue_depth())
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def _drain(self):
+        await self.pending.join()
+        await self.batches.join()
+
+    def enqueue(self, item: dict) -> bool:
+        """Queue a notification without waiting. Returns False if the queue is full."""
+        try:
+            self.pending.put_nowait(item)
+            self.undelivered += 1
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Notification queue full, dropping notification")
+            return False
+
+    def queue_depth(self) -> int:
+        """Notifications enqueued but not yet sent or dead-lettered."""
+        return self.undelivered
+
+    def stats(self) -> dict:
+        latencies = sorted(self.send_latencies_ms)
+        return {
+            "queueDepth": self.queue_depth(),
+            "sent": self.sent,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "deadLettered": self.dead_lettered,
+            "sendLatencyMs": {
+                "last": round(self.send_latencies_ms[-1], 1) if latencies else None,
+                "p50": round(latencies[len(latencies) // 2], 1) if latencies else None,
+                "max": round(latencies[-1], 1) if latencies else None,
+            },
+        }
+
+    async def _collect(self):
+        """Group items arriving within batch_window of the first one into a single batch."""
+        while True:
+            batch = [await self.pending.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (self.flushing and self.pending.empty()):
+                    break
+                try:
+                    # Wake up at least twice a second so stop() can close the window early
+                    batch.append(await asyncio.wait_for(self.pending.get(), min(remaining, 0.5)))
+                except asyncio.TimeoutError:
+                    continue
+            await self.batches.put(batch)
+            for _ in batch:
+                self.pending.task_done()
+
+    async def _work(self):
+        while True:
+            batch = await self.batches.get()
+            try:
+                await self._deliver(batch)
+            finally:
+                self.undelivered -= len(batch)
+                self.batches.task_done()
+
+    async def _deliver(self, batch: List[dict]):
+        for attempt in range(1, self.max_attempts + 1):
+            start = time.perf_counter()
+            try:
+                await self.send(batch)
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    await self._dead_letter(batch, e)
+                    return
+                self.retries += 1
+                delay = self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                logger.warning("Sending %s notifications failed (attempt %s), retrying in %.1fs: %s", len(batch), attempt, delay, e)
+                await asyncio.sleep(delay)
+                continue
+            self.send_latencies_ms.append((time.perf_counter() - start) * 1000)
+            self.sent += len(batch)
+            return
+
+    async def _dead_letter(self, batch: List[dict], error: Exception):
+        self.dead_lettered += len(batch)
+        logger.error("Giving up on %s notifications after %s attempts: %s", len(batch), self.max_attempts, error)
+        if not self.dead_letter_path:
+            return
+        failed_at = datetime.utcnow().isoformat()
+        text = "".join(json.dumps({"failedAt": failed_at, "error": str(error), "notification": item}) + "\n" for item in batch)
+        try:
+            # File I/O runs in a thread so a slow disk never stalls the event loop
+            async with self.dead_letter_lock:
+                await asyncio.to_thread(self._append, self.dead_letter_path, text)
+        except OSError as e:
+            logger.error("Failed to write dead-letter log %s: %s", self.dead_letter_path, e)
+
+    @staticmethod
+    def _append(path: str, text: str):
+        with open(path, "a") as f:
+            f.write(text)
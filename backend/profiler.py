@@ -0,0 +1,146 @@
+"""Opt-in sampling profiler for the request path.
+
+While enabled, a background thread samples the event loop thread's Python
+stack every `interval` seconds, but only while at least one sampled request
+is in flight. Stacks are aggregated in memory and written to disk in the
+folded format ("outer;inner;leaf count" per line) that flamegraph.pl,
+speedscope and inferno read directly.
+
+All requests share the event loop thread, so a sample taken while a sampled
+request is in flight may land in another request's code. That is the price
+of not instrumenting anything: profile under representative load and read
+the result as "where the loop spends its time around sampled requests".
+Endpoints that run in the threadpool (sync `def`) are not sampled.
+
+Nothing is sampled unless the profiler is enabled, so it costs one attribute
+check per request otherwise.
+"""
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger("aiflix.profiler")
+
+# Distinct stacks kept per run; beyond this new stacks are counted as one bucket
+MAX_STACKS = 50_000
+MAX_DEPTH = 128
+TRUNCATED_STACK = "[other stacks]"
+# Samples taken while the loop waits for I/O, e.g. while a request awaits Cosmos DB
+IDLE_STACK = "[event loop idle]"
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def is_idle(frame) -> bool:
+    """The loop is blocked in its selector waiting for I/O."""
+    return frame.f_code.co_name == "select" and os.path.basename(frame.f_code.co_filename) == "selectors.py"
+
+
+def fold(frame) -> str:
+    """'outermost;...;innermost' for a frame and its callers."""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    def __init__(self, output_dir: str, interval: float = 0.005):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.enabled = False
+        # Percentage of requests to sample while enabled
+        self.sample_percent = 0.0
+        # Sampled requests in flight; the sampler only records while this is non-zero
+        self.active = 0
+        self.requests = 0
+        self.samples = 0
+        self.stacks: Dict[str, int] = collections.Counter()
+        self.started_at: Optional[float] = None
+        self.last_dump: Optional[str] = None
+        self._target_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "samplePercent": self.sample_percent,
+            "intervalMs": self.interval * 1000,
+            "profiledRequests": self.requests,
+            "samples": self.samples,
+            "distinctStacks": len(self.stacks),
+            "runningSeconds": round(time.monotonic() - self.started_at, 1) if self.started_at else None,
+            "lastDump": self.last_dump,
+        }
+
+    def enable(self, sample_percent: float, interval: Optional[float] = None):
+        """Start sampling; call from the event loop thread (its stack is the one sampled)."""
+        self.sample_percent = sample_percent
+        if interval:
+            self.interval = interval
+        if self.enabled:
+            return
+        self._target_thread = threading.get_ident()
+        self.stacks = collections.Counter()
+        self.requests = 0
+        self.samples = 0
+        self.started_at = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        self.enabled = True
+        logger.info("Sampling profiler enabled for %s%% of requests", sample_percent)
+
+    def disable(self) -> Optional[str]:
+        """Stop sampling and write the collected stacks; returns the file written, if any."""
+        if not self.enabled:
+            return None
+        self.enabled = False
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.started_at = None
+        path = self.dump()
+        logger.info("Sampling profiler disabled after %s requests, %s samples: %s", self.requests, self.samples, path)
+        return path
+
+    def begin(self):
+        self.active += 1
+        self.requests += 1
+
+    def end(self):
+        self.active -= 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.active:
+                continue
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+            stack = IDLE_STACK if is_idle(frame) else fold(frame)
+            if stack not in self.stacks and len(self.stacks) >= MAX_STACKS:
+                stack = TRUNCATED_STACK
+            self.stacks[stack] += 1
+            self.samples += 1
+
+    def dump(self) -> Optional[str]:
+        """Write the stacks collected so far as a folded-stacks file; None if there are none."""
+        if not self.stacks:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded")
+        with open(path, "w") as f:
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+        self.last_dump = path
+        return path
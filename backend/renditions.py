@@ -0,0 +1,100 @@
+"""WebP renditions of uploaded asset images.
+
+Every uploaded image is stored as sent and also re-encoded as a few WebP
+renditions sized for where the frontend shows it. Each rendition is stored
+next to the original as '{stem}.{rendition}.webp':
+
+  card  - home page row cards (280px tall, 2x for high-DPI screens)
+  hero  - the asset detail header image
+  full  - screenshots / lightbox, capped so huge uploads don't ship as-is
+
+Decoding and encoding is CPU-bound, so it runs in a process pool and never
+on the event loop. Workers are spawned rather than forked: the app already
+runs threads (the log writer, Azure SDK pools) by the time the pool starts,
+and a fork taken while one of them holds a lock deadlocks the child.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Union
+
+from PIL import Image, ImageOps
+
+from storage import BlobStore
+
+logger = logging.getLogger("aiflix.renditions")
+
+# Rendition name -> bounding box; images are scaled down to fit, never up
+RENDITION_SIZES = {
+    "card": (560, 560),
+    "hero": (1200, 1200),
+    "full": (2048, 2048),
+}
+WEBP_QUALITY = 80
+
+# Refuse to decode anything larger than this many pixels (decompression bombs)
+Image.MAX_IMAGE_PIXELS = 64_000_000
+
+
+def rendition_blob_name(blob_name: str, rendition: str) -> str:
+    """'{asset_id}/main.png' -> '{asset_id}/main.card.webp'."""
+    stem, _ = os.path.splitext(blob_name)
+    return f"{stem}.{rendition}.webp"
+
+
+def render(data: Union[bytes, str]) -> Dict[str, bytes]:
+    """Encode every rendition of an image given as bytes or a file path. Runs in a worker process."""
+    with Image.open(io.BytesIO(data) if isinstance(data, bytes) else data) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+    renditions = {}
+    for name, size in RENDITION_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        out = io.BytesIO()
+        resized.save(out, format="WEBP", quality=WEBP_QUALITY, method=4)
+        renditions[name] = out.getvalue()
+    return renditions
+
+
+class RenditionPipeline:
+    """Renders renditions in a process pool and uploads them next to the original blob."""
+
+    def __init__(self, blobs: BlobStore, workers: Optional[int] = None):
+        self.blobs = blobs
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.rendered = 0
+        self.failed = 0
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {"rendered": self.rendered, "failed": self.failed}
+
+    async def create(self, blob_name: str, data: Union[bytes, str]) -> Dict[str, str]:
+        """Render and upload every rendition of blob_name; returns rendition name -> blob name.
+
+        `data` is the image itself or the path of a file holding it; pass a path
+        for large uploads so the image is only ever loaded by the worker process.
+
+        Returns {} if the image cannot be rendered, in which case clients keep
+        using the original.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            encoded = await loop.run_in_executor(self.executor, render, data)
+            names = {name: rendition_blob_name(blob_name, name) for name in encoded}
+            await asyncio.gather(*(
+                self.blobs.upload(names[name], body, content_type="image/webp")
+                for name, body in encoded.items()
+            ))
+        except Exception as e:
+            self.failed += 1
+            logger.warning("Failed to create renditions for %s: %s", blob_name, e)
+            return {}
+        self.rendered += 1
+        return names
@@ -0,0 +1,268 @@
+"""In-process full-text index over the asset catalog.
+
+An inverted index over assetName, tags, primaryCustomerScenario and
+assetDescription, ranked with BM25F (BM25 with per-field weights and length
+normalization). The last query term also matches as a prefix, so results
+update as the user types. Each hit carries snippets with the offsets of the
+matched words so the client can highlight them.
+
+The index is updated per asset as assets are written; it is never rebuilt
+for a query.
+"""
+import bisect
+import heapq
+import math
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Indexed field -> weight; a match in the name counts for more than one in the description
+FIELD_WEIGHTS = {
+    "assetName": 3.0,
+    "tags": 2.0,
+    "primaryCustomerScenario": 1.5,
+    "assetDescription": 1.0,
+}
+FIELDS = list(FIELD_WEIGHTS)
+# Fields snippets are returned for
+SNIPPET_FIELDS = ["assetName", "assetDescription"]
+SNIPPET_CHARS = 160
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# A one-letter prefix matches too much of the vocabulary to be useful
+MIN_PREFIX_CHARS = 2
+MAX_PREFIX_EXPANSIONS = 64
+
+# Per-document scores are cached for terms in at least this many assets;
+# scoring a rare term from its postings is cheaper than keeping the cache
+SCORE_CACHE_MIN_DOCS = 256
+# Cached scores are dropped once the asset count or average field lengths
+# move this far from the values they were computed with
+SCORE_CACHE_DRIFT = 0.02
+# Merged scores of recently typed prefixes; typeahead sends the same few over and over
+PREFIX_CACHE_SIZE = 256
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def field_text(asset: dict, field: str) -> str:
+    value = asset.get(field)
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return value or ""
+
+
+class SearchIndex:
+    def __init__(self):
+        # term -> asset id -> term frequency per field (in FIELDS order)
+        self.postings: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+        # Sorted vocabulary for prefix lookups
+        self.terms: List[str] = []
+        # asset id -> field lengths in tokens
+        self.lengths: Dict[str, Tuple[int, ...]] = {}
+        self.total_lengths = [0] * len(FIELDS)
+        # asset id -> indexed text (for snippets) and the caller's payload
+        self.texts: Dict[str, Dict[str, str]] = {}
+        self.payloads: Dict[str, dict] = {}
+        # term -> asset id -> BM25F score, for common terms (see SCORE_CACHE_MIN_DOCS)
+        self.score_cache: Dict[str, Dict[str, float]] = {}
+        self.prefix_cache: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._score_stats: Optional[Tuple[int, List[float]]] = None
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    # --- Updates ---
+
+    def add(self, asset: dict, payload: Optional[dict] = None):
+        """Index or re-index an asset. `payload` is returned with its hits."""
+        asset_id = asset["id"]
+        texts = {field: field_text(asset, field) for field in FIELDS}
+        self.payloads[asset_id] = payload if payload is not None else {"id": asset_id}
+        if self.texts.get(asset_id) == texts:
+            return  # Only non-indexed fields changed (e.g. ratings)
+        self.remove(asset_id, keep_payload=True)
+        self.prefix_cache.clear()
+
+        frequencies: Dict[str, List[int]] = {}
+        lengths = []
+        for i, field in enumerate(FIELDS):
+            tokens = tokenize(texts[field])
+            lengths.append(len(tokens))
+            for token in tokens:
+                frequencies.setdefault(token, [0] * len(FIELDS))[i] += 1
+        for term, tf in frequencies.items():
+            self.score_cache.pop(term, None)
+            docs = self.postings.get(term)
+            if docs is None:
+                docs = self.postings[term] = {}
+                bisect.insort(self.terms, term)
+            docs[asset_id] = tuple(tf)
+        self.lengths[asset_id] = tuple(lengths)
+        self.total_lengths = [total + n for total, n in zip(self.total_lengths, lengths)]
+        self.texts[asset_id] = texts
+
+    def remove(self, asset_id: str, keep_payload: bool = False):
+        texts = self.texts.pop(asset_id, None)
+        if not keep_payload:
+            self.payloads.pop(asset_id, None)
+        if texts is None:
+            return
+        self.prefix_cache.clear()
+        for term in {token for field in FIELDS for token in tokenize(texts[field])}:
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            docs.pop(asset_id, None)
+            self.score_cache.pop(term, None)
+            if not docs:
+                del self.postings[term]
+                del self.terms[bisect.bisect_left(self.terms, term)]
+        lengths = self.lengths.pop(asset_id)
+        self.total_lengths = [total - n for total, n in zip(self.total_lengths, lengths)]
+
+    # --- Queries ---
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> Tuple[List[dict], int]:
+        """Assets matching every query term, best first, and the total number of matches.
+
+        With `prefix`, the last term also matches longer words it starts
+        (unless the query ends in whitespace, i.e. the user finished the word).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.lengths:
+            return [], 0
+        last_is_prefix = prefix and not query[-1:].isspace() and len(terms[-1]) >= MIN_PREFIX_CHARS
+
+        # Each query term becomes the set of index terms it matches
+        groups = [[term] if term in self.postings else [] for term in terms]
+        if last_is_prefix:
+            groups[-1] = self.expand_prefix(terms[-1])
+        if not all(groups):
+            return [], 0
+
+        stats = self._stats()
+        group_scores = [self._term_scores(group[0], stats) for group in groups[:-1]]
+        group_scores.append(self._prefix_scores(terms[-1], groups[-1], stats) if last_is_prefix
+                            else self._term_scores(groups[-1][0], stats))
+
+        # Intersect starting from the rarest term so the candidate set stays small
+        group_scores.sort(key=len)
+        scores = group_scores[0]
+        for term_scores in group_scores[1:]:
+            scores = {asset_id: score + term_scores[asset_id] for asset_id, score in scores.items() if asset_id in term_scores}
+            if not scores:
+                return [], 0
+
+        top = [(asset_id, scores[asset_id]) for asset_id in heapq.nlargest(limit, scores, key=scores.__getitem__)]
+        matched = {term for group in groups for term in group}
+        hits = [{
+            "score": round(score, 4),
+            "asset": self.payloads[asset_id],
+            "highlights": self.snippets(asset_id, matched),
+        } for asset_id, score in top]
+        return hits, len(scores)
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Index terms starting with prefix; the most widely used ones if there are too many."""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\uffff", lo=start)
+        matches = self.terms[start:end]
+        if len(matches) > MAX_PREFIX_EXPANSIONS:
+            matches = heapq.nlargest(MAX_PREFIX_EXPANSIONS, matches, key=lambda t: len(self.postings[t]))
+        return matches
+
+    def _prefix_scores(self, prefix: str, completions: List[str], stats: Tuple[int, List[float]]) -> Dict[str, float]:
+        """Scores for a typeahead prefix: each asset scores as its best-matching completion."""
+        if len(completions) == 1:
+            return self._term_scores(completions[0], stats)
+        scores = self.prefix_cache.get(prefix)
+        if scores is not None:
+            self.prefix_cache.move_to_end(prefix)
+            return scores
+        scores = {}
+        for term in completions:
+            for asset_id, score in self._term_scores(term, stats).items():
+                if score > scores.get(asset_id, 0.0):
+                    scores[asset_id] = score
+        self.prefix_cache[prefix] = scores
+        if len(self.prefix_cache) > PREFIX_CACHE_SIZE:
+            self.prefix_cache.popitem(last=False)
+        return scores
+
+    def _stats(self) -> Tuple[int, List[float]]:
+        """Asset count and average field lengths used for scoring.
+
+        Kept fixed until the real values drift by SCORE_CACHE_DRIFT, so cached
+        scores stay comparable with freshly computed ones.
+        """
+        count = len(self.lengths)
+        averages = [total / count or 1.0 for total in self.total_lengths]
+        if self._score_stats is not None:
+            cached_count, cached_averages = self._score_stats
+            if abs(count - cached_count) <= SCORE_CACHE_DRIFT * cached_count and all(
+                    abs(a - c) <= SCORE_CACHE_DRIFT * c for a, c in zip(averages, cached_averages)):
+                return self._score_stats
+        self.score_cache.clear()
+        self.prefix_cache.clear()
+        self._score_stats = (count, averages)
+        return self._score_stats
+
+    def _term_scores(self, term: str, stats: Tuple[int, List[float]]) -> Dict[str, float]:
+        scores = self.score_cache.get(term)
+        if scores is not None:
+            return scores
+        count, averages = stats
+        docs = self.postings[term]
+        idf = math.log(1 + (max(count - len(docs), 0) + 0.5) / (len(docs) + 0.5))
+        scores = {}
+        for asset_id, tf in docs.items():
+            weighted = self._weighted_tf(tf, self.lengths[asset_id], averages)
+            scores[asset_id] = idf * weighted * (K1 + 1) / (weighted + K1)
+        if len(docs) >= SCORE_CACHE_MIN_DOCS:
+            self.score_cache[term] = scores
+        return scores
+
+    @staticmethod
+    def _weighted_tf(tf: Tuple[int, ...], lengths: Tuple[int, ...], averages: List[float]) -> float:
+        total = 0.0
+        for i, weight in enumerate(FIELD_WEIGHTS.values()):
+            if tf[i]:
+                total += weight * tf[i] / (1 - B + B * lengths[i] / averages[i])
+        return total
+
+    def snippets(self, asset_id: str, terms: Iterable[str]) -> Dict[str, dict]:
+        """Per field: a window of text around the first match and [start, end) offsets of matched words in it."""
+        terms = set(terms)
+        result = {}
+        for field in SNIPPET_FIELDS:
+            text = self.texts[asset_id][field]
+            spans = [m.span() for m in TOKEN_PATTERN.finditer(text) if m.group().lower() in terms]
+            if not spans:
+                continue
+            start = 0
+            if len(text) > SNIPPET_CHARS:
+                # Start a little before the first match, at a word boundary
+                start = max(0, spans[0][0] - SNIPPET_CHARS // 4)
+                if start:
+                    space = text.rfind(" ", 0, start)
+                    start = space + 1 if space >= 0 else start
+            end = min(len(text), start + SNIPPET_CHARS)
+            snippet = text[start:end]
+            offset = 0
+            if start:
+                snippet, offset = "…" + snippet, 1
+            if end < len(text):
+                snippet += "…"
+            result[field] = {
+                "text": snippet,
+                "matches": [[s - start + offset, e - start + offset] for s, e in spans if s >= start and e <= end],
+            }
+        return result
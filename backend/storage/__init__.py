@@ -0,0 +1,21 @@
+"""Pluggable storage backends: Azure (Cosmos DB + Blob Storage) or local (in-memory + directory)."""
+from .base import (AssetRepository, BlobStore, PreconditionFailedError, StorageError, decode_asset_page_token,
+                   encode_asset_page_token, rating_id)
+from .cosmos import AzureBlobStore, CosmosRepository
+from .local import InMemoryRepository, LocalBlobStore
+from .replica import AssetCatalogReplica
+
+__all__ = [
+    "AssetRepository",
+    "BlobStore",
+    "StorageError",
+    "PreconditionFailedError",
+    "CosmosRepository",
+    "AzureBlobStore",
+    "InMemoryRepository",
+    "LocalBlobStore",
+    "AssetCatalogReplica",
+    "rating_id",
+    "encode_asset_page_token",
+    "decode_asset_page_token",
+]
@@ -0,0 +1,265 @@
+"""Storage interfaces used by the API handlers.
+
+Handlers only talk to an AssetRepository (documents) and a BlobStore (images),
+so the app can run against Azure (Cosmos DB + Blob Storage) or fully in-process.
+"""
+import asyncio
+import base64
+import json
+import uuid
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+# Namespace for rating ids derived from (asset id, user id)
+RATING_ID_NAMESPACE = uuid.UUID("5b1c2a9e-6f4d-4c1e-9a43-2f0e8d7b6c15")
+
+
+def encode_asset_page_token(last: dict) -> str:
+    """Opaque token resuming a newest-first asset listing after `last` (keyset on createdAt, id)."""
+    key = json.dumps([last.get("createdAt") or "", last["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_asset_page_token(token: str) -> Tuple[str, str]:
+    """(createdAt, id) of the last asset of the previous page; ValueError for a malformed token."""
+    try:
+        created_at, asset_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid continuation token: {token}") from e
+    if not isinstance(created_at, str) or not isinstance(asset_id, str):
+        raise ValueError(f"Invalid continuation token: {token}")
+    return created_at, asset_id
+
+
+def rating_id(asset_id: str, user_id: str) -> str:
+    """The id of a user's rating of an asset: one document per (asset, user), addressable by point read."""
+    return str(uuid.uuid5(RATING_ID_NAMESPACE, f"{asset_id}/{user_id}"))
+
+
+class StorageError(Exception):
+    """Raised when the storage backend fails a request."""
+
+
+class PreconditionFailedError(StorageError):
+    """Raised when a conditional write loses to a concurrent change (ETag mismatch)."""
+
+
+class AssetRepository(ABC):
+    """Document storage for assets, ratings, comments and improvements."""
+
+    async def open(self):
+        """Connect to the backend. Called once on app startup."""
+
+    async def close(self):
+        """Release connections. Called once on app shutdown."""
+
+    @abstractmethod
+    async def ping(self):
+        """Raise if the backend is unreachable."""
+
+    # --- Assets ---
+
+    @abstractmethod
+    async def list_assets(self) -> List[dict]:
+        """All assets, newest first."""
+
+    @abstractmethod
+    async def list_assets_page(self, fields: List[str], limit: int, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """One page of assets, newest first (ties broken by id), projected to `fields`.
+
+        Returns (items, continuation token for the next page or None). Tokens
+        are keysets from encode_asset_page_token, so a page resumes exactly
+        after the last item returned even when assets are added or deleted in
+        between. Raises ValueError for a malformed token.
+        `fields` must already be validated; backends may interpolate them into queries.
+        """
+
+    @abstractmethod
+    async def list_asset_ids(self) -> List[str]:
+        """Ids of every asset (cheap; used to reconcile deletes)."""
+
+    @abstractmethod
+    async def read_asset_changes(self, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Assets created or updated since `continuation`, oldest change first, and the next continuation.
+
+        With no continuation, returns no changes and a continuation starting now.
+        Deletes are not reported (Cosmos DB latest-version change feed semantics).
+        """
+
+    @abstractmethod
+    async def assets_version(self) -> Tuple[Optional[int], int]:
+        """(max _ts, document count) of the assets container: changes whenever any asset does."""
+
+    @abstractmethod
+    async def get_asset(self, asset_id: str) -> Optional[dict]:
+        """A single asset, or None if it does not exist."""
+
+    @abstractmethod
+    async def create_asset(self, doc: dict) -> dict:
+        ...
+
+    @abstractmethod
+    async def replace_asset(self, doc: dict, if_match: Optional[str] = None) -> dict:
+        """Replace an asset. With if_match, raise PreconditionFailedError unless its _etag still matches."""
+
+    @abstractmethod
+    async def delete_asset(self, asset: dict):
+        ...
+
+    # --- Ratings ---
+
+    @abstractmethod
+    async def get_rating_stats(self, asset_id: str) -> Tuple[Optional[float], int]:
+        """(average rating, rating count) for an asset."""
+
+    @abstractmethod
+    async def list_ratings(self, asset_id: str) -> List[dict]:
+        """All ratings for an asset, newest first."""
+
+    @abstractmethod
+    async def get_user_rating(self, asset_id: str, user_id: str) -> Optional[dict]:
+        """A user's rating of an asset, or None.
+
+        Normally a point read of rating_id(asset_id, user_id). Backends may
+        fall back to finding a rating stored under an older random id (see
+        `python manage.py compact-ratings`).
+        """
+
+    async def get_user_ratings(self, asset_ids: List[str], user_id: str, concurrency: int = 8) -> Dict[str, dict]:
+        """A user's ratings of several assets, keyed by asset id (unrated assets are left out).
+
+        One single-partition lookup per asset, at most `concurrency` at a time.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def lookup(asset_id: str) -> Optional[dict]:
+            async with semaphore:
+                return await self.get_user_rating(asset_id, user_id)
+
+        ratings = await asyncio.gather(*(lookup(asset_id) for asset_id in asset_ids))
+        return {asset_id: rating for asset_id, rating in zip(asset_ids, ratings) if rating}
+
+    @abstractmethod
+    async def save_rating(self, doc: dict, if_match: Optional[str] = None) -> dict:
+        """Write a rating in a single request.
+
+        With if_match, overwrite the stored rating only if its _etag still
+        matches; without, create it only if no rating has that id yet. Raises
+        PreconditionFailedError when a concurrent write got there first.
+        """
+
+    @abstractmethod
+    async def delete_rating(self, asset_id: str, rating_id: str):
+        ...
+
+    @abstractmethod
+    async def delete_ratings(self, asset_id: str) -> int:
+        """Delete every rating for an asset; returns how many were deleted."""
+
+    # --- Comments ---
+
+    @abstractmethod
+    async def list_comments(self, asset_id: str) -> List[dict]:
+        """All comments for an asset, newest first."""
+
+    @abstractmethod
+    async def list_comments_page(self, asset_id: str, limit: int, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """One page of an asset's comments, newest first, and the continuation token for the next page or None.
+
+        Raises ValueError for a continuation token the backend cannot parse.
+        """
+
+    @abstractmethod
+    async def comments_version(self, asset_id: str) -> Tuple[Optional[int], int]:
+        """(max _ts, count) of an asset's comments."""
+
+    @abstractmethod
+    async def get_comment(self, asset_id: str, comment_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def create_comment(self, doc: dict) -> dict:
+        ...
+
+    @abstractmethod
+    async def delete_comment(self, asset_id: str, comment_id: str):
+        ...
+
+    @abstractmethod
+    async def delete_comments(self, asset_id: str) -> int:
+        """Delete every comment for an asset; returns how many were deleted."""
+
+    # --- Improvements ---
+
+    @abstractmethod
+    async def list_improvements(self, asset_id: str) -> List[dict]:
+        """All improvements for an asset, newest first."""
+
+    @abstractmethod
+    async def list_improvements_page(self, asset_id: str, limit: int, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """One page of an asset's improvements, newest first (see list_comments_page)."""
+
+    @abstractmethod
+    async def improvements_version(self, asset_id: str) -> Tuple[Optional[int], int]:
+        """(max _ts, count) of an asset's improvements."""
+
+    @abstractmethod
+    async def create_improvement(self, doc: dict) -> dict:
+        ...
+
+    @abstractmethod
+    async def delete_improvements(self, asset_id: str) -> int:
+        """Delete every improvement for an asset; returns how many were deleted."""
+
+
+class BlobStore(ABC):
+    """Binary storage for asset images, addressed by blob name (e.g. '{asset_id}/main.png')."""
+
+    # Bytes written through upload() and upload_stream() since startup
+    bytes_uploaded = 0
+
+    async def open(self):
+        """Connect to the backend. Called once on app startup."""
+
+    async def close(self):
+        """Release connections. Called once on app shutdown."""
+
+    @abstractmethod
+    async def ping(self):
+        """Raise if the backend is unreachable."""
+
+    @abstractmethod
+    async def upload(self, blob_name: str, data: bytes, content_type: str) -> str:
+        """Store bytes under blob_name and return the blob name."""
+
+    @abstractmethod
+    async def upload_stream(self, blob_name: str, chunks: AsyncIterator[bytes], content_type: str) -> str:
+        """Store a stream of chunks under blob_name without buffering the whole blob; returns the blob name.
+
+        The blob only becomes visible once every chunk was written, so an
+        iterator that raises part-way leaves any previous blob in place.
+        """
+
+    @abstractmethod
+    async def download(self, blob_name: str) -> Optional[bytes]:
+        """The blob's bytes, or None if it does not exist."""
+
+    @abstractmethod
+    async def delete(self, blob_name: str):
+        ...
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every blob whose name starts with prefix; returns how many were deleted."""
+
+    @abstractmethod
+    def url_for(self, blob_name: str) -> str:
+        """A URL the browser can load the blob from."""
+
+    def url_epoch(self) -> int:
+        """Changes whenever previously returned URLs may stop working (e.g. SAS expiry)."""
+        return 0
+
+    def extract_blob_name(self, url: str) -> Optional[str]:
+        """Blob name from a legacy full URL owned by this store, or None."""
+        return None
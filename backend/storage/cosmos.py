@@ -0,0 +1,624 @@
+"""Azure implementation: Cosmos DB (async SDK) for documents, Blob Storage for images."""
+import asyncio
+import base64
+import contextvars
+import functools
+import logging
+import re
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError
+from azure.cosmos import PartitionKey, exceptions
+from azure.cosmos.aio import CosmosClient
+from azure.storage.blob import BlobBlock, ContentSettings, generate_blob_sas, BlobSasPermissions
+from azure.storage.blob.aio import BlobServiceClient
+
+from .base import (AssetRepository, BlobStore, PreconditionFailedError, StorageError, decode_asset_page_token,
+                   encode_asset_page_token, rating_id)
+
+# Service limits: operations per Cosmos DB transactional batch, sub-requests per Blob batch
+BATCH_MAX_OPERATIONS = 100
+BLOB_BATCH_MAX_SUBREQUESTS = 256
+# Transactional batches in flight at once while cascading a delete through one child container
+DELETE_BATCH_CONCURRENCY = 4
+
+logger = logging.getLogger("aiflix.storage")
+
+# Keyset pagination of the asset listing orders by (createdAt, id), which needs a composite index
+ASSET_PAGE_COMPOSITE_INDEX = [{"path": "/createdAt", "order": "descending"}, {"path": "/id", "order": "descending"}]
+
+# Repository method making the current Cosmos DB requests, for request charge accounting
+_operation: contextvars.ContextVar[str] = contextvars.ContextVar("cosmos_operation", default="other")
+_CONTAINER_PATTERN = re.compile(r"/colls/([^/?]+)")
+
+
+def _cosmos_errors(func):
+    """Translate Cosmos DB HTTP errors into StorageError."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _operation.set(func.__name__)
+        try:
+            return await func(*args, **kwargs)
+        except exceptions.CosmosAccessConditionFailedError as e:
+            raise PreconditionFailedError(str(e)) from e
+        except exceptions.CosmosHttpResponseError as e:
+            raise StorageError(str(e)) from e
+        finally:
+            _operation.reset(token)
+    return wrapper
+
+
+class CosmosRepository(AssetRepository):
+    def __init__(self, endpoint: str, database_name: str, container_name: str, credential, connection_limit: int = 100,
+                 legacy_rating_lookup: bool = True,
+                 on_request_charge: Optional[Callable[[str, str, float], None]] = None):
+        self.endpoint = endpoint
+        self.database_name = database_name
+        self.container_name = container_name
+        self.credential = credential
+        self.connection_limit = connection_limit
+        # Fall back to a query when a user's rating isn't at its derived id; can be
+        # turned off once `python manage.py compact-ratings` has rewritten old ratings
+        self.legacy_rating_lookup = legacy_rating_lookup
+        # Called with (container, repository method, request units) for every Cosmos DB response
+        self.on_request_charge = on_request_charge
+        self.client = None
+        self.database = None
+        self.container = None
+        self.ratings_container = None
+        self.comments_container = None
+        self.improvements_container = None
+        # Asset id -> partition key (/createdBy), so asset lookups can be 1 RU point
+        # reads instead of cross-partition id queries. Warmed in open(), kept current
+        # by the write paths and filled from a fallback query on a miss.
+        self.asset_partition_keys: Dict[str, str] = {}
+        self.partition_key_hits = 0
+        self.partition_key_misses = 0
+
+    async def open(self):
+        # One shared aiohttp connection pool for every container, so a single
+        # worker can keep many Cosmos DB requests in flight at once
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connection_limit))
+        hooks = {"raw_response_hook": self._record_request_charge} if self.on_request_charge else {}
+        self.client = CosmosClient(self.endpoint, credential=self.credential, transport=AioHttpTransport(session=session), **hooks)
+        self.database = await self.client.create_database_if_not_exists(id=self.database_name)
+        # Note: No offer_throughput for serverless Cosmos DB accounts
+        self.container = await self.database.create_container_if_not_exists(
+            id=self.container_name,
+            partition_key=PartitionKey(path="/createdBy"),
+            indexing_policy={"compositeIndexes": [ASSET_PAGE_COMPOSITE_INDEX]}
+        )
+        try:
+            await self.ensure_asset_page_index()
+        except exceptions.CosmosHttpResponseError as e:
+            logger.warning("Failed to add the asset listing composite index, paged listing will fail until it exists: %s", e)
+        # Ratings container - partitioned by assetId
+        self.ratings_container = await self.database.create_container_if_not_exists(
+            id="ratings",
+            partition_key=PartitionKey(path="/assetId")
+        )
+        # Comments container - partitioned by assetId
+        self.comments_container = await self.database.create_container_if_not_exists(
+            id="comments",
+            partition_key=PartitionKey(path="/assetId")
+        )
+        # Improvements container - partitioned by assetId
+        self.improvements_container = await self.database.create_container_if_not_exists(
+            id="improvements",
+            partition_key=PartitionKey(path="/assetId")
+        )
+        logger.info("Connected to Cosmos DB (managed identity): %s/%s", self.database_name, self.container_name)
+        try:
+            await self.warm_partition_keys()
+        except exceptions.CosmosHttpResponseError as e:
+            logger.warning("Failed to warm asset partition key map, falling back to queries: %s", e)
+
+    async def ensure_asset_page_index(self):
+        """Add the (createdAt, id) composite index to an assets container created before it was needed."""
+        properties = await self.container.read()
+        policy = properties.get("indexingPolicy") or {}
+        if ASSET_PAGE_COMPOSITE_INDEX in policy.get("compositeIndexes", []):
+            return
+        policy["compositeIndexes"] = policy.get("compositeIndexes", []) + [ASSET_PAGE_COMPOSITE_INDEX]
+        self.container = await self.database.replace_container(
+            self.container, partition_key=PartitionKey(path="/createdBy"), indexing_policy=policy
+        )
+        logger.info("Added the asset listing composite index to %s", self.container_name)
+
+    def _record_request_charge(self, response):
+        """Client-wide response hook: sees every request, including each page of a query and each retry."""
+        charge = response.http_response.headers.get("x-ms-request-charge")
+        if charge is None:
+            return
+        match = _CONTAINER_PATTERN.search(response.http_request.url)
+        try:
+            self.on_request_charge(match.group(1) if match else "account", _operation.get(), float(charge))
+        except Exception as e:
+            logger.warning("Failed to record Cosmos DB request charge: %s", e)
+
+    async def warm_partition_keys(self):
+        """Load the id -> partition key map for every asset (ids and keys only)."""
+        query = "SELECT c.id, c.createdBy FROM c"
+        self.asset_partition_keys = {
+            item["id"]: item["createdBy"] async for item in self.container.query_items(query=query)
+        }
+        logger.info("Warmed asset partition key map: %s assets", len(self.asset_partition_keys))
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    @_cosmos_errors
+    async def ping(self):
+        [item async for item in self.container.query_items(query="SELECT VALUE COUNT(1) FROM c", max_item_count=1)]
+
+    # --- Assets ---
+
+    @_cosmos_errors
+    async def list_assets(self) -> List[dict]:
+        query = "SELECT * FROM c ORDER BY c.createdAt DESC"
+        return [item async for item in self.container.query_items(query=query)]
+
+    @_cosmos_errors
+    async def list_assets_page(self, fields: List[str], limit: int, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        # Keyset pagination rather than the SDK's continuation: resuming a
+        # cross-partition ORDER BY query from its continuation token is not
+        # reliable, and a keyset also stays exact while assets are added
+        keys = [field for field in ("createdAt", "id") if field not in fields]
+        projection = ", ".join(f"c.{field}" for field in list(fields) + keys)
+        where, parameters = "", [{"name": "@limit", "value": limit + 1}]
+        if continuation:
+            created_at, last_id = decode_asset_page_token(continuation)
+            where = "WHERE c.createdAt < @createdAt OR (c.createdAt = @createdAt AND c.id < @id) "
+            parameters += [{"name": "@createdAt", "value": created_at}, {"name": "@id", "value": last_id}]
+        query = f"SELECT TOP @limit {projection} FROM c {where}ORDER BY c.createdAt DESC, c.id DESC"
+        items = [item async for item in self.container.query_items(query=query, parameters=parameters, max_item_count=limit + 1)]
+        # One extra item tells whether there is a next page
+        token = encode_asset_page_token(items[limit - 1]) if len(items) > limit else None
+        items = items[:limit]
+        for item in items:
+            for key in keys:
+                item.pop(key, None)
+        return items, token
+
+    @_cosmos_errors
+    async def list_asset_ids(self) -> List[str]:
+        return [asset_id async for asset_id in self.container.query_items(query="SELECT VALUE c.id FROM c")]
+
+    @_cosmos_errors
+    async def read_asset_changes(self, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        # The next continuation comes back in the etag header of each change feed response
+        headers = {}
+        kwargs = {"continuation": continuation} if continuation else {"start_time": "Now"}
+        changes = self.container.query_items_change_feed(
+            response_hook=lambda response_headers, _: headers.update(response_headers), **kwargs
+        )
+        items = [item async for item in changes]
+        for item in items:
+            self.asset_partition_keys[item["id"]] = item["createdBy"]
+        return items, headers.get("etag", continuation)
+
+    @_cosmos_errors
+    async def assets_version(self) -> Tuple[Optional[int], int]:
+        return await self._version(self.container)
+
+    @_cosmos_errors
+    async def get_asset(self, asset_id: str) -> Optional[dict]:
+        partition_key = self.asset_partition_keys.get(asset_id)
+        if partition_key is not None:
+            try:
+                asset = await self.container.read_item(item=asset_id, partition_key=partition_key)
+                self.partition_key_hits += 1
+                return asset
+            except exceptions.CosmosResourceNotFoundError:
+                # Deleted elsewhere (or stale entry) — forget it and confirm with a query
+                self.asset_partition_keys.pop(asset_id, None)
+
+        self.partition_key_misses += 1
+        query = "SELECT * FROM c WHERE c.id = @id"
+        params = [{"name": "@id", "value": asset_id}]
+        items = [item async for item in self.container.query_items(query=query, parameters=params)]
+        if not items:
+            return None
+        self.asset_partition_keys[asset_id] = items[0]["createdBy"]
+        return items[0]
+
+    @_cosmos_errors
+    async def create_asset(self, doc: dict) -> dict:
+        result = await self.container.create_item(body=doc)
+        self.asset_partition_keys[result["id"]] = result["createdBy"]
+        return result
+
+    @_cosmos_errors
+    async def replace_asset(self, doc: dict, if_match: Optional[str] = None) -> dict:
+        if if_match:
+            result = await self.container.replace_item(
+                item=doc["id"], body=doc, etag=if_match, match_condition=MatchConditions.IfNotModified
+            )
+        else:
+            result = await self.container.replace_item(item=doc["id"], body=doc)
+        self.asset_partition_keys[result["id"]] = result["createdBy"]
+        return result
+
+    @_cosmos_errors
+    async def delete_asset(self, asset: dict):
+        await self.container.delete_item(item=asset["id"], partition_key=asset["createdBy"])
+        self.asset_partition_keys.pop(asset["id"], None)
+
+    # --- Ratings ---
+
+    @_cosmos_errors
+    async def get_rating_stats(self, asset_id: str) -> Tuple[Optional[float], int]:
+        params = [{"name": "@assetId", "value": asset_id}]
+        avg_query = "SELECT VALUE AVG(c.rating) FROM c WHERE c.assetId = @assetId"
+        avg_ratings = [item async for item in self.ratings_container.query_items(query=avg_query, parameters=params, partition_key=asset_id)]
+        count_query = "SELECT VALUE COUNT(1) FROM c WHERE c.assetId = @assetId"
+        count_result = [item async for item in self.ratings_container.query_items(query=count_query, parameters=params, partition_key=asset_id)]
+        average = avg_ratings[0] if avg_ratings and avg_ratings[0] else None
+        return average, count_result[0] if count_result else 0
+
+    @_cosmos_errors
+    async def list_ratings(self, asset_id: str) -> List[dict]:
+        query = "SELECT * FROM c WHERE c.assetId = @assetId ORDER BY c.createdAt DESC"
+        params = [{"name": "@assetId", "value": asset_id}]
+        return [item async for item in self.ratings_container.query_items(query=query, parameters=params, partition_key=asset_id)]
+
+    @_cosmos_errors
+    async def get_user_rating(self, asset_id: str, user_id: str) -> Optional[dict]:
+        try:
+            return await self.ratings_container.read_item(item=rating_id(asset_id, user_id), partition_key=asset_id)
+        except exceptions.CosmosResourceNotFoundError:
+            pass
+        if not self.legacy_rating_lookup:
+            return None
+        # Ratings written before ids were derived from (asset, user) have random ids
+        query = "SELECT * FROM c WHERE c.assetId = @assetId AND c.userId = @userId"
+        params = [
+            {"name": "@assetId", "value": asset_id},
+            {"name": "@userId", "value": user_id}
+        ]
+        items = [item async for item in self.ratings_container.query_items(query=query, parameters=params, partition_key=asset_id)]
+        return items[0] if items else None
+
+    @_cosmos_errors
+    async def save_rating(self, doc: dict, if_match: Optional[str] = None) -> dict:
+        if if_match:
+            return await self.ratings_container.upsert_item(
+                body=doc, etag=if_match, match_condition=MatchConditions.IfNotModified
+            )
+        try:
+            return await self.ratings_container.create_item(body=doc)
+        except exceptions.CosmosResourceExistsError as e:
+            raise PreconditionFailedError(f"Rating {doc['id']} was created concurrently") from e
+
+    @_cosmos_errors
+    async def delete_rating(self, asset_id: str, rating_id: str):
+        try:
+            await self.ratings_container.delete_item(item=rating_id, partition_key=asset_id)
+        except exceptions.CosmosResourceNotFoundError:
+            pass  # Already deleted by a concurrent request
+
+    @_cosmos_errors
+    async def delete_ratings(self, asset_id: str) -> int:
+        return await self._delete_all(self.ratings_container, asset_id)
+
+    # --- Comments ---
+
+    @_cosmos_errors
+    async def list_comments(self, asset_id: str) -> List[dict]:
+        query = "SELECT * FROM c WHERE c.assetId = @assetId ORDER BY c.createdAt DESC"
+        params = [{"name": "@assetId", "value": asset_id}]
+        return [item async for item in self.comments_container.query_items(query=query, parameters=params, partition_key=asset_id)]
+
+    @_cosmos_errors
+    async def list_comments_page(self, asset_id: str, limit: int, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        return await self._page(self.comments_container, asset_id, limit, continuation)
+
+    @_cosmos_errors
+    async def comments_version(self, asset_id: str) -> Tuple[Optional[int], int]:
+        return await self._version(self.comments_container, asset_id)
+
+    @_cosmos_errors
+    async def get_comment(self, asset_id: str, comment_id: str) -> Optional[dict]:
+        query = "SELECT * FROM c WHERE c.id = @id AND c.assetId = @assetId"
+        params = [
+            {"name": "@id", "value": comment_id},
+            {"name": "@assetId", "value": asset_id}
+        ]
+        items = [item async for item in self.comments_container.query_items(query=query, parameters=params, partition_key=asset_id)]
+        return items[0] if items else None
+
+    @_cosmos_errors
+    async def create_comment(self, doc: dict) -> dict:
+        return await self.comments_container.create_item(body=doc)
+
+    @_cosmos_errors
+    async def delete_comment(self, asset_id: str, comment_id: str):
+        await self.comments_container.delete_item(item=comment_id, partition_key=asset_id)
+
+    @_cosmos_errors
+    async def delete_comments(self, asset_id: str) -> int:
+        return await self._delete_all(self.comments_container, asset_id)
+
+    # --- Improvements ---
+
+    @_cosmos_errors
+    async def list_improvements(self, asset_id: str) -> List[dict]:
+        query = "SELECT * FROM c WHERE c.assetId = @assetId ORDER BY c.createdAt DESC"
+        params = [{"name": "@assetId", "value": asset_id}]
+        return [item async for item in self.improvements_container.query_items(query=query, parameters=params, partition_key=asset_id)]
+
+    @_cosmos_errors
+    async def list_improvements_page(self, asset_id: str, limit: int, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        return await self._page(self.improvements_container, asset_id, limit, continuation)
+
+    @_cosmos_errors
+    async def improvements_version(self, asset_id: str) -> Tuple[Optional[int], int]:
+        return await self._version(self.improvements_container, asset_id)
+
+    @_cosmos_errors
+    async def create_improvement(self, doc: dict) -> dict:
+        return await self.improvements_container.create_item(body=doc)
+
+    @_cosmos_errors
+    async def delete_improvements(self, asset_id: str) -> int:
+        return await self._delete_all(self.improvements_container, asset_id)
+
+    async def _page(self, container, asset_id: str, limit: int, continuation: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+        """One newest-first page of a child container's documents for an asset, within its partition."""
+        query = "SELECT * FROM c WHERE c.assetId = @assetId ORDER BY c.createdAt DESC"
+        params = [{"name": "@assetId", "value": asset_id}]
+        pages = container.query_items(query=query, parameters=params, partition_key=asset_id, max_item_count=limit).by_page(continuation)
+        try:
+            page = await pages.__anext__()
+        except StopAsyncIteration:
+            return [], None
+        except exceptions.CosmosHttpResponseError as e:
+            # A malformed or stale token is the client's error (400), not a storage failure
+            if continuation and e.status_code == 400:
+                raise ValueError(f"Invalid continuation token: {continuation}") from e
+            raise
+        items = [item async for item in page]
+        return items, pages.continuation_token
+
+    async def _version(self, container, partition_key: Optional[str] = None) -> Tuple[Optional[int], int]:
+        """(max _ts, count) via two index-served aggregate queries, without reading any documents."""
+        kwargs = {"partition_key": partition_key} if partition_key is not None else {}
+
+        async def scalar(query: str):
+            # MAX over no documents is undefined, which comes back as no result at all
+            values = [value async for value in container.query_items(query=query, **kwargs)]
+            return values[0] if values else None
+
+        max_ts, count = await asyncio.gather(scalar("SELECT VALUE MAX(c._ts) FROM c"), scalar("SELECT VALUE COUNT(1) FROM c"))
+        return max_ts, count or 0
+
+    async def _delete_all(self, child_container, asset_id: str) -> int:
+        """Delete every document in an asset's partition using transactional batches."""
+        query = "SELECT VALUE c.id FROM c"
+        ids = [item_id async for item_id in child_container.query_items(query=query, partition_key=asset_id)]
+        batches = [ids[i:i + BATCH_MAX_OPERATIONS] for i in range(0, len(ids), BATCH_MAX_OPERATIONS)]
+        semaphore = asyncio.Semaphore(DELETE_BATCH_CONCURRENCY)
+
+        async def delete_batch(batch: List[str]):
+            async with semaphore:
+                try:
+                    await child_container.execute_item_batch([("delete", (item_id,)) for item_id in batch], partition_key=asset_id)
+                except exceptions.CosmosBatchOperationError:
+                    # A batch is all-or-nothing; if something in it was deleted concurrently, go one by one
+                    for item_id in batch:
+                        try:
+                            await child_container.delete_item(item=item_id, partition_key=asset_id)
+                        except exceptions.CosmosResourceNotFoundError:
+                            pass
+
+        await asyncio.gather(*(delete_batch(batch) for batch in batches))
+        return len(ids)
+
+
+class SignedUrlCache:
+    """LRU cache of SAS URLs whose expiries are aligned to fixed time buckets.
+    
+    A URL signed during bucket N expires at the end of bucket N+1, so it is
+    valid for between one and two bucket lengths and every read within the same
+    bucket gets the identical string (cacheable by browsers and CDNs) for one
+    HMAC signing per blob per bucket.
+    
+    Blobs are never overwritten with different content: a replaced image is
+    uploaded under a new versioned name (see main.versioned_blob_name), so a
+    cached URL always refers to the content it was signed for.
+    """
+
+    def __init__(self, sign, bucket_seconds: int = 1800, max_entries: int = 10000):
+        self.sign = sign  # (blob_name, expiry datetime) -> URL
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # blob name -> (bucket, url)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def bucket(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now(timezone.utc)
+        return int(now.timestamp()) // self.bucket_seconds
+
+    def get(self, blob_name: str, now: Optional[datetime] = None) -> str:
+        bucket = self.bucket(now)
+        entry = self.entries.get(blob_name)
+        if entry and entry[0] == bucket:
+            self.hits += 1
+            self.entries.move_to_end(blob_name)
+            return entry[1]
+
+        self.misses += 1
+        expiry = datetime.fromtimestamp((bucket + 2) * self.bucket_seconds, timezone.utc)
+        url = self.sign(blob_name, expiry)
+        self.entries[blob_name] = (bucket, url)
+        self.entries.move_to_end(blob_name)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return url
+
+    def invalidate(self, blob_name: str):
+        """Forget a blob's URL after it was deleted."""
+        self.entries.pop(blob_name, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class AzureBlobStore(BlobStore):
+    """Blob Storage via the async SDK; reads are served through user-delegation SAS URLs."""
+
+    # How often the background task checks whether the user delegation key needs renewing
+    KEY_CHECK_INTERVAL_SECONDS = 3600
+
+    def __init__(self, account_url: str, container_name: str, credential,
+                 sas_bucket_seconds: int = 1800, sas_cache_size: int = 10000):
+        self.account_url = account_url
+        self.container_name = container_name
+        self.credential = credential  # async credential
+        self.service_client = None
+        self.container_client = None
+        # Extract account name from URL
+        # URL format: https://<account>.blob.core.windows.net
+        self.account_name = account_url.replace("https://", "").split(".")[0]
+        self.user_delegation_key = None
+        self.user_delegation_key_expiry = None
+        self.sas_cache = SignedUrlCache(self._sign, bucket_seconds=sas_bucket_seconds, max_entries=sas_cache_size)
+        self._key_refresh_task = None
+
+    async def open(self):
+        self.service_client = BlobServiceClient(self.account_url, credential=self.credential)
+        self.container_client = self.service_client.get_container_client(self.container_name)
+        # Create container if it doesn't exist (without public access)
+        if not await self.container_client.exists():
+            await self.container_client.create_container()
+        await self.refresh_user_delegation_key()
+        self._key_refresh_task = asyncio.create_task(self._run_key_refresh())
+        logger.info("Connected to Blob Storage (managed identity): %s", self.container_name)
+
+    async def close(self):
+        if self._key_refresh_task:
+            self._key_refresh_task.cancel()
+            self._key_refresh_task = None
+        if self.service_client is not None:
+            await self.service_client.close()
+            self.service_client = None
+
+    async def ping(self):
+        await self.container_client.get_container_properties()
+
+    async def upload(self, blob_name: str, data: bytes, content_type: str) -> str:
+        blob_client = self.container_client.get_blob_client(blob_name)
+        await blob_client.upload_blob(
+            data,
+            overwrite=True,
+            content_settings=ContentSettings(content_type=content_type)
+        )
+        self.bytes_uploaded += len(data)
+        self.sas_cache.invalidate(blob_name)
+        return blob_name
+
+    async def upload_stream(self, blob_name: str, chunks: AsyncIterator[bytes], content_type: str) -> str:
+        # Stage each chunk as a block and commit them together; uncommitted blocks
+        # of an aborted upload are discarded by the service.
+        blob_client = self.container_client.get_blob_client(blob_name)
+        upload_id = uuid.uuid4().hex
+        blocks = []
+        async for chunk in chunks:
+            block_id = base64.b64encode(f"{upload_id}-{len(blocks):06d}".encode()).decode()
+            await blob_client.stage_block(block_id, chunk, length=len(chunk))
+            blocks.append(BlobBlock(block_id=block_id))
+            self.bytes_uploaded += len(chunk)
+        await blob_client.commit_block_list(blocks, content_settings=ContentSettings(content_type=content_type))
+        self.sas_cache.invalidate(blob_name)
+        return blob_name
+
+    async def download(self, blob_name: str) -> Optional[bytes]:
+        try:
+            downloader = await self.container_client.download_blob(blob_name)
+        except ResourceNotFoundError:
+            return None
+        return await downloader.readall()
+
+    async def delete(self, blob_name: str):
+        await self.container_client.delete_blob(blob_name)
+        self.sas_cache.invalidate(blob_name)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        names = [blob.name async for blob in self.container_client.list_blobs(name_starts_with=prefix)]
+        # One blob batch request per BLOB_BATCH_MAX_SUBREQUESTS deletes
+        for i in range(0, len(names), BLOB_BATCH_MAX_SUBREQUESTS):
+            await self.container_client.delete_blobs(*names[i:i + BLOB_BATCH_MAX_SUBREQUESTS])
+        for name in names:
+            self.sas_cache.invalidate(name)
+        return len(names)
+
+    async def refresh_user_delegation_key(self):
+        """Get or refresh user delegation key for SAS token generation."""
+        now = datetime.utcnow()
+        # Refresh key if it doesn't exist or will expire before a freshly signed SAS would
+        min_remaining = max(timedelta(hours=1), timedelta(seconds=2 * self.sas_cache.bucket_seconds + self.KEY_CHECK_INTERVAL_SECONDS))
+        if self.user_delegation_key is None or self.user_delegation_key_expiry is None or self.user_delegation_key_expiry < now + min_remaining:
+            # Key valid for 7 days
+            key_start = now - timedelta(minutes=5)  # Account for clock skew
+            key_expiry = now + timedelta(days=7)
+            self.user_delegation_key = await self.service_client.get_user_delegation_key(
+                key_start_time=key_start,
+                key_expiry_time=key_expiry
+            )
+            self.user_delegation_key_expiry = key_expiry
+            logger.info("Refreshed user delegation key, expires: %s", key_expiry)
+
+    async def _run_key_refresh(self):
+        """Background task: renew the delegation key well before it expires, off the request path."""
+        while True:
+            await asyncio.sleep(self.KEY_CHECK_INTERVAL_SECONDS)
+            try:
+                await self.refresh_user_delegation_key()
+            except Exception as e:
+                logger.warning("Failed to refresh user delegation key: %s", e)
+
+    def url_for(self, blob_name: str) -> str:
+        """Short-lived SAS URL for a blob, reused from the signing cache within a time bucket."""
+        return self.sas_cache.get(blob_name)
+
+    def _sign(self, blob_name: str, expiry: datetime) -> str:
+        sas_token = generate_blob_sas(
+            account_name=self.account_name,
+            container_name=self.container_name,
+            blob_name=blob_name,
+            user_delegation_key=self.user_delegation_key,
+            permission=BlobSasPermissions(read=True),
+            expiry=expiry
+        )
+        return f"{self.account_url}/{self.container_name}/{blob_name}?{sas_token}"
+
+    def url_epoch(self) -> int:
+        # URLs are re-signed every SAS bucket
+        return self.sas_cache.bucket()
+
+    def extract_blob_name(self, url: str) -> Optional[str]:
+        """Extract blob name from a full Azure Blob Storage URL (with or without SAS)."""
+        prefix = f"https://{self.account_name}.blob.core.windows.net/{self.container_name}/"
+        if url.startswith(prefix):
+            # Strip the container prefix and any query params (old SAS token)
+            path = url[len(prefix):]
+            return path.split("?")[0]
+        return None
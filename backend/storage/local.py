@@ -0,0 +1,271 @@
+"""Local implementation: in-memory documents and a local-directory blob store.
+
+Used for development without Azure access and by the benchmark suite, so
+performance regressions can be caught offline. Nothing here is durable except
+blobs written to disk.
+"""
+import asyncio
+import copy
+import os
+import shutil
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .base import AssetRepository, BlobStore, PreconditionFailedError, decode_asset_page_token, encode_asset_page_token, rating_id
+
+
+def _stamp(doc: dict) -> dict:
+    """Add the system properties Cosmos DB would add on write."""
+    doc["_ts"] = int(time.time())
+    doc["_etag"] = f'"{uuid.uuid4()}"'
+    return doc
+
+
+def _newest_first(docs) -> List[dict]:
+    return [copy.deepcopy(d) for d in sorted(docs, key=lambda d: d.get("createdAt") or "", reverse=True)]
+
+
+def _page(docs, limit: int, continuation: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+    # Continuation token is just the offset into the newest-first ordering
+    offset = int(continuation) if continuation else 0
+    if offset < 0:
+        raise ValueError(f"Invalid continuation token: {continuation}")
+    ordered = sorted(docs, key=lambda d: d.get("createdAt") or "", reverse=True)
+    next_offset = offset + limit
+    page = [copy.deepcopy(d) for d in ordered[offset:next_offset]]
+    return page, str(next_offset) if next_offset < len(ordered) else None
+
+
+def _version(docs) -> Tuple[Optional[int], int]:
+    docs = list(docs)
+    return max((d["_ts"] for d in docs), default=None), len(docs)
+
+
+class InMemoryRepository(AssetRepository):
+    def __init__(self):
+        self.assets: Dict[str, dict] = {}
+        # Every created/replaced asset version, in order (stands in for the change feed)
+        self.asset_changes: List[dict] = []
+        # Child documents keyed by assetId, then by document id (mirrors the /assetId partitioning)
+        self.ratings: Dict[str, Dict[str, dict]] = {}
+        self.comments: Dict[str, Dict[str, dict]] = {}
+        self.improvements: Dict[str, Dict[str, dict]] = {}
+
+    async def ping(self):
+        return None
+
+    # --- Assets ---
+
+    async def list_assets(self) -> List[dict]:
+        return _newest_first(self.assets.values())
+
+    async def list_assets_page(self, fields: List[str], limit: int, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        # Same keyset semantics as Cosmos: resume strictly after the last (createdAt, id) returned
+        ordered = sorted(self.assets.values(), key=lambda d: (d.get("createdAt") or "", d["id"]), reverse=True)
+        if continuation:
+            last = decode_asset_page_token(continuation)
+            ordered = [doc for doc in ordered if (doc.get("createdAt") or "", doc["id"]) < last]
+        page = ordered[:limit]
+        items = [{field: copy.deepcopy(doc[field]) for field in fields if field in doc} for doc in page]
+        return items, encode_asset_page_token(page[-1]) if len(ordered) > limit else None
+
+    async def list_asset_ids(self) -> List[str]:
+        return list(self.assets)
+
+    async def read_asset_changes(self, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        if continuation is None:
+            return [], str(len(self.asset_changes))
+        start = int(continuation)
+        return [copy.deepcopy(d) for d in self.asset_changes[start:]], str(len(self.asset_changes))
+
+    async def assets_version(self) -> Tuple[Optional[int], int]:
+        return _version(self.assets.values())
+
+    async def get_asset(self, asset_id: str) -> Optional[dict]:
+        asset = self.assets.get(asset_id)
+        return copy.deepcopy(asset) if asset else None
+
+    async def create_asset(self, doc: dict) -> dict:
+        self.assets[doc["id"]] = _stamp(copy.deepcopy(doc))
+        self.asset_changes.append(copy.deepcopy(self.assets[doc["id"]]))
+        return copy.deepcopy(self.assets[doc["id"]])
+
+    async def replace_asset(self, doc: dict, if_match: Optional[str] = None) -> dict:
+        current = self.assets.get(doc["id"])
+        if if_match and (current is None or current.get("_etag") != if_match):
+            raise PreconditionFailedError(f"ETag mismatch for asset {doc['id']}")
+        return await self.create_asset(doc)
+
+    async def delete_asset(self, asset: dict):
+        self.assets.pop(asset["id"], None)
+
+    # --- Ratings ---
+
+    async def get_rating_stats(self, asset_id: str) -> Tuple[Optional[float], int]:
+        ratings = self.ratings.get(asset_id, {}).values()
+        if not ratings:
+            return None, 0
+        return sum(r["rating"] for r in ratings) / len(ratings), len(ratings)
+
+    async def list_ratings(self, asset_id: str) -> List[dict]:
+        return _newest_first(self.ratings.get(asset_id, {}).values())
+
+    async def get_user_rating(self, asset_id: str, user_id: str) -> Optional[dict]:
+        ratings = self.ratings.get(asset_id, {})
+        rating = ratings.get(rating_id(asset_id, user_id))
+        if rating is None:
+            # Ratings with ids from before they were derived from (asset, user)
+            rating = next((r for r in ratings.values() if r["userId"] == user_id), None)
+        return copy.deepcopy(rating) if rating else None
+
+    async def save_rating(self, doc: dict, if_match: Optional[str] = None) -> dict:
+        current = self.ratings.get(doc["assetId"], {}).get(doc["id"])
+        if if_match and current is not None and current.get("_etag") != if_match:
+            raise PreconditionFailedError(f"ETag mismatch for rating {doc['id']}")
+        if not if_match and current is not None:
+            raise PreconditionFailedError(f"Rating {doc['id']} was created concurrently")
+        return self._put(self.ratings, doc)
+
+    async def delete_rating(self, asset_id: str, rating_id: str):
+        self.ratings.get(asset_id, {}).pop(rating_id, None)
+
+    async def delete_ratings(self, asset_id: str) -> int:
+        return len(self.ratings.pop(asset_id, {}))
+
+    # --- Comments ---
+
+    async def list_comments(self, asset_id: str) -> List[dict]:
+        return _newest_first(self.comments.get(asset_id, {}).values())
+
+    async def list_comments_page(self, asset_id: str, limit: int, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        return _page(self.comments.get(asset_id, {}).values(), limit, continuation)
+
+    async def comments_version(self, asset_id: str) -> Tuple[Optional[int], int]:
+        return _version(self.comments.get(asset_id, {}).values())
+
+    async def get_comment(self, asset_id: str, comment_id: str) -> Optional[dict]:
+        comment = self.comments.get(asset_id, {}).get(comment_id)
+        return copy.deepcopy(comment) if comment else None
+
+    async def create_comment(self, doc: dict) -> dict:
+        return self._put(self.comments, doc)
+
+    async def delete_comment(self, asset_id: str, comment_id: str):
+        self.comments.get(asset_id, {}).pop(comment_id, None)
+
+    async def delete_comments(self, asset_id: str) -> int:
+        return len(self.comments.pop(asset_id, {}))
+
+    # --- Improvements ---
+
+    async def list_improvements(self, asset_id: str) -> List[dict]:
+        return _newest_first(self.improvements.get(asset_id, {}).values())
+
+    async def list_improvements_page(self, asset_id: str, limit: int, continuation: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        return _page(self.improvements.get(asset_id, {}).values(), limit, continuation)
+
+    async def improvements_version(self, asset_id: str) -> Tuple[Optional[int], int]:
+        return _version(self.improvements.get(asset_id, {}).values())
+
+    async def create_improvement(self, doc: dict) -> dict:
+        return self._put(self.improvements, doc)
+
+    async def delete_improvements(self, asset_id: str) -> int:
+        return len(self.improvements.pop(asset_id, {}))
+
+    def _put(self, partitions: Dict[str, Dict[str, dict]], doc: dict) -> dict:
+        stored = _stamp(copy.deepcopy(doc))
+        partitions.setdefault(doc["assetId"], {})[doc["id"]] = stored
+        return copy.deepcopy(stored)
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs stored as files under a directory and served by the app at base_url."""
+
+    def __init__(self, root: str, base_url: str = "/blobs"):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    async def open(self):
+        os.makedirs(self.root, exist_ok=True)
+
+    async def ping(self):
+        if not os.path.isdir(self.root):
+            raise FileNotFoundError(self.root)
+
+    def path_for(self, blob_name: str) -> str:
+        """Filesystem path for a blob name, refusing names that escape the root."""
+        path = os.path.abspath(os.path.join(self.root, blob_name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid blob name: {blob_name}")
+        return path
+
+    async def upload(self, blob_name: str, data: bytes, content_type: str) -> str:
+        await asyncio.to_thread(self._write, self.path_for(blob_name), data)
+        self.bytes_uploaded += len(data)
+        return blob_name
+
+    async def upload_stream(self, blob_name: str, chunks: AsyncIterator[bytes], content_type: str) -> str:
+        path = self.path_for(blob_name)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file and rename it into place once complete
+        partial = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(partial, "wb") as f:
+                async for chunk in chunks:
+                    await asyncio.to_thread(f.write, chunk)
+                    self.bytes_uploaded += len(chunk)
+            await asyncio.to_thread(os.replace, partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return blob_name
+
+    async def download(self, blob_name: str) -> Optional[bytes]:
+        path = self.path_for(blob_name)
+        if not os.path.isfile(path):
+            return None
+        return await asyncio.to_thread(self._read, path)
+
+    async def delete(self, blob_name: str):
+        await asyncio.to_thread(os.remove, self.path_for(blob_name))
+
+    async def delete_prefix(self, prefix: str) -> int:
+        return await asyncio.to_thread(self._delete_prefix, prefix)
+
+    def _delete_prefix(self, prefix: str) -> int:
+        # Only look at entries of the directory the prefix points into whose names match it
+        directory, name_prefix = os.path.split(self.path_for(prefix + "_"))
+        name_prefix = name_prefix[:-1]
+        if not os.path.isdir(directory):
+            return 0
+        deleted = 0
+        for entry in os.scandir(directory):
+            if not entry.name.startswith(name_prefix):
+                continue
+            if entry.is_dir():
+                for root, _, files in os.walk(entry.path):
+                    deleted += len(files)
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+                deleted += 1
+        # Blob stores have no directories; don't leave an emptied one behind
+        if directory != self.root and not os.listdir(directory):
+            os.rmdir(directory)
+        return deleted
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def url_for(self, blob_name: str) -> str:
+        return f"{self.base_url}/{blob_name}"
@@ -0,0 +1,180 @@
+"""In-memory replica of the assets container, kept current from the change feed.
+
+The catalog is small and read-heavy, so each instance can hold all of it. The
+replica loads every asset on startup and then polls the change feed. Writes
+made by this instance are applied right away, so a client reads its own
+writes. Every instance reads the same feed and converges on the same state.
+
+The change feed does not report deletes. Deletes made by this instance are
+applied directly. Deletes made elsewhere are picked up by a periodic reconcile
+against the container's ids.
+
+Readers get deep copies of the documents, so a handler filling in URLs or
+rating summaries (nested values included) can never change what the replica
+serves to the next request.
+"""
+import asyncio
+import copy
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .base import AssetRepository
+
+logger = logging.getLogger("aiflix.storage")
+
+
+class AssetCatalogReplica:
+    def __init__(self, source: AssetRepository, poll_interval: float = 1.0,
+                 max_staleness: float = 30.0, reconcile_interval: float = 300.0):
+        self.source = source
+        self.poll_interval = poll_interval
+        self.max_staleness = max_staleness
+        self.reconcile_interval = reconcile_interval
+        self.assets: Dict[str, dict] = {}
+        # Ids deleted through this instance -> _ts of the deleted version, so a
+        # change feed entry for that version can't bring the asset back
+        self.tombstones: Dict[str, int] = {}
+        self.continuation: Optional[str] = None
+        self.warm = False
+        self.last_sync: Optional[float] = None
+        self.last_change_ts: Optional[int] = None
+        self.changes_applied = 0
+        self.reconciled_deletes = 0
+        self.sync_failures = 0
+        # Called with (asset_id, asset) on every change, asset None for a delete
+        self.listeners: List[Callable[[str, Optional[dict]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load the catalog and start following the change feed.
+
+        The feed position is taken before the load, so nothing written during
+        the load is missed (it may be applied twice, which is harmless).
+        """
+        _, self.continuation = await self.source.read_asset_changes(None)
+        assets = await self.source.list_assets()
+        self.assets = {asset["id"]: asset for asset in assets}
+        self.warm = self.continuation is not None
+        self.last_sync = time.monotonic()
+        logger.info("Asset replica loaded %s assets", len(self.assets))
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def is_fresh(self) -> bool:
+        """Warm and synced with the change feed within the staleness bound."""
+        return self.warm and self.sync_age() <= self.max_staleness
+
+    def sync_age(self) -> float:
+        """Seconds since the replica last caught up with the change feed."""
+        return time.monotonic() - self.last_sync if self.last_sync is not None else float("inf")
+
+    def stats(self) -> dict:
+        return {
+            "warm": self.warm,
+            "fresh": self.is_fresh(),
+            "assets": len(self.assets),
+            "syncAgeSeconds": round(self.sync_age(), 3) if self.last_sync is not None else None,
+            # How far behind "now" the newest change we applied was written
+            "lastChangeAgeSeconds": round(time.time() - self.last_change_ts, 3) if self.last_change_ts else None,
+            "changesApplied": self.changes_applied,
+            "reconciledDeletes": self.reconciled_deletes,
+            "syncFailures": self.sync_failures,
+        }
+
+    def subscribe(self, listener: Callable[[str, Optional[dict]], None]):
+        """Have listener called for every asset change the replica applies, including other instances' writes."""
+        self.listeners.append(listener)
+
+    def _notify(self, asset_id: str, asset: Optional[dict]):
+        for listener in self.listeners:
+            try:
+                listener(asset_id, asset)
+            except Exception as e:
+                logger.warning("Asset replica listener failed for %s: %s", asset_id, e)
+
+    # --- Reads ---
+
+    def list_assets(self) -> List[dict]:
+        """All assets, newest first."""
+        ordered = sorted(self.assets.values(), key=lambda d: d.get("createdAt") or "", reverse=True)
+        return [copy.deepcopy(asset) for asset in ordered]
+
+    def get_asset(self, asset_id: str) -> Optional[dict]:
+        asset = self.assets.get(asset_id)
+        return copy.deepcopy(asset) if asset else None
+
+    def assets_version(self) -> Tuple[Optional[int], int]:
+        return max((a["_ts"] for a in self.assets.values()), default=None), len(self.assets)
+
+    # --- Writes ---
+
+    def apply(self, asset: dict):
+        """Apply a created or updated asset, ignoring versions older than the one held.
+
+        The replica keeps its own copy: callers go on to fill in rating
+        summaries and signed image URLs on the dict they passed in.
+        """
+        current = self.assets.get(asset["id"])
+        if current and current.get("_ts", 0) > asset.get("_ts", 0):
+            return
+        deleted_ts = self.tombstones.get(asset["id"])
+        if deleted_ts is not None and asset.get("_ts", 0) <= deleted_ts:
+            return
+        asset = copy.deepcopy(asset)
+        self.assets[asset["id"]] = asset
+        self._notify(asset["id"], asset)
+
+    def remove(self, asset_id: str):
+        removed = self.assets.pop(asset_id, None)
+        self.tombstones[asset_id] = removed.get("_ts", 0) if removed else int(time.time())
+        if removed:
+            self._notify(asset_id, None)
+
+    # --- Sync ---
+
+    async def _run(self):
+        last_reconcile = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.sync()
+                if time.monotonic() - last_reconcile >= self.reconcile_interval:
+                    await self.reconcile()
+                    last_reconcile = time.monotonic()
+            except Exception as e:
+                self.sync_failures += 1
+                logger.warning("Asset replica sync failed (%.0fs behind): %s", self.sync_age(), e)
+
+    async def sync(self):
+        """Apply everything in the change feed since the last sync."""
+        changes, continuation = await self.source.read_asset_changes(self.continuation)
+        for asset in changes:
+            self.apply(asset)
+            self.last_change_ts = asset.get("_ts", self.last_change_ts)
+        self.changes_applied += len(changes)
+        if continuation is None:
+            raise RuntimeError("Change feed returned no continuation")
+        self.continuation = continuation
+        self.warm = True
+        self.last_sync = time.monotonic()
+
+    async def reconcile(self):
+        """Drop assets deleted by other instances (deletes never show up in the change feed)."""
+        started = time.time()
+        ids = set(await self.source.list_asset_ids())
+        # Anything written after the id listing started may legitimately be missing from it
+        gone = [asset_id for asset_id, asset in self.assets.items()
+                if asset_id not in ids and asset.get("_ts", 0) < started - 1]
+        for asset_id in gone:
+            self.assets.pop(asset_id, None)
+            self._notify(asset_id, None)
+        self.reconciled_deletes += len(gone)
+        self.tombstones.clear()
+        if gone:
+            logger.info("Asset replica dropped %s assets deleted elsewhere", len(gone))
@@ -0,0 +1,40 @@
+"""Run the app in-process against the local storage backend (no Azure access needed)."""
+import asyncio
+import base64
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ["AUTH_ENABLED"] = "false"
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["EMAIL_NOTIFICATIONS_ENABLED"] = "false"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ.setdefault("LOCAL_BLOB_DIR", tempfile.mkdtemp(prefix="aiflix-test-"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx  # noqa: E402
+from PIL import Image  # noqa: E402
+
+import main  # noqa: E402
+
+
+def png_data_url(size=(8, 8)) -> str:
+    out = io.BytesIO()
+    Image.new("RGB", size, "red").save(out, "PNG")
+    return "data:image/png;base64," + base64.b64encode(out.getvalue()).decode()
+
+
+@pytest.fixture
+def api():
+    """Run `scenario(client)` with the app started, e.g. api(scenario)."""
+    def run(scenario):
+        async def go():
+            async with main.lifespan(main.app):
+                transport = httpx.ASGITransport(app=main.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await scenario(client)
+        return asyncio.run(go())
+    return run
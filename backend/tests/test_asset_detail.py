@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+import main
+
+
+def test_full_returns_every_section_in_one_response(api):
+    async def scenario(client):
+        asset_id = (await client.post("/api/assets", json={"assetName": "Full", "assetDescription": "d", "createdBy": "me"})).json()["id"]
+        await client.post(f"/api/assets/{asset_id}/ratings", json={"rating": 4, "userId": "u1", "userName": "U1"})
+        await client.post(f"/api/assets/{asset_id}/ratings", json={"rating": 5, "userId": "u2", "userName": "U2"})
+        for i in range(main.ASSET_DETAIL_COMMENTS + 1):
+            await client.post(f"/api/assets/{asset_id}/comments", json={"text": f"c{i}", "userId": "u1", "userName": "U1"})
+        await client.post(f"/api/assets/{asset_id}/improvements", json={
+            "type": "setup", "contributorId": "u1", "contributorName": "U1", "data": {}})
+
+        detail = (await client.get(f"/api/assets/{asset_id}/full", params={"userId": "u2"})).json()
+        assert detail["asset"]["id"] == asset_id
+        assert detail["ratings"] == {"averageRating": 4.5, "totalCount": 2, "userRating": 5}
+        assert len(detail["comments"]["items"]) == main.ASSET_DETAIL_COMMENTS
+        assert detail["comments"]["totalCount"] == main.ASSET_DETAIL_COMMENTS + 1
+        assert detail["comments"]["continuationToken"]
+        assert len(detail["improvements"]) == 1
+        assert (await client.get("/api/assets/missing/full")).status_code == 404
+
+    api(scenario)
+
+
+def test_full_reads_its_sections_concurrently(api, monkeypatch):
+    delay = 0.2
+
+    def slowed(method):
+        async def slow(*args, **kwargs):
+            await asyncio.sleep(delay)
+            return await method(*args, **kwargs)
+        return slow
+
+    async def scenario(client):
+        asset_id = (await client.post("/api/assets", json={"assetName": "Full", "assetDescription": "d", "createdBy": "me"})).json()["id"]
+        for name in ("get_user_rating", "list_comments_page", "list_improvements"):
+            monkeypatch.setattr(main.repo, name, slowed(getattr(main.repo, name)))
+
+        start = time.perf_counter()
+        response = await client.get(f"/api/assets/{asset_id}/full", params={"userId": "u1"})
+        assert response.status_code == 200
+        assert time.perf_counter() - start < 2 * delay
+
+    api(scenario)
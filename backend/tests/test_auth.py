@@ -0,0 +1,60 @@
+import asyncio
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from auth import TokenValidator, VerifiedTokenCache
+
+AUDIENCE = "api://aiflix"
+ISSUER = "https://login.example.com/tenant/v2.0"
+
+
+@pytest.fixture
+def signer():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    validator = TokenValidator("https://login.example.com/keys", AUDIENCE, ISSUER)
+    validator.signing_keys = {"k1": jwt.PyJWK(dict(jwk, kid="k1", alg="RS256"))}
+    validator.last_refresh = time.monotonic()
+
+    def sign(**claims) -> str:
+        claims = {"aud": AUDIENCE, "iss": ISSUER, "sub": "u1", "exp": int(time.time()) + 300, **claims}
+        return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": "k1"})
+
+    return validator, sign
+
+
+def test_a_token_is_verified_once_then_served_from_the_cache(signer):
+    validator, sign = signer
+    token = sign()
+
+    async def validate_burst():
+        return await asyncio.gather(*(validator.validate(token) for _ in range(5)))
+
+    assert all(claims["sub"] == "u1" for claims in asyncio.run(validate_burst()))
+    assert (validator.verifications, validator.cache.hits) == (1, 4)
+
+
+def test_expired_and_forged_tokens_are_never_served_from_the_cache(signer):
+    validator, sign = signer
+    with pytest.raises(jwt.ExpiredSignatureError):
+        asyncio.run(validator.validate(sign(exp=int(time.time()) - 10)))
+    with pytest.raises(jwt.InvalidAudienceError):
+        asyncio.run(validator.validate(sign(aud="someone-else")))
+    assert not validator.cache.entries
+
+
+def test_cache_evicts_least_recently_used_and_drops_expired_entries():
+    cache = VerifiedTokenCache(max_entries=2)
+    future = time.time() + 300
+    cache.put("a", {"exp": future})
+    cache.put("b", {"exp": future})
+    assert cache.get("a")
+    cache.put("c", {"exp": future})
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+
+    cache.put("old", {"exp": time.time() - 1})
+    assert cache.get("old") is None and cache.key("old") not in cache.entries
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from azure.cosmos import exceptions
+
+from storage import CosmosRepository, StorageError
+
+
+def test_garbage_continuation_token_is_a_400(api):
+    async def scenario(client):
+        asset = (await client.post("/api/assets", json={"assetName": "A", "assetDescription": "d", "createdBy": "me"})).json()
+        for kind in ("comments", "improvements"):
+            response = await client.get(f"/api/assets/{asset['id']}/{kind}", params={"continuation": "garbage"})
+            assert response.status_code == 400
+
+    api(scenario)
+
+
+class RejectingPages:
+    """What the Cosmos SDK's by_page() does with a token the service can't parse."""
+
+    continuation_token = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise exceptions.CosmosHttpResponseError(status_code=400, message="Invalid continuation token")
+
+
+class RejectingContainer:
+    def query_items(self, **kwargs):
+        return self
+
+    def by_page(self, continuation):
+        return RejectingPages()
+
+
+def test_cosmos_rejected_continuation_token_raises_value_error():
+    repo = CosmosRepository("https://example.documents.azure.com", "db", "assets", credential=None)
+    repo.comments_container = RejectingContainer()
+    with pytest.raises(ValueError):
+        asyncio.run(repo.list_comments_page("asset", 20, "garbage"))
+    # Without a token a 400 is still a storage failure
+    with pytest.raises(StorageError):
+        asyncio.run(repo.list_comments_page("asset", 20, None))
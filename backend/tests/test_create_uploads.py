@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from conftest import png_data_url
+
+import main
+
+
+def test_create_uploads_images_concurrently_and_survives_one_failure(api, monkeypatch):
+    delay = 0.2
+
+    async def scenario(client):
+        upload = main.blobs.upload
+
+        async def slow_upload(blob_name, data, content_type):
+            await asyncio.sleep(delay)
+            if blob_name.endswith("screenshot_1.png"):
+                raise OSError("upload failed")
+            return await upload(blob_name, data, content_type)
+
+        monkeypatch.setattr(main.blobs, "upload", slow_upload)
+        # Only the originals, so the timing isn't dominated by rendering
+        monkeypatch.setattr(main, "rendition_pipeline", None)
+        start = time.perf_counter()
+        response = await client.post("/api/assets", json={
+            "assetName": "Concurrent", "assetDescription": "d", "createdBy": "me",
+            "assetPicture": png_data_url(), "screenshots": [png_data_url() for _ in range(3)],
+        })
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200
+        asset = response.json()
+        # Four uploads, but the request takes about as long as one
+        assert elapsed < 3 * delay
+        assert asset["assetPicture"].endswith("/main.png")
+        # The failed upload keeps its inline data, in place; the others still went to blob storage
+        screenshots = asset["screenshots"]
+        assert screenshots[1].startswith("data:image/png;base64,")
+        assert [screenshots[0].rsplit("/", 1)[-1], screenshots[2].rsplit("/", 1)[-1]] == ["screenshot_0.png", "screenshot_2.png"]
+
+    api(scenario)
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from conftest import png_data_url
+
+import main
+
+
+async def create_with_children(client, name: str) -> str:
+    asset_id = (await client.post("/api/assets", json={
+        "assetName": name, "assetDescription": "d", "createdBy": "me",
+        "assetPicture": png_data_url(), "screenshots": [png_data_url()],
+    })).json()["id"]
+    await client.post(f"/api/assets/{asset_id}/ratings", json={"rating": 4, "userId": "u1", "userName": "U1"})
+    await client.post(f"/api/assets/{asset_id}/comments", json={"text": "Nice", "userId": "u1", "userName": "U1"})
+    await client.post(f"/api/assets/{asset_id}/improvements", json={
+        "type": "setup", "contributorId": "u1", "contributorName": "U1", "data": {"steps": "run it"}})
+    return asset_id
+
+
+async def children(asset_id: str) -> tuple:
+    folder = main.blobs.path_for(asset_id)
+    return (len(await main.repo.list_ratings(asset_id)), len(await main.repo.list_comments(asset_id)),
+            len(await main.repo.list_improvements(asset_id)), len(os.listdir(folder)) if os.path.isdir(folder) else 0)
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_delete_removes_children_of_that_asset_only(api, background):
+    async def scenario(client):
+        doomed = await create_with_children(client, "Doomed")
+        kept = await create_with_children(client, "Kept")
+        before = await children(kept)
+        assert before[:3] == (1, 1, 1) and before[3] > 0
+
+        response = await client.delete(f"/api/assets/{doomed}", params={"background": background})
+        assert response.status_code == (202 if background else 200)
+        assert (await client.get(f"/api/assets/{doomed}")).status_code == 404
+        # Background tasks have run by the time the in-process client returns
+        assert await children(doomed) == (0, 0, 0, 0)
+        assert await children(kept) == before
+
+    api(scenario)
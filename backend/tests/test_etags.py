@@ -0,0 +1,39 @@
+import main
+
+
+def test_asset_reads_revalidate_with_304_until_the_asset_changes(api):
+    async def scenario(client):
+        asset = (await client.post("/api/assets", json={"assetName": "Tagged", "assetDescription": "d", "createdBy": "me"})).json()
+        url = f"/api/assets/{asset['id']}"
+
+        first = await client.get(url)
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+        # Weak comparison: a strong form of the same tag, or one in a list, also matches
+        for if_none_match in (etag, etag.removeprefix("W/"), f'"other", {etag}'):
+            revalidated = await client.get(url, headers={"If-None-Match": if_none_match})
+            assert revalidated.status_code == 304 and revalidated.headers["etag"] == etag and not revalidated.content
+
+        await client.post(f"{url}/ratings", json={"rating": 5, "userId": "u1", "userName": "U1"})
+        changed = await client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+        assert changed.json()["ratingCount"] == 1
+
+    api(scenario)
+
+
+def test_asset_list_is_only_tagged_once_the_collection_has_settled(api, monkeypatch):
+    async def scenario(client):
+        await client.post("/api/assets", json={"assetName": "One", "assetDescription": "d", "createdBy": "me"})
+        # Just written: (max _ts, count) may still change within the same second
+        assert "etag" not in (await client.get("/api/assets")).headers
+
+        monkeypatch.setattr(main, "ETAG_SETTLE_SECONDS", 0)
+        etag = (await client.get("/api/assets")).headers["etag"]
+        assert (await client.get("/api/assets", headers={"If-None-Match": etag})).status_code == 304
+
+        await client.post("/api/assets", json={"assetName": "Two", "assetDescription": "d", "createdBy": "me"})
+        changed = await client.get("/api/assets", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and len(changed.json()) == 2
+
+    api(scenario)
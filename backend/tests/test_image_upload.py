@@ -0,0 +1,53 @@
+import asyncio
+import base64
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from conftest import png_data_url
+
+import main
+
+
+def png_bytes(size=(8, 8)) -> bytes:
+    return base64.b64decode(png_data_url(size).split(",", 1)[1])
+
+
+def test_upload_limit_counts_the_sniffed_head(api, monkeypatch):
+    async def scenario(client):
+        asset = (await client.post("/api/assets", json={"assetName": "Big", "assetDescription": "d", "createdBy": "me"})).json()
+        png = png_bytes((64, 64))
+        monkeypatch.setattr(main, "IMAGE_UPLOAD_MAX_BYTES", len(png) - 1)
+
+        # One chunk, so all of it arrives with the head read for sniffing
+        response = await client.put(f"/api/assets/{asset['id']}/images/cover", content=png)
+        assert response.status_code == 413
+        folder = main.blobs.path_for(asset["id"])
+        assert not os.path.isdir(folder) or not os.listdir(folder)
+        assert (await client.get(f"/api/assets/{asset['id']}")).json()["assetPicture"] is None
+
+    api(scenario)
+
+
+def test_upload_rejects_bodies_that_are_not_images(api):
+    async def scenario(client):
+        asset = (await client.post("/api/assets", json={"assetName": "Text", "assetDescription": "d", "createdBy": "me"})).json()
+        response = await client.put(f"/api/assets/{asset['id']}/images/cover", content=b"not an image at all")
+        assert response.status_code == 415
+        assert "Unsupported image format" in response.json()["detail"]
+
+    api(scenario)
+
+
+def test_rechunk_rejects_an_oversized_head_before_yielding_it():
+    async def nothing_more():
+        return
+        yield
+
+    async def scenario():
+        return [chunk async for chunk in main.rechunk(b"x" * 10, nothing_more(), 4, 9)]
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(scenario())
+    assert raised.value.status_code == 413
@@ -0,0 +1,41 @@
+import base64
+
+from conftest import png_data_url
+
+import main
+
+
+def test_replaced_images_get_new_urls_and_old_blobs_are_deleted(api):
+    async def scenario(client):
+        asset = (await client.post("/api/assets", json={
+            "assetName": "Versions", "assetDescription": "d", "createdBy": "me", "assetPicture": png_data_url(),
+        })).json()
+        asset_id = asset["id"]
+        urls = [asset["assetPicture"]]
+
+        patched = (await client.patch(f"/api/assets/{asset_id}/picture", json={"assetPicture": png_data_url((4, 4))})).json()
+        urls.append(patched["assetPicture"])
+        png = base64.b64decode(png_data_url((6, 6)).split(",", 1)[1])
+        uploaded = (await client.put(f"/api/assets/{asset_id}/images/cover", content=png)).json()
+        urls.append(uploaded["assetPicture"])
+
+        # Every version has its own URL, so nothing a browser cached can show the wrong image
+        assert len(set(urls)) == 3
+        names = [url.removeprefix("/blobs/") for url in urls]
+        assert [await main.blobs.download(name) is not None for name in names] == [False, False, True]
+        for rendition in (patched["assetPictureRenditions"] or {}).values():
+            assert await main.blobs.download(rendition.removeprefix("/blobs/")) is None
+        assert (await client.get(uploaded["assetPicture"])).content == png
+
+    api(scenario)
+
+
+def test_patch_with_an_existing_url_deletes_nothing(api):
+    async def scenario(client):
+        asset = (await client.post("/api/assets", json={
+            "assetName": "Keep", "assetDescription": "d", "createdBy": "me", "assetPicture": png_data_url(),
+        })).json()
+        await client.patch(f"/api/assets/{asset['id']}/picture", json={"assetPicture": "https://example.com/cover.png"})
+        assert await main.blobs.download(f"{asset['id']}/main.png") is not None
+
+    api(scenario)
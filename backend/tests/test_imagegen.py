@@ -0,0 +1,91 @@
+import asyncio
+import base64
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from imagegen import AccessTokenCache, ImageGenerationError, ImageGenerator
+from storage import LocalBlobStore
+
+PNG = b"\x89PNG\r\n\x1a\nfake"
+
+
+class FakeCredential:
+    def __init__(self, lifetime: float = 3600):
+        self.lifetime = lifetime
+        self.issued = 0
+
+    async def get_token(self, scope):
+        self.issued += 1
+        return SimpleNamespace(token=f"token-{self.issued}", expires_on=time.time() + self.lifetime)
+
+
+def upstream(calls: list, status: int = 200):
+    async def handle(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        await asyncio.sleep(0.05)
+        if status != 200:
+            return httpx.Response(status, text="content filtered")
+        return httpx.Response(200, json={"data": [{"b64_json": base64.b64encode(PNG).decode()}]})
+    return httpx.MockTransport(handle)
+
+
+def generator(blobs, calls: list, status: int = 200) -> ImageGenerator:
+    client = httpx.AsyncClient(transport=upstream(calls, status))
+    return ImageGenerator("https://example.openai.azure.com/openai/v1", "gpt-image-1", client,
+                          AccessTokenCache(FakeCredential(), "https://cognitiveservices.azure.com/.default"), blobs)
+
+
+def test_identical_prompts_share_one_generation_and_survive_a_restart(tmp_path):
+    blobs = LocalBlobStore(str(tmp_path))
+    calls = []
+
+    async def scenario():
+        await blobs.open()
+        first = generator(blobs, calls)
+        images = await asyncio.gather(*(first.generate("a poster") for _ in range(3)))
+        assert images == [PNG] * 3
+        assert first.stats() == {"cacheHits": 0, "cacheMisses": 1, "coalesced": 2, "upstreamCalls": 1, "inFlight": 0}
+
+        # A new instance (or a restart) finds the image in the blob cache
+        restarted = generator(blobs, calls)
+        assert await restarted.generate("a poster") == PNG
+        assert restarted.stats()["cacheHits"] == 1
+        assert await restarted.generate("another poster") == PNG
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert calls[0].headers["authorization"] == "Bearer token-1"
+
+
+def test_upstream_errors_carry_their_status_and_are_not_cached(tmp_path):
+    blobs = LocalBlobStore(str(tmp_path))
+    calls = []
+
+    async def scenario():
+        await blobs.open()
+        failing = generator(blobs, calls, status=400)
+        for _ in range(2):
+            with pytest.raises(ImageGenerationError) as raised:
+                await failing.generate("a poster")
+            assert raised.value.status_code == 400
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_access_token_is_refreshed_in_the_background_near_expiry():
+    credential = FakeCredential(lifetime=120)
+    cache = AccessTokenCache(credential, "scope", refresh_margin=300)
+
+    async def scenario():
+        assert await cache.get() == "token-1"
+        # Inside the refresh margin but still valid: served at once, replaced in the background
+        assert await cache.get() == "token-1"
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return await cache.get()
+
+    assert asyncio.run(scenario()) == "token-2"
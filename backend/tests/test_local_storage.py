@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from storage import InMemoryRepository, LocalBlobStore, PreconditionFailedError
+
+
+def test_in_memory_repository_enforces_etags_and_isolates_callers():
+    repo = InMemoryRepository()
+
+    async def scenario():
+        created = await repo.create_asset({"id": "a1", "createdBy": "me", "tags": ["x"]})
+        created["tags"].append("caller-side edit")
+        stored = await repo.get_asset("a1")
+        assert stored["tags"] == ["x"]
+
+        updated = await repo.replace_asset(dict(stored, assetName="B"), if_match=stored["_etag"])
+        assert updated["_etag"] != stored["_etag"]
+        with pytest.raises(PreconditionFailedError):
+            await repo.replace_asset(dict(stored, assetName="C"), if_match=stored["_etag"])
+        assert (await repo.get_asset("a1"))["assetName"] == "B"
+
+    asyncio.run(scenario())
+
+
+def test_local_blob_store_deletes_by_prefix_and_refuses_escaping_names(tmp_path):
+    blobs = LocalBlobStore(str(tmp_path / "blobs"))
+
+    async def scenario():
+        await blobs.open()
+        for name in ("a1/main.png", "a1/main.card.webp", "a1_cover.png", "a10/main.png"):
+            await blobs.upload(name, b"data", "image/png")
+        assert await blobs.delete_prefix("a1/") == 2
+        assert await blobs.delete_prefix("a1_cover") == 1
+        assert await blobs.download("a10/main.png") == b"data"
+        assert not (tmp_path / "blobs" / "a1").exists()
+        with pytest.raises(ValueError):
+            await blobs.upload("../outside.png", b"data", "image/png")
+
+    asyncio.run(scenario())
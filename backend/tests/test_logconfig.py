@@ -0,0 +1,24 @@
+import logging
+
+from logconfig import RateLimitFilter
+
+
+def record(level, lineno=1, **extra):
+    rec = logging.LogRecord("aiflix", level, "main.py", lineno, "message", None, None)
+    rec.__dict__.update(extra)
+    return rec
+
+
+def test_rate_limit_drops_info_beyond_the_burst_per_call_site():
+    limiter = RateLimitFilter(per_second=1e-9, burst=2)
+    assert [limiter.filter(record(logging.INFO)) for _ in range(4)] == [True, True, False, False]
+    assert limiter.filter(record(logging.INFO, lineno=2))
+    assert limiter.suppressed == 2
+
+
+def test_warnings_and_errors_are_never_limited_or_sampled():
+    limiter = RateLimitFilter(per_second=1e-9, burst=1)
+    for level in (logging.WARNING, logging.ERROR, logging.CRITICAL):
+        assert all(limiter.filter(record(level)) for _ in range(50))
+        assert limiter.filter(record(level, sample_rate=0.0))
+    assert limiter.suppressed == 0 and limiter.sampled_out == 0
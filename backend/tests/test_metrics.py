@@ -0,0 +1,21 @@
+import pytest
+
+import metrics
+
+
+def test_metric_subclasses_must_render():
+    class Incomplete(metrics.Metric):
+        type = "gauge"
+
+    with pytest.raises(TypeError):
+        Incomplete("aiflix_incomplete", "Never renders.")
+
+
+def test_registry_renders_route_labelled_requests(api):
+    async def scenario(client):
+        await client.get("/api/assets/missing")
+        text = (await client.get("/metrics")).text
+        assert "# TYPE aiflix_http_requests_total counter" in text
+        assert 'aiflix_http_requests_total{method="GET",route="/api/assets/{asset_id}",status="404"}' in text
+
+    api(scenario)
@@ -0,0 +1,42 @@
+import os
+
+from conftest import png_data_url
+
+import main
+import manage
+
+
+def test_migration_counts_and_keeps_only_values_it_replaced(api):
+    async def scenario(client):
+        inline = png_data_url()
+        await main.repo.create_asset({"id": "a1", "assetName": "A", "createdBy": "me",
+                                      "createdAt": "2026-01-01T00:00:00", "assetPicture": inline})
+        stats = manage.new_migration_state()["stats"]
+        assert await manage.migrate_asset_images(await main.repo.get_asset("a1"), stats, dry_run=False)
+        blob_name = (await main.repo.get_asset("a1"))["assetPicture"]
+        # Versioned like an API upload, so a later replace gets a new URL
+        assert blob_name.startswith("a1/main.") and blob_name.endswith(".png") and blob_name != "a1/main.png"
+        assert stats["imagesUploaded"] == 1 and stats["bytesReclaimed"] == len(inline) - len(blob_name)
+        assert await main.blobs.download(blob_name)
+
+    api(scenario)
+
+
+def test_migration_discards_upload_when_a_concurrent_edit_won(api):
+    async def scenario(client):
+        await main.repo.create_asset({"id": "a2", "assetName": "A", "createdBy": "me",
+                                      "createdAt": "2026-01-01T00:00:00", "screenshots": [png_data_url()]})
+        # Scanned before a user replaced the screenshot
+        scanned = await main.repo.get_asset("a2")
+        current = await main.repo.get_asset("a2")
+        current["screenshots"] = [png_data_url(size=(4, 4))]
+        await main.repo.replace_asset(current)
+
+        stats = manage.new_migration_state()["stats"]
+        assert not await manage.migrate_asset_images(scanned, stats, dry_run=False)
+        assert stats["imagesUploaded"] == 0 and stats["bytesReclaimed"] == 0
+        folder = main.blobs.path_for("a2")
+        assert not os.path.isdir(folder) or not os.listdir(folder)
+        assert (await main.repo.get_asset("a2"))["screenshots"] == current["screenshots"]
+
+    api(scenario)
@@ -0,0 +1,36 @@
+import asyncio
+import json
+import threading
+
+from notifications import NotificationDispatcher
+
+
+def test_failed_batches_are_dead_lettered_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "dead-letter.jsonl"
+    writers = []
+    append = NotificationDispatcher._append
+
+    def recording_append(*args):
+        writers.append(threading.get_ident())
+        append(*args)
+
+    monkeypatch.setattr(NotificationDispatcher, "_append", staticmethod(recording_append))
+
+    async def failing_send(batch):
+        raise ConnectionError("smtp down")
+
+    async def scenario():
+        dispatcher = NotificationDispatcher(failing_send, batch_window=0.01, max_attempts=2, backoff_seconds=0,
+                                            dead_letter_path=str(path))
+        dispatcher.start()
+        for i in range(3):
+            dispatcher.enqueue({"assetId": f"a{i}"})
+        await dispatcher.stop()
+        return dispatcher, threading.get_ident()
+
+    dispatcher, loop_thread = asyncio.run(scenario())
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["notification"]["assetId"] for line in lines] == ["a0", "a1", "a2"]
+    assert {line["error"] for line in lines} == {"smtp down"}
+    assert dispatcher.stats()["deadLettered"] == 3 and dispatcher.retries == 1
+    assert writers and loop_thread not in writers
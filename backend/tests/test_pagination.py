@@ -0,0 +1,32 @@
+import pytest
+
+import main
+
+
+def test_asset_pages_cover_every_asset_once_even_with_equal_timestamps(api):
+    async def scenario(client):
+        for i in range(5):
+            await main.repo.create_asset({"id": f"asset-{i}", "assetName": f"A{i}", "createdBy": "me",
+                                          "createdAt": "2026-01-01T00:00:00"})
+        await main.repo.create_asset({"id": "asset-new", "assetName": "New", "createdBy": "me",
+                                      "createdAt": "2026-02-01T00:00:00"})
+        seen, continuation = [], None
+        while True:
+            params = {"limit": 2, **({"continuation": continuation} if continuation else {})}
+            page = (await client.get("/api/assets/page", params=params)).json()
+            seen += [item["id"] for item in page["items"]]
+            continuation = page["continuationToken"]
+            if continuation is None:
+                break
+        assert seen == ["asset-new", "asset-4", "asset-3", "asset-2", "asset-1", "asset-0"]
+
+    api(scenario)
+
+
+@pytest.mark.parametrize("token", ["-2", "not-a-token", "WyJ4Il0="])
+def test_malformed_continuation_is_rejected(api, token):
+    async def scenario(client):
+        response = await client.get("/api/assets/page", params={"continuation": token})
+        assert response.status_code == 400
+
+    api(scenario)
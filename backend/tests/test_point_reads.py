@@ -0,0 +1,62 @@
+import asyncio
+
+from azure.cosmos import exceptions
+
+from storage import CosmosRepository
+
+
+class AssetsContainer:
+    """The parts of the assets container get_asset uses, counting point reads and queries."""
+
+    def __init__(self, *docs):
+        self.docs = {doc["id"]: doc for doc in docs}
+        self.point_reads = 0
+        self.queries = 0
+
+    async def read_item(self, item, partition_key):
+        self.point_reads += 1
+        doc = self.docs.get(item)
+        if doc is None or doc["createdBy"] != partition_key:
+            raise exceptions.CosmosResourceNotFoundError(status_code=404, message="Not found")
+        return doc
+
+    def query_items(self, query, parameters):
+        self.queries += 1
+        wanted = parameters[0]["value"]
+
+        async def items():
+            for doc in self.docs.values():
+                if doc["id"] == wanted:
+                    yield doc
+        return items()
+
+
+def repository(container: AssetsContainer) -> CosmosRepository:
+    repo = CosmosRepository("https://example.documents.azure.com", "db", "assets", credential=None)
+    repo.container = container
+    return repo
+
+
+def test_known_assets_are_point_read_and_unknown_ones_learned_from_one_query():
+    container = AssetsContainer({"id": "a1", "createdBy": "alice"})
+    repo = repository(container)
+
+    async def scenario():
+        assert (await repo.get_asset("a1"))["id"] == "a1"
+        assert (container.queries, container.point_reads) == (1, 0)
+        for _ in range(3):
+            assert (await repo.get_asset("a1"))["id"] == "a1"
+        assert (container.queries, container.point_reads) == (1, 3)
+
+    asyncio.run(scenario())
+    assert (repo.partition_key_hits, repo.partition_key_misses) == (3, 1)
+
+
+def test_a_stale_partition_key_falls_back_to_a_query():
+    container = AssetsContainer()
+    repo = repository(container)
+    repo.asset_partition_keys["gone"] = "alice"
+
+    assert asyncio.run(repo.get_asset("gone")) is None
+    assert (container.point_reads, container.queries) == (1, 1)
+    assert "gone" not in repo.asset_partition_keys
@@ -0,0 +1,39 @@
+import argparse
+
+import main
+import manage
+
+
+def test_ratings_are_materialized_on_the_asset_and_read_without_a_ratings_query(api, monkeypatch):
+    async def scenario(client):
+        asset_id = (await client.post("/api/assets", json={"assetName": "A", "assetDescription": "d", "createdBy": "me"})).json()["id"]
+        for user, rating in (("u1", 2), ("u2", 5), ("u1", 4)):
+            await client.post(f"/api/assets/{asset_id}/ratings", json={"rating": rating, "userId": user, "userName": user})
+
+        stored = await main.repo.get_asset(asset_id)
+        assert (stored["ratingSum"], stored["ratingCount"]) == (9, 2)
+
+        async def no_ratings_query(*args, **kwargs):
+            raise AssertionError("ratings container queried")
+        monkeypatch.setattr(main.repo, "get_rating_stats", no_ratings_query)
+        monkeypatch.setattr(main.repo, "list_ratings", no_ratings_query)
+        asset = (await client.get(f"/api/assets/{asset_id}")).json()
+        assert (asset["averageRating"], asset["ratingCount"]) == (4.5, 2)
+
+    api(scenario)
+
+
+def test_repair_ratings_recomputes_drifted_aggregates(api):
+    async def scenario(client):
+        asset_id = (await client.post("/api/assets", json={"assetName": "A", "assetDescription": "d", "createdBy": "me"})).json()["id"]
+        await client.post(f"/api/assets/{asset_id}/ratings", json={"rating": 3, "userId": "u1", "userName": "U1"})
+        drifted = await main.repo.get_asset(asset_id)
+        drifted["ratingSum"], drifted["ratingCount"] = 40, 10
+        await main.repo.replace_asset(drifted)
+
+        args = argparse.Namespace(asset_id=None, concurrency=2)
+        assert await manage.repair_ratings(args) == 0
+        repaired = await main.repo.get_asset(asset_id)
+        assert (repaired["ratingSum"], repaired["ratingCount"]) == (3, 1)
+
+    api(scenario)
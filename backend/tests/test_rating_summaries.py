@@ -0,0 +1,36 @@
+import main
+from storage import rating_id
+
+
+def test_summaries_fall_back_to_ratings_for_assets_without_aggregates(api):
+    async def scenario(client):
+        # Written before the aggregates existed and not yet repaired
+        await main.repo.create_asset({"id": "legacy", "assetName": "Legacy", "createdBy": "me",
+                                      "createdAt": "2026-01-01T00:00:00"})
+        for user, rating in (("u1", 4), ("u2", 5)):
+            await main.repo.save_rating({"id": rating_id("legacy", user), "assetId": "legacy", "userId": user,
+                                         "rating": rating, "createdAt": "2026-01-02T00:00:00"})
+        created = (await client.post("/api/assets", json={"assetName": "New", "assetDescription": "d", "createdBy": "me"})).json()
+        await client.post(f"/api/assets/{created['id']}/ratings", json={"rating": 3, "userId": "u1", "userName": "U1"})
+
+        response = await client.post("/api/ratings/summary", json={"assetIds": ["legacy", created["id"]], "userId": "u1"})
+        summaries = response.json()["summaries"]
+        assert summaries["legacy"] == {"averageRating": 4.5, "totalCount": 2, "userRating": 4}
+        assert summaries[created["id"]] == {"averageRating": 3, "totalCount": 1, "userRating": 3}
+
+    api(scenario)
+
+
+def test_summaries_round_averages_like_the_ratings_endpoint(api):
+    async def scenario(client):
+        created = (await client.post("/api/assets", json={"assetName": "A", "assetDescription": "d", "createdBy": "me"})).json()
+        unrated = (await client.post("/api/assets", json={"assetName": "B", "assetDescription": "d", "createdBy": "me"})).json()
+        for user, rating in (("u1", 4), ("u2", 4), ("u3", 5)):
+            await client.post(f"/api/assets/{created['id']}/ratings", json={"rating": rating, "userId": user, "userName": user})
+
+        summaries = (await client.post("/api/ratings/summary", json={"assetIds": [created["id"], unrated["id"]]})).json()["summaries"]
+        ratings = (await client.get(f"/api/assets/{created['id']}/ratings")).json()
+        assert summaries[created["id"]]["averageRating"] == ratings["averageRating"] == 4.3
+        assert summaries[unrated["id"]] == {"averageRating": 0, "totalCount": 0, "userRating": None}
+
+    api(scenario)
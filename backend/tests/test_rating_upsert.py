@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+
+import main
+import manage
+from storage import rating_id
+
+
+def test_concurrent_ratings_by_one_user_leave_one_document(api):
+    async def scenario(client):
+        asset_id = (await client.post("/api/assets", json={"assetName": "A", "assetDescription": "d", "createdBy": "me"})).json()["id"]
+        responses = await asyncio.gather(*(
+            client.post(f"/api/assets/{asset_id}/ratings", json={"rating": rating, "userId": "u1", "userName": "U1"})
+            for rating in (1, 2, 3, 4, 5)))
+        assert {r.status_code for r in responses} <= {200, 409}
+
+        ratings = await main.repo.list_ratings(asset_id)
+        assert [r["id"] for r in ratings] == [rating_id(asset_id, "u1")]
+        asset = await main.repo.get_asset(asset_id)
+        assert (asset["ratingSum"], asset["ratingCount"]) == (ratings[0]["rating"], 1)
+
+    api(scenario)
+
+
+def test_rating_under_a_legacy_id_is_moved_to_the_derived_id(api):
+    async def scenario(client):
+        asset_id = (await client.post("/api/assets", json={"assetName": "A", "assetDescription": "d", "createdBy": "me"})).json()["id"]
+        await main.repo.save_rating({"id": "legacy-random-id", "assetId": asset_id, "userId": "u1", "rating": 2,
+                                     "createdAt": "2026-01-01T00:00:00"})
+        await client.post(f"/api/assets/{asset_id}/ratings", json={"rating": 5, "userId": "u1", "userName": "U1"})
+        assert [(r["id"], r["rating"]) for r in await main.repo.list_ratings(asset_id)] == [(rating_id(asset_id, "u1"), 5)]
+
+    api(scenario)
+
+
+def test_compact_ratings_keeps_each_users_newest(api):
+    async def scenario(client):
+        asset_id = (await client.post("/api/assets", json={"assetName": "A", "assetDescription": "d", "createdBy": "me"})).json()["id"]
+        for doc_id, rating, created in (("old", 1, "2026-01-01T00:00:00"), ("new", 4, "2026-01-02T00:00:00")):
+            await main.repo.save_rating({"id": doc_id, "assetId": asset_id, "userId": "u1", "rating": rating, "createdAt": created})
+
+        args = argparse.Namespace(asset_id=asset_id, concurrency=2, dry_run=False)
+        assert await manage.compact_ratings(args) == 0
+        assert [(r["id"], r["rating"]) for r in await main.repo.list_ratings(asset_id)] == [(rating_id(asset_id, "u1"), 4)]
+        asset = await main.repo.get_asset(asset_id)
+        assert (asset["ratingSum"], asset["ratingCount"]) == (4, 1)
+
+    api(scenario)
@@ -0,0 +1,29 @@
+import io
+
+from PIL import Image
+
+from conftest import png_data_url
+
+import main
+from renditions import RENDITION_SIZES
+
+
+def test_create_generates_every_rendition(api):
+    async def scenario(client):
+        created = await client.post("/api/assets", json={
+            "assetName": "Renditions", "assetDescription": "d", "createdBy": "me",
+            "assetPicture": png_data_url(size=(1600, 900)), "screenshots": [png_data_url()],
+        })
+        assert created.status_code == 200
+        asset = created.json()
+        assert set(asset["assetPictureRenditions"]) == set(RENDITION_SIZES)
+        assert [set(r) for r in asset["screenshotRenditions"]] == [set(RENDITION_SIZES)]
+
+        # Scaled down to fit the bounding box, never up
+        card = await main.blobs.download(f"{asset['id']}/main.card.webp")
+        with Image.open(io.BytesIO(card)) as image:
+            assert image.format == "WEBP" and max(image.size) == RENDITION_SIZES["card"][0]
+        hero = await client.get(asset["assetPictureRenditions"]["hero"])
+        assert hero.status_code == 200
+
+    api(scenario)
@@ -0,0 +1,50 @@
+from conftest import png_data_url
+
+import main
+
+
+def test_replica_serves_blob_names_not_urls_after_create(api):
+    async def scenario(client):
+        created = await client.post("/api/assets", json={
+            "assetName": "Replica", "assetDescription": "d", "createdBy": "me",
+            "assetPicture": png_data_url(), "screenshots": [png_data_url()],
+        })
+        assert created.status_code == 200
+        asset_id = created.json()["id"]
+        assert main.asset_replica.is_fresh()
+
+        # The replica holds bare blob names; only responses carry URLs
+        stored = main.asset_replica.assets[asset_id]
+        assert stored["assetPicture"] == f"{asset_id}/main.png"
+        assert all(not name.startswith("/blobs") for name in stored["assetPictureRenditions"].values())
+
+        fetched = (await client.get(f"/api/assets/{asset_id}")).json()
+        listed = next(a for a in (await client.get("/api/assets")).json() if a["id"] == asset_id)
+        for asset in (created.json(), fetched, listed):
+            assert asset["assetPicture"] == f"/blobs/{asset_id}/main.png"
+            assert asset["assetPictureRenditions"]["card"] == f"/blobs/{asset_id}/main.card.webp"
+            assert asset["screenshots"] == [f"/blobs/{asset_id}/screenshot_0.png"]
+
+    api(scenario)
+
+
+def test_replica_readers_cannot_change_what_it_serves(api):
+    async def scenario(client):
+        created = (await client.post("/api/assets", json={
+            "assetName": "Isolated", "assetDescription": "d", "createdBy": "me",
+            "assetPicture": png_data_url(), "screenshots": [png_data_url()], "tags": ["a"],
+        })).json()
+        asset_id = created["id"]
+
+        for read in (main.asset_replica.get_asset(asset_id),
+                     next(a for a in main.asset_replica.list_assets() if a["id"] == asset_id)):
+            read["tags"].append("mutated")
+            read["screenshots"][0] = "elsewhere.png"
+            read["assetPictureRenditions"]["card"] = "elsewhere.webp"
+
+        stored = main.asset_replica.get_asset(asset_id)
+        assert stored["tags"] == ["a"]
+        assert stored["screenshots"] == [f"{asset_id}/screenshot_0.png"]
+        assert stored["assetPictureRenditions"]["card"] == f"{asset_id}/main.card.webp"
+
+    api(scenario)
@@ -0,0 +1,44 @@
+import asyncio
+
+import main
+from storage import AssetCatalogReplica
+
+
+def test_search_is_unavailable_until_the_index_loads_then_retries(api, monkeypatch):
+    monkeypatch.setattr(main, "INDEX_LOAD_RETRY_SECONDS", 0.01)
+    start = AssetCatalogReplica.start
+    attempts = []
+
+    async def flaky_start(self):
+        attempts.append(1)
+        if len(attempts) <= 2:
+            raise ConnectionError("change feed unavailable")
+        await start(self)
+
+    monkeypatch.setattr(AssetCatalogReplica, "start", flaky_start)
+
+    async def scenario(client):
+        response = await client.get("/api/search", params={"q": "anything"})
+        assert response.status_code == 503 and response.headers["Retry-After"]
+
+        for _ in range(100):
+            if main.indexes_loaded:
+                break
+            await asyncio.sleep(0.01)
+        assert len(attempts) == 3
+        await client.post("/api/assets", json={"assetName": "Retrieval demo", "assetDescription": "d", "createdBy": "me"})
+        results = (await client.get("/api/search", params={"q": "retrieval"})).json()["results"]
+        assert [hit["asset"]["assetName"] for hit in results] == ["Retrieval demo"]
+
+    api(scenario)
+
+
+def test_search_finds_other_instances_writes(api):
+    async def scenario(client):
+        await main.repo.create_asset({"id": "remote", "assetName": "Vector store", "assetDescription": "d",
+                                      "createdBy": "elsewhere", "createdAt": "2026-01-01T00:00:00"})
+        await main.asset_replica.sync()
+        results = (await client.get("/api/search", params={"q": "vector"})).json()["results"]
+        assert [hit["asset"]["id"] for hit in results] == ["remote"]
+
+    api(scenario)
@@ -0,0 +1,41 @@
+import asyncio
+import re
+
+import main
+
+
+def phases(response) -> dict:
+    return {name: float(ms) for name, ms in re.findall(r"([\w-]+);dur=([\d.]+)", response.headers["server-timing"])}
+
+
+def test_responses_report_their_phases_in_server_timing(api):
+    async def scenario(client):
+        asset_id = (await client.post("/api/assets", json={"assetName": "Timed", "assetDescription": "d", "createdBy": "me"})).json()["id"]
+        timings = phases(await client.get(f"/api/assets/{asset_id}/full"))
+        assert {"asset", "comments", "improvements", "handler", "total"} <= set(timings)
+        assert timings["total"] >= timings["handler"]
+        # Unmatched routes still get a total
+        assert "total" in phases(await client.get("/api/nowhere"))
+
+    api(scenario)
+
+
+def test_profiler_samples_requests_while_enabled_and_dumps_when_disabled(api, tmp_path, monkeypatch):
+    monkeypatch.setattr(main.profiler, "output_dir", str(tmp_path))
+
+    async def scenario(client):
+        enabled = (await client.put("/api/admin/profiler", json={"enabled": True, "samplePercent": 100, "intervalMs": 1})).json()
+        assert enabled["enabled"] and enabled["samplePercent"] == 100
+        # Slow enough that the sampler thread sees the requests in flight
+        async def slow_read_assets():
+            await asyncio.sleep(0.05)
+            return []
+        monkeypatch.setattr(main, "read_assets", slow_read_assets)
+        for _ in range(3):
+            await client.get("/api/assets")
+        assert (await client.get("/api/admin/profiler")).json()["profiledRequests"] >= 3
+
+        disabled = (await client.put("/api/admin/profiler", json={"enabled": False})).json()
+        assert not disabled["enabled"] and disabled["dump"].startswith(str(tmp_path))
+
+    api(scenario)
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+
+from storage.cosmos import SignedUrlCache
+
+
+def cache(signed: list, **kwargs) -> SignedUrlCache:
+    def sign(blob_name, expiry):
+        signed.append((blob_name, expiry))
+        return f"https://example.blob.core.windows.net/images/{blob_name}?se={expiry.isoformat()}"
+    return SignedUrlCache(sign, bucket_seconds=1800, **kwargs)
+
+
+def test_reads_within_a_bucket_share_one_signature_valid_past_its_end():
+    signed = []
+    urls = cache(signed)
+    start = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+    first = urls.get("a/cover.png", start)
+    assert urls.get("a/cover.png", start + timedelta(minutes=29)) == first
+    assert len(signed) == 1
+    # Expires at the end of the next bucket: always valid for at least one bucket length
+    assert signed[0][1] == start + timedelta(hours=1)
+
+    assert urls.get("a/cover.png", start + timedelta(minutes=30)) != first
+    assert len(signed) == 2 and urls.stats()["hits"] == 1
+
+
+def test_cache_is_bounded_and_forgets_deleted_blobs():
+    signed = []
+    urls = cache(signed, max_entries=2)
+    now = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+    for name in ("a", "b", "c"):
+        urls.get(name, now)
+    assert list(urls.entries) == ["b", "c"] and urls.evictions == 1
+
+    urls.invalidate("b")
+    urls.get("b", now)
+    assert len(signed) == 4
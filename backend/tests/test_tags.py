@@ -0,0 +1,33 @@
+import main
+
+
+def other_instance_asset(asset_id, tags):
+    # Written straight to storage, as another instance would; this one only learns of it from the change feed
+    return {"id": asset_id, "assetName": asset_id, "assetDescription": "d", "createdBy": "elsewhere",
+            "createdAt": "2026-01-01T00:00:00", "tags": tags}
+
+
+def test_tag_index_follows_other_instances_writes(api):
+    async def scenario(client):
+        await main.repo.create_asset(other_instance_asset("remote", ["RAG", "demo"]))
+        await main.asset_replica.sync()
+
+        filtered = (await client.get("/api/assets", params={"tag": "rag"})).json()
+        assert [asset["id"] for asset in filtered] == ["remote"]
+        assert {"tag": "rag", "count": 1} in (await client.get("/api/tags")).json()["tags"]
+
+    api(scenario)
+
+
+def test_tag_requests_answer_503_instead_of_scanning_while_the_feed_is_behind(api, monkeypatch):
+    async def scenario(client):
+        monkeypatch.setattr(main, "replica_is_fresh", lambda: False)
+
+        async def no_scans():
+            raise AssertionError("tag requests must not scan the catalog")
+        monkeypatch.setattr(main.repo, "list_assets", no_scans)
+
+        for response in (await client.get("/api/assets", params={"tag": "agents"}), await client.get("/api/tags")):
+            assert response.status_code == 503 and response.headers["Retry-After"]
+
+    api(scenario)
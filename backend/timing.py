@@ -0,0 +1,100 @@
+"""Per-request timing breakdown, reported in the Server-Timing header.
+
+TimingMiddleware gives every request a span recorder. Code on the request
+path records phases with `span()` / `timed()`, including work run in tasks
+the request spawns (they share the recorder), and the middleware adds
+"name;dur=ms" entries for every phase plus the total to the response
+headers. Browser dev tools show them per request under Network > Timing.
+
+A phase recorded more than once (e.g. one span per page of a query) is
+reported as the sum. The total is the time until the response headers are
+sent, so it includes serialization but not streaming a body.
+"""
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Optional
+
+from fastapi.routing import APIRoute
+
+from profiler import SamplingProfiler
+
+# Phase name -> milliseconds, for the request being served
+current_spans: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("current_spans", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Time the block as phase `name` of the current request (a no-op outside one)."""
+    spans = current_spans.get()
+    if spans is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans[name] = spans.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+async def timed(name: str, awaitable: Awaitable):
+    """Await `awaitable` as phase `name` of the current request."""
+    with span(name):
+        return await awaitable
+
+
+def server_timing(spans: Dict[str, float]) -> str:
+    """A Server-Timing header value."""
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in spans.items())
+
+
+class TimedRoute(APIRoute):
+    """Records the whole FastAPI route handler (request parsing, endpoint, response serialization) as "handler"."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            with span("handler"):
+                return await handler(request)
+
+        return timed_handler
+
+
+class TimingMiddleware:
+    """Records spans for each request and reports them in Server-Timing.
+
+    With a profiler enabled, also runs it for a random sample of requests.
+    """
+
+    def __init__(self, app, profiler: Optional[SamplingProfiler] = None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        spans: Dict[str, float] = {}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timings = dict(spans, total=(time.perf_counter() - start) * 1000)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing(timings).encode("latin-1"))
+                ]
+            await send(message)
+
+        profiler = self.profiler
+        profiled = profiler is not None and profiler.enabled and random.random() * 100 < profiler.sample_percent
+        token = current_spans.set(spans)
+        if profiled:
+            profiler.begin()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if profiled:
+                profiler.end()
+            current_spans.reset(token)
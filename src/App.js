@@ -61,6 +61,8 @@ function AuthRequired({ children }) {
 function HomePage({ onAddAsset, searchQuery, selectedCategory, onCategoriesLoaded }) {
   const [assets, setAssets] = useState([]);
   const [loadingAssets, setLoadingAssets] = useState(true);
+  const [searchResults, setSearchResults] = useState([]);
+  const [searching, setSearching] = useState(false);
 
   const fetchAssets = async () => {
     try {
@@ -88,14 +90,35 @@ function HomePage({ onAddAsset, searchQuery, selectedCategory, onCategoriesLoade
     }
   }, [assets, onCategoriesLoaded]);
 
-  // Filter assets based on search query and selected category
-  let filteredAssets = assets;
-  if (searchQuery) {
-    filteredAssets = filteredAssets.filter(asset =>
-      asset.assetName.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      (asset.assetDescription && asset.assetDescription.toLowerCase().includes(searchQuery.toLowerCase()))
-    );
-  }
+  // Search on the server, waiting for a pause in typing; stale responses are ignored
+  useEffect(() => {
+    if (!searchQuery.trim()) {
+      setSearchResults([]);
+      return;
+    }
+    let cancelled = false;
+    setSearching(true);
+    const timer = setTimeout(async () => {
+      try {
+        const response = await api.get(`/api/search?q=${encodeURIComponent(searchQuery)}&limit=50`);
+        if (response.ok && !cancelled) {
+          const data = await response.json();
+          setSearchResults(data.results.map(hit => hit.asset));
+        }
+      } catch (error) {
+        console.error('Search failed:', error);
+      } finally {
+        if (!cancelled) setSearching(false);
+      }
+    }, 200);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery]);
+
+  // Search results (best match first) or the whole catalog, narrowed to the selected category
+  let filteredAssets = searchQuery.trim() ? searchResults : assets;
   if (selectedCategory) {
     filteredAssets = filteredAssets.filter(asset => asset.primaryCustomerScenario === selectedCategory);
   }
@@ -105,7 +128,7 @@ function HomePage({ onAddAsset, searchQuery, selectedCategory, onCategoriesLoade
     id: asset.id,
     title: asset.assetName,
     year: asset.createdBy,
-    image: asset.assetPicture || 'https://via.placeholder.com/250x350/1a1a1a/ff0000?text=No+Image'
+    image: asset.assetPictureRenditions?.card || asset.assetPicture || 'https://via.placeholder.com/250x350/1a1a1a/ff0000?text=No+Image'
   });
 
   // Group assets by primaryCustomerScenario
@@ -132,7 +155,7 @@ function HomePage({ onAddAsset, searchQuery, selectedCategory, onCategoriesLoade
             title={searchQuery ? `Search results for "${searchQuery}"` : selectedCategory}
             items={filteredAssets.map(toCardItem)}
             showProgress={false}
-            loading={loadingAssets}
+            loading={loadingAssets || searching}
           />
         ) : (
           categoryNames.map(category => (
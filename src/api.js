@@ -196,6 +196,13 @@ export const api = {
     body: JSON.stringify(data),
   }),
   
+  // Send a Blob/File as the raw request body (e.g. streaming image uploads)
+  putBinary: (endpoint, blob) => apiFetch(endpoint, {
+    method: 'PUT',
+    headers: { 'Content-Type': blob.type || 'application/octet-stream' },
+    body: blob,
+  }),
+  
   patch: (endpoint, data) => apiFetch(endpoint, {
     method: 'PATCH',
     body: JSON.stringify(data),
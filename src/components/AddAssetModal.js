@@ -101,10 +101,19 @@ function AddAssetModal({ isOpen, onClose, onSubmit, asset: editAsset }) {
       
       const data = await response.json();
       const imageDataUrl = `data:${data.content_type};base64,${data.image_data}`;
-      setPicturePreview(imageDataUrl);
       
-      // Update the asset with the generated image
-      await api.patch(`/api/assets/${targetAsset.id}/picture`, { assetPicture: imageDataUrl });
+      // Upload the generated image as binary rather than base64-in-JSON
+      const imageBlob = await (await fetch(imageDataUrl)).blob();
+      const uploadResponse = await api.putBinary(`/api/assets/${targetAsset.id}/images/cover`, imageBlob);
+      
+      if (!uploadResponse.ok) {
+        // A 413 or 415 may come from a proxy without a JSON body
+        const errorData = await uploadResponse.json().catch(() => ({}));
+        throw new Error(errorData.detail || `Failed to upload image (${uploadResponse.status})`);
+      }
+      
+      // Only show the picture once it is actually saved
+      setPicturePreview(imageDataUrl);
     } catch (error) {
       console.error('Error generating image:', error);
       alert(`Failed to generate image: ${error.message}`);
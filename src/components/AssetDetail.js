@@ -10,6 +10,7 @@ function AssetDetail() {
   const navigate = useNavigate();
   const [asset, setAsset] = useState(null);
   const [improvements, setImprovements] = useState([]);
+  const [initialComments, setInitialComments] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [user, setUser] = useState(null);
@@ -53,19 +54,15 @@ function AssetDetail() {
   useEffect(() => {
     const fetchAsset = async () => {
       try {
-        const response = await api.get(`/api/assets/${id}`);
+        // Asset, improvements and the newest comments in a single request
+        const response = await api.get(`/api/assets/${id}/full`);
         if (!response.ok) {
           throw new Error('Asset not found');
         }
         const data = await response.json();
-        setAsset(data);
-        
-        // Also fetch improvements
-        const improvementsResponse = await api.get(`/api/assets/${id}/improvements`);
-        if (improvementsResponse.ok) {
-          const improvementsData = await improvementsResponse.json();
-          setImprovements(improvementsData);
-        }
+        setAsset(data.asset);
+        setImprovements(data.improvements);
+        setInitialComments(data.comments);
       } catch (err) {
         setError(err.message);
       } finally {
@@ -77,23 +74,18 @@ function AssetDetail() {
   }, [id]);
 
   const refreshAsset = async () => {
-    const response = await api.get(`/api/assets/${id}`);
+    const response = await api.get(`/api/assets/${id}/full`);
     if (response.ok) {
       const data = await response.json();
-      setAsset(data);
-    }
-    // Also refresh improvements
-    const improvementsResponse = await api.get(`/api/assets/${id}/improvements`);
-    if (improvementsResponse.ok) {
-      const improvementsData = await improvementsResponse.json();
-      setImprovements(improvementsData);
+      setAsset(data.asset);
+      setImprovements(data.improvements);
     }
   };
 
   const handleDelete = async () => {
     setIsDeleting(true);
     try {
-      const response = await api.delete(`/api/assets/${id}`);
+      const response = await api.delete(`/api/assets/${id}?background=true`);
       
       if (!response.ok) {
         const errorData = await response.json();
@@ -143,7 +135,7 @@ function AssetDetail() {
         <div className="asset-detail-header">
           <div className="asset-detail-image">
             {asset.assetPicture ? (
-              <img src={asset.assetPicture} alt={asset.assetName} />
+              <img src={asset.assetPictureRenditions?.hero || asset.assetPicture} alt={asset.assetName} />
             ) : (
               <div className="no-image">No Image</div>
             )}
@@ -302,7 +294,7 @@ function AssetDetail() {
               contributor: imp.contributorName
             })));
           const allScreenshots = [
-            ...assetScreenshots.map(s => ({ data: s, caption: null, contributor: null })),
+            ...assetScreenshots.map((s, i) => ({ data: asset.screenshotRenditions?.[i]?.full || s, caption: null, contributor: null })),
             ...improvementScreenshots
           ];
           
@@ -343,7 +335,7 @@ function AssetDetail() {
         })()}
 
         <div className="asset-detail-section">
-          <Comments assetId={id} user={user} />
+          <Comments assetId={id} user={user} initialComments={initialComments} />
         </div>
       </div>
 
@@ -2,20 +2,36 @@ import React, { useState, useEffect } from 'react';
 import './Comments.css';
 import api from '../api';
 
-const Comments = ({ assetId, user }) => {
-  const [comments, setComments] = useState([]);
+const COMMENTS_PAGE_SIZE = 20;
+
+// `initialComments` is the first page ({ items, continuationToken, totalCount }) when the
+// parent already loaded it (GET /api/assets/{id}/full), which saves the first fetch.
+const Comments = ({ assetId, user, initialComments }) => {
+  const [comments, setComments] = useState(initialComments?.items || []);
+  const [continuationToken, setContinuationToken] = useState(initialComments?.continuationToken || null);
+  const [totalCount, setTotalCount] = useState(initialComments?.totalCount || 0);
   const [newComment, setNewComment] = useState('');
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+
+  const fetchPage = async (continuation) => {
+    const params = new URLSearchParams({ limit: COMMENTS_PAGE_SIZE });
+    if (continuation) params.set('continuation', continuation);
+    const response = await api.get(`/api/assets/${assetId}/comments?${params}`);
+    if (!response.ok) {
+      throw new Error(`Failed to fetch comments: ${response.status}`);
+    }
+    return response.json();
+  };
 
   const fetchComments = async () => {
     setIsLoading(true);
     try {
-      const response = await api.get(`/api/assets/${assetId}/comments`);
-      if (response.ok) {
-        const data = await response.json();
-        setComments(data);
-      }
+      const page = await fetchPage(null);
+      setComments(page.items);
+      setContinuationToken(page.continuationToken);
+      setTotalCount(page.totalCount);
     } catch (error) {
       console.error('Failed to fetch comments:', error);
     } finally {
@@ -23,9 +39,31 @@ const Comments = ({ assetId, user }) => {
     }
   };
 
+  const loadMore = async () => {
+    setIsLoadingMore(true);
+    try {
+      const page = await fetchPage(continuationToken);
+      // A comment posted since the first page may push one we already have onto this page
+      setComments(prev => [...prev, ...page.items.filter(item => !prev.some(c => c.id === item.id))]);
+      setContinuationToken(page.continuationToken);
+      setTotalCount(page.totalCount);
+    } catch (error) {
+      console.error('Failed to load more comments:', error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
+    if (initialComments) {
+      setComments(initialComments.items);
+      setContinuationToken(initialComments.continuationToken);
+      setTotalCount(initialComments.totalCount);
+      setIsLoading(false);
+      return;
+    }
     fetchComments();
-  }, [assetId]);
+  }, [assetId, initialComments]);
 
   const submitComment = async (e) => {
     e.preventDefault();
@@ -48,8 +86,11 @@ const Comments = ({ assetId, user }) => {
       });
 
       if (response.ok) {
+        const created = await response.json();
         setNewComment('');
-        fetchComments(); // Refresh comments
+        // Newest first: the new comment goes on top, no need to refetch the list
+        setComments(prev => [created, ...prev]);
+        setTotalCount(count => count + 1);
       } else {
         const error = await response.json();
         alert(error.detail || 'Failed to add comment');
@@ -73,7 +114,8 @@ const Comments = ({ assetId, user }) => {
       );
 
       if (response.ok) {
-        fetchComments(); // Refresh comments
+        setComments(prev => prev.filter(c => c.id !== commentId));
+        setTotalCount(count => Math.max(0, count - 1));
       } else {
         const error = await response.json();
         alert(error.detail || 'Failed to delete comment');
@@ -117,7 +159,7 @@ const Comments = ({ assetId, user }) => {
   return (
     <div className="comments-container">
       <h3 className="comments-title">
-        Comments {comments.length > 0 && <span className="comment-count">({comments.length})</span>}
+        Comments {totalCount > 0 && <span className="comment-count">({totalCount})</span>}
       </h3>
 
       {user?.userId ? (
@@ -173,6 +215,11 @@ const Comments = ({ assetId, user }) => {
             </div>
           ))
         )}
+        {!isLoading && continuationToken && (
+          <button className="load-more-comments-btn" onClick={loadMore} disabled={isLoadingMore}>
+            {isLoadingMore ? 'Loading...' : `Show more comments (${totalCount - comments.length})`}
+          </button>
+        )}
       </div>
     </div>
   );
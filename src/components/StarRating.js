@@ -19,7 +19,7 @@ const StarRating = ({ assetId, user, onRatingChange }) => {
 
   const fetchRatings = async () => {
     try {
-      const response = await fetch(`${API_URL}/api/assets/${assetId}/ratings`);
+      const response = await fetch(`${API_URL}/api/assets/${assetId}/ratings?includeRatings=false`);
       if (response.ok) {
         const data = await response.json();
         setAverageRating(data.averageRating || 0);